@@ -0,0 +1,236 @@
+"""
+asyncio versions of the REST clients, used by the opt-in async runtime (BOT_RUNTIME=async).
+They subclass the blocking clients so config, prompts and response parsing stay shared;
+only the transport is replaced with a shared aiohttp session.
+"""
+import asyncio
+import json
+import time
+import aiohttp
+
+from .xing_rest import XingRestTrader
+from .tr_specs import TR_SPECS, TRPager
+from .records import Quote
+from src.utils.single_flight import AsyncSingleFlight
+from src.utils.flow import run_async
+from .gemini import GeminiAdvisor
+from .brave_search import BraveSearchClient
+from .public_data import PublicDataClient
+
+def create_session(limit=100):
+    """One pooled session for all async clients (keep-alive, bounded connections)."""
+    connector = aiohttp.TCPConnector(limit=limit, limit_per_host=limit // 2, ttl_dns_cache=300)
+    return aiohttp.ClientSession(connector=connector)
+
+
+class AsyncXingRestTrader(XingRestTrader):
+    """Quote/chart TRs as coroutines. Orders stay on the blocking XingRestTrader."""
+    def __init__(self, session, config_file="xing_config.json", tokens=None, limiter=None, quote_cache=None,
+                 last_values=None, live_bars=None):
+        super().__init__(config_file)
+        self.session = session
+        self.flight = AsyncSingleFlight()
+        if tokens is not None:
+            self.tokens = tokens
+        if limiter is not None:
+            self.limiter = limiter
+        if quote_cache is not None:
+            self.quote_cache = quote_cache
+        if last_values is not None:
+            self.last_values = last_values
+        if live_bars is not None:
+            self.live_bars = live_bars
+
+    async def get_access_token(self):
+        if self.config is None:
+            return False
+        # TokenManager is blocking but single-flight and almost always a cache hit
+        self.access_token = await asyncio.to_thread(self.tokens.get_token)
+        return bool(self.access_token)
+
+    async def _send_once(self, url, tr_cd, body, timeout, tr_cont="N", tr_cont_key=""):
+        started = None
+        while True:
+            wait = self.limiter.try_acquire(tr_cd)
+            if wait == 0: break
+            if started is None: started = time.monotonic()
+            await asyncio.sleep(wait)
+        if started is not None:
+            self.limiter.record_wait(tr_cd, time.monotonic() - started)
+        async with self.session.post(url, headers=self._headers(tr_cd, tr_cont, tr_cont_key), json=body, ssl=False, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+            return response.status, await response.text(), response.headers
+
+    async def _exchange(self, url, tr_cd, body, timeout=10, tr_cont="N", tr_cont_key=""):
+        """POST a TR, refreshing a rejected token once. Returns (status, text, headers)."""
+        # Pick up a background refresh at once; only an expired token needs the (threaded) fetch
+        token = self.tokens.peek()
+        if token is None:
+            await self.get_access_token()
+        else:
+            self.access_token = token
+        token = self.access_token
+        status, text, headers = await self._send_once(url, tr_cd, body, timeout, tr_cont, tr_cont_key)
+        if self._is_auth_error(status, text):
+            self.tokens.invalidate(token)
+            if tr_cd in self.ORDER_TRS: return status, text, headers
+            if await self.get_access_token():
+                status, text, headers = await self._send_once(url, tr_cd, body, timeout, tr_cont, tr_cont_key)
+        return status, text, headers
+
+    async def _post_tr(self, url, tr_cd, body, timeout=10):
+        """POST a TR. Returns the parsed JSON on HTTP 200, otherwise None."""
+        try:
+            status, text, _ = await self._exchange(url, tr_cd, body, timeout)
+            if status == 200:
+                return json.loads(text)
+            print(f"XingRestTrader: {tr_cd} Request Failed: HTTP {status}", flush=True)
+            return None
+        except Exception as e:
+            print(f"Error {tr_cd}: {e}")
+            return None
+
+    async def iter_tr(self, tr_cd, code=None, max_rows=None, since=None, **params):
+        """Async generator counterpart of XingRestTrader.iter_tr (same specs and stop rules)."""
+        spec = TR_SPECS[tr_cd]
+        pager = TRPager(spec, max_rows, since)
+        url = spec.url(self.base_url)
+        cont, cont_key = None, ""
+        while True:
+            body = spec.body(code, cont, count=pager.next_count(), **params)
+            status, text, headers = await self._exchange(url, tr_cd, body, spec.timeout or 10, "Y" if cont else "N", cont_key)
+            if status != 200:
+                raise RuntimeError(f"{tr_cd} HTTP {status}: {text[:200]}")
+            result = json.loads(text)
+            for row in pager.feed(spec.rows(result)):
+                yield row
+            if pager.done: return
+            nxt = spec.next_cont(result, headers)
+            if nxt is None: return
+            cont, cont_key = nxt
+
+    async def fetch_tr(self, tr_cd, code=None, max_rows=None, since=None, **params):
+        if not self.access_token: return None
+        rows = []
+        try:
+            async for row in self.iter_tr(tr_cd, code, max_rows=max_rows, since=since, **params):
+                rows.append(row)
+        except Exception as e:
+            print(f"Error {tr_cd}: {e}")
+            if not rows: return None
+        if TR_SPECS[tr_cd].rows_ascending:
+            rows.reverse()
+        return rows
+
+    async def _get_price_generic(self, type, code):
+        if not self.access_token:
+            print("No access token.")
+            return None
+        req = self._price_request(type, code)
+        if req is None:
+            return None
+        url, tr_cd, body, out_block = req
+        return await self.flight.do((tr_cd, code), self._fetch_price, url, tr_cd, body, out_block, code)
+
+    async def _fetch_price(self, url, tr_cd, body, out_block, code):
+        result = await self._post_tr(url, tr_cd, body)
+        if result is None: return None
+        return self._parse_price_result(result, out_block, code)
+
+    async def get_quotes(self, codes):
+        chunks, futures = self._split_quote_codes(codes)
+        results = await asyncio.gather(*(self.fetch_tr("t8407", nrec=len(chunk), shcode="".join(chunk)) for chunk in chunks),
+                                       *(self.get_futures_price(code) for code in futures), return_exceptions=True)
+        quotes = {}
+        for rows in results[:len(chunks)]:
+            if isinstance(rows, list): quotes.update(self._parse_multi_quote(rows))
+        for code, data in zip(futures, results[len(chunks):]):
+            quotes[code] = data if isinstance(data, Quote) else None
+        return {code: quotes.get(code) for code in codes}
+
+    async def get_kospi200_futures_list(self):
+        return await self.fetch_tr("t8402") or []
+
+    async def _get_futures_code_list_t8401(self):
+        return await self.fetch_tr("t8401") or []
+
+    async def get_futures_code_list(self):
+        stock_futures, index_futures = await asyncio.gather(self._get_futures_code_list_t8401(), self.get_kospi200_futures_list())
+        return index_futures + stock_futures
+
+    async def get_index_option_list(self):
+        return await self.fetch_tr("t8433") or []
+
+
+class AsyncGeminiAdvisor(GeminiAdvisor):
+    """Prompt builders are inherited; get_analysis() etc. return coroutines via the async _generate."""
+    def __init__(self, session, api_key):
+        super().__init__(api_key)
+        self.session = session
+
+    async def analyze_intent(self, user_text):
+        cached = self._cached_intent(user_text)
+        if cached: return cached
+        response_text = await self._generate(self._intent_prompt(user_text))
+        return self._store_intent(user_text, response_text)
+
+    async def _post(self, url, payload):
+        async with self.session.post(url, json=payload, timeout=aiohttp.ClientTimeout(total=120)) as response:
+            text = await response.text()
+            try:
+                result = json.loads(text)
+            except Exception as je:
+                print(f"JSON Parse Error: {je}")
+                result = {"error": {"message": text}}
+            return response.status, result
+
+    async def _generate(self, prompt, retries=3):
+        return await run_async(self._generate_flow(prompt, retries), self._perform)
+
+    async def _perform(self, step):
+        if step[0] == "sleep":
+            return await asyncio.sleep(step[1])
+        return await self._post(step[1], step[2])
+
+
+class AsyncBraveSearchClient(BraveSearchClient):
+    def __init__(self, session, api_key):
+        super().__init__(api_key)
+        self.session = session
+
+    async def search(self, query, count=3):
+        if not self.api_key:
+            return "[안내] 인터넷 검색 기능이 비활성화 되어 있습니다. (API 키 필요)"
+        headers, params = self._request_args(query, count)
+        try:
+            async with self.session.get(self.base_url, headers=headers, params=params, timeout=aiohttp.ClientTimeout(total=10)) as response:
+                if response.status == 200:
+                    return self._format_results(query, count, await response.json(content_type=None))
+                return f"⚠️ Brave Search API Error ({response.status}): {await response.text()}"
+        except Exception as e:
+            return f"[오류] 검색 중 오류 발생: {e}"
+
+
+class AsyncPublicDataClient(PublicDataClient):
+    def __init__(self, session, **kwargs):
+        super().__init__(**kwargs)
+        self.session = session
+
+    async def _request(self, endpoint, params):
+        url = self._prepare(endpoint, params)
+        try:
+            async with self.session.get(url, params=params, timeout=aiohttp.ClientTimeout(total=15)) as r:
+                r.raise_for_status()
+                return self._parse_items(await r.json(content_type=None))
+        except Exception as e:
+            print(f"[PublicData] API Error: {e}")
+            return {"totalCount": 0, "items": []}
+
+    async def _find_latest_date(self, endpoint, max_lookback=5, category=None):
+        return await run_async(self._latest_date_flow(endpoint, max_lookback, category), self._perform)
+
+    async def _get_prices(self, endpoint, bas_dt, category, num_rows):
+        return await run_async(self._prices_flow(endpoint, bas_dt, category, num_rows), self._perform)
+
+    async def get_market_summary(self, bas_dt=None):
+        futures, options = await asyncio.gather(self.get_kospi200_futures(bas_dt), self.get_kospi200_options(bas_dt, num_rows=50))
+        return self._summarize(futures, options)
@@ -5,11 +5,7 @@ class BraveSearchClient:
         self.api_key = api_key
         self.base_url = "https://api.search.brave.com/res/v1/web/search"
 
-    def search(self, query, count=3):
-        """
-        Interacts with the Brave Search API to fetch search results.
-        Returns a summarized string of the top results to save tokens.
-        """
+    def _request_args(self, query, count):
         headers = {
             "Accept": "application/json",
             "Accept-Encoding": "gzip",
@@ -19,38 +15,45 @@ class BraveSearchClient:
             "q": query,
             "count": count  # Keep it small for Gemini context
         }
+        return headers, params
 
+    def search(self, query, count=3):
+        """
+        Interacts with the Brave Search API to fetch search results.
+        Returns a summarized string of the top results to save tokens.
+        """
         if not self.api_key:
             return "[안내] 인터넷 검색 기능이 비활성화 되어 있습니다. (API 키 필요)"
 
+        headers, params = self._request_args(query, count)
         try:
             response = requests.get(self.base_url, headers=headers, params=params, timeout=10)
             if response.status_code == 200:
-                data = response.json()
-                
-                # Extract and format the web results
-                results = data.get("web", {}).get("results", [])
-                if not results:
-                    return f"[오류] '{query}'에 대한 검색 결과를 찾을 수 없습니다."
-
-                summary_parts = []
-                for idx, res in enumerate(results[:count]):
-                    title = res.get('title', '제목 없음')
-                    description = res.get('description', '설명 없음')
-                    summary_parts.append(f"[{idx+1}] {title}\n요약: {description}")
-
-                # Check if there are specific news results
-                news_results = data.get("news", {}).get("results", [])
-                if news_results:
-                    summary_parts.append("\n📰 [관련 뉴스]")
-                    for idx, res in enumerate(news_results[:2]): 
-                        title = res.get('title', '제목 없음')
-                        description = res.get('description', '설명 없음')
-                        summary_parts.append(f"- {title}\n  {description}")
-
-                return "\n".join(summary_parts)
-                
+                return self._format_results(query, count, response.json())
             else:
                 return f"⚠️ Brave Search API Error ({response.status_code}): {response.text}"
         except Exception as e:
             return f"[오류] 검색 중 오류 발생: {e}"
+
+    def _format_results(self, query, count, data):
+        # Extract and format the web results
+        results = data.get("web", {}).get("results", [])
+        if not results:
+            return f"[오류] '{query}'에 대한 검색 결과를 찾을 수 없습니다."
+
+        summary_parts = []
+        for idx, res in enumerate(results[:count]):
+            title = res.get('title', '제목 없음')
+            description = res.get('description', '설명 없음')
+            summary_parts.append(f"[{idx+1}] {title}\n요약: {description}")
+
+        # Check if there are specific news results
+        news_results = data.get("news", {}).get("results", [])
+        if news_results:
+            summary_parts.append("\n📰 [관련 뉴스]")
+            for idx, res in enumerate(news_results[:2]): 
+                title = res.get('title', '제목 없음')
+                description = res.get('description', '설명 없음')
+                summary_parts.append(f"- {title}\n  {description}")
+
+        return "\n".join(summary_parts)
@@ -3,6 +3,14 @@ import requests
 import json
 import time
 from datetime import datetime
+from .records import to_json
+from src.utils.flow import run
+
+QUOTA_EXCEEDED_MSG = (
+    "[안내] **Gemini AI 모델 할당량 초과(Quota Exceeded)**\n\n"
+    "구글 무료 API 한도를 초과했습니다. 잠시 후 다시 시도해 주세요.\n"
+    "(한도: 분당 약 15회 / 일일 1,500회)"
+)
 
 class GeminiAdvisor:
     def __init__(self, api_key):
@@ -25,7 +33,7 @@ class GeminiAdvisor:
         Provide a concise "Market Analysis & Trading Scenario" for {symbol}.
         
         Current Market Data:
-        {json.dumps(market_data, indent=2)}
+        {json.dumps(market_data, indent=2, default=to_json)}
 
         Format your response exactly like this:
         1. **Trend**: [Bullish/Bearish/Neutral] because [Reason]
@@ -44,7 +52,7 @@ class GeminiAdvisor:
         """
         context_str = ""
         if market_data:
-            context_str = f"\nContext Market Data for {symbol}:\n{json.dumps(market_data, indent=2)}\n"
+            context_str = f"\nContext Market Data for {symbol}:\n{json.dumps(market_data, indent=2, default=to_json)}\n"
         
         prompt = f"""
         You are SP Ktrade Bot v1.3.0, an AI Trading Assistant.
@@ -70,7 +78,15 @@ class GeminiAdvisor:
         Returns a JSON string containing {"action": "...", "target_code": "..."}
         Actions: "price", "market", "futures", "options", "chat"
         """
-        prompt = f"""
+        cached = self._cached_intent(user_text)
+        if cached: return cached
+
+        # We need to ensure we only get JSON back
+        response_text = self._generate(self._intent_prompt(user_text))
+        return self._store_intent(user_text, response_text)
+
+    def _intent_prompt(self, user_text):
+        return f"""
         You are an NLP routing assistant for a Korean financial trading bot.
         Extract the user's intent from the following text: "{user_text}"
         
@@ -104,9 +120,8 @@ class GeminiAdvisor:
         Example 5: {{"action": "weekly_strategy", "target_code": ""}}
         Example 6: {{"action": "chat", "target_code": ""}}
         """
-        
-        import time
-        
+
+    def _cached_intent(self, user_text):
         # Check cache first
         # Very simple cache eviction (keep last 50 items)
         if len(self._intent_cache) > 50:
@@ -116,10 +131,9 @@ class GeminiAdvisor:
             cache_time, cached_result = self._intent_cache[user_text]
             if time.time() - cache_time < 1800: # Cache for 30 minutes (Increased from 5)
                 return cached_result
+        return None
 
-        # We need to ensure we only get JSON back
-        response_text = self._generate(prompt)
-        
+    def _store_intent(self, user_text, response_text):
         # Clean up potential markdown formatting like ```json ... ```
         clean_text = response_text.replace("```json", "").replace("```", "").strip()
         
@@ -210,8 +224,48 @@ class GeminiAdvisor:
         """
         return self._generate(prompt)
 
+    @staticmethod
+    def _classify_error(http_status, result):
+        """Returns (error_msg, status_code, is_transient) for a failed generateContent call."""
+        # Check for 429, 503, or specific error strings
+        error_msg = result.get('error', {}).get('message', "")
+        status_code = result.get('error', {}).get('status', str(http_status))
+        
+        is_transient_error = (
+            http_status in [429, 503] or 
+            "RESOURCE_EXHAUSTED" in error_msg or 
+            "quota" in error_msg.lower() or
+            "RESOURCE_EXHAUSTED" in status_code or
+            "UNAVAILABLE" in error_msg or
+            "high demand" in error_msg.lower() or
+            "UNAVAILABLE" in status_code
+        )
+        return error_msg, status_code, is_transient_error
+
     def _generate(self, prompt, retries=3):
-        import time
+        return run(self._generate_flow(prompt, retries), self._perform)
+
+    def _perform(self, step):
+        """Run one step of _generate_flow: ("post", url, payload) -> (status, result) or ("sleep", seconds)."""
+        if step[0] == "sleep":
+            return time.sleep(step[1])
+        return self._post(step[1], step[2])
+
+    def _post(self, url, payload):
+        response = requests.post(url, json=payload, headers={"Content-Type": "application/json"}, timeout=120)
+        # Try to parse JSON, handle potential parse errors
+        try:
+            result = response.json()
+        except Exception as je:
+            print(f"JSON Parse Error: {je}")
+            result = {"error": {"message": response.text}}
+        return response.status_code, result
+
+    def _generate_flow(self, prompt, retries=3):
+        """
+        Retry, quota fallback and backoff decisions, shared with AsyncGeminiAdvisor: every request and
+        wait is yielded as a step for the blocking or async driver (src.utils.flow) to perform.
+        """
         payload = {
             "contents": [{
                 "parts": [{"text": prompt}]
@@ -220,70 +274,46 @@ class GeminiAdvisor:
 
         for attempt in range(retries):
             try:
-                response = requests.post(self.url, json=payload, headers={"Content-Type": "application/json"}, timeout=120)
-                
-                # Try to parse JSON, handle potential parse errors
-                try:
-                    result = response.json()
-                except Exception as je:
-                    print(f"JSON Parse Error: {je}")
-                    result = {"error": {"message": response.text}}
+                status, result = yield ("post", self.url, payload)
 
-                if response.status_code == 200:
+                if status == 200:
                     if 'candidates' in result and result['candidates']:
                          return result['candidates'][0]['content']['parts'][0]['text']
                     else:
                          return "AI returned no content."
-                
-                # Check for 429, 503, or specific error strings
-                error_msg = result.get('error', {}).get('message', "")
-                status_code = result.get('error', {}).get('status', str(response.status_code))
-                
-                is_transient_error = (
-                    response.status_code in [429, 503] or 
-                    "RESOURCE_EXHAUSTED" in error_msg or 
-                    "quota" in error_msg.lower() or
-                    "RESOURCE_EXHAUSTED" in status_code or
-                    "UNAVAILABLE" in error_msg or
-                    "high demand" in error_msg.lower() or
-                    "UNAVAILABLE" in status_code
-                )
-                
+
+                error_msg, status_code, is_transient_error = self._classify_error(status, result)
+
                 if is_transient_error:
                     # If primary model is exhausted, try to fallback to lite once on first attempt
                     if attempt == 0 and ("429" in str(status_code) or "RESOURCE_EXHAUSTED" in error_msg):
                         if "gemini-2.5-flash" in self.url:
-                            f8b_url = self.url.replace("gemini-2.5-flash", "gemini-2.5-flash-lite")
-                            print(f"[Quota] Falling back to 2.5-Lite model: {f8b_url}")
+                            lite_url = self.url.replace("gemini-2.5-flash", "gemini-2.5-flash-lite")
+                            print("[Quota] Falling back to 2.5-Lite model")
                             try:
-                                f8b_resp = requests.post(f8b_url, json=payload, headers={"Content-Type": "application/json"}, timeout=120)
-                                if f8b_resp.status_code == 200:
-                                    f8b_result = f8b_resp.json()
-                                    return f8b_result['candidates'][0]['content']['parts'][0]['text'] # Note: added 'content'
-                            except Exception as f8be:
-                                print(f"8B Fallback failed: {f8be}")
+                                lite_status, lite_result = yield ("post", lite_url, payload)
+                                if lite_status == 200:
+                                    return lite_result['candidates'][0]['content']['parts'][0]['text']
+                            except Exception as le:
+                                print(f"Lite Fallback failed: {le}")
 
                     # Exponential Backoff: 70s, 140s... (Google Free Tier is per minute)
                     wait_time = 70 * (attempt + 1)
                     print(f"RATE LIMIT HIT: {error_msg}. Wait {wait_time}s (Attempt {attempt+1}/{retries})")
-                    
+
                     if attempt < retries - 1:
-                        time.sleep(wait_time)
+                        yield ("sleep", wait_time)
                         continue
                     else:
-                        return (
-                            "[안내] **Gemini AI 모델 할당량 초과(Quota Exceeded)**\n\n"
-                            "구글 무료 API 한도를 초과했습니다. 잠시 후 다시 시도해 주세요.\n"
-                            "(한도: 분당 약 15회 / 일일 1,500회)"
-                        )
-                
+                        return QUOTA_EXCEEDED_MSG
+
                 else:
                     return f"[오류] **Gemini API**\n`{status_code}`: {error_msg}"
-            
+
             except Exception as e:
                 print(f"Request Exception (Attempt {attempt+1}): {e}")
                 if attempt < retries - 1:
-                    time.sleep(5)
+                    yield ("sleep", 5)
                     continue
                 return f"❌ AI Request Failed: {e}"
         return "❌ AI Request Failed after retries."
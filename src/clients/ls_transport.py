@@ -0,0 +1,86 @@
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+
+class LSTransport:
+    """
+    Shared keep-alive HTTP transport for LS Securities REST TRs.
+    One pooled session per trader (no TLS handshake per call), one timeout/retry policy,
+    and per-TR counters for calls, errors, retries, bytes and latency.
+    """
+    RETRY_STATUS = (500, 502, 503, 504)
+
+    def __init__(self, pool_size=8, timeout=10, retries=2, backoff=0.3):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.session = requests.Session()
+        self.session.verify = False
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._lock = threading.Lock()
+        self._stats = {}   # tr_cd -> counters
+
+    def _record(self, tr_cd, elapsed, sent, received, error=False, retried=False):
+        with self._lock:
+            s = self._stats.get(tr_cd)
+            if s is None:
+                s = self._stats[tr_cd] = {"calls": 0, "errors": 0, "retries": 0, "bytes_out": 0, "bytes_in": 0, "latency_total": 0.0, "latency_max": 0.0}
+            if retried:
+                s["retries"] += 1
+                return
+            s["calls"] += 1
+            s["bytes_out"] += sent
+            s["bytes_in"] += received
+            s["latency_total"] += elapsed
+            if elapsed > s["latency_max"]: s["latency_max"] = elapsed
+            if error: s["errors"] += 1
+
+    def post(self, url, tr_cd, headers, json=None, data=None, timeout=None, retries=None):
+        """
+        POST a TR and return the requests.Response (any HTTP status).
+        Connection errors, timeouts and 5xx are retried `retries` times with backoff;
+        pass retries=0 for non-idempotent TRs such as orders. Raises after the last failure.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        retries = self.retries if retries is None else retries
+        for attempt in range(retries + 1):
+            started = time.monotonic()
+            try:
+                response = self.session.post(url, headers=headers, json=json, data=data, timeout=timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                self._record(tr_cd, time.monotonic() - started, 0, 0, error=True)
+                if attempt < retries:
+                    self._record(tr_cd, 0, 0, 0, retried=True)
+                    time.sleep(self.backoff * (2 ** attempt))
+                    continue
+                raise
+            sent = len(response.request.body or b"") if response.request is not None else 0
+            failed = response.status_code != 200
+            self._record(tr_cd, time.monotonic() - started, sent, len(response.content), error=failed)
+            if response.status_code in self.RETRY_STATUS and attempt < retries:
+                self._record(tr_cd, 0, 0, 0, retried=True)
+                time.sleep(self.backoff * (2 ** attempt))
+                continue
+            return response
+
+    def stats(self):
+        """Per-TR counters, with average/max latency in ms."""
+        with self._lock:
+            out = {}
+            for tr_cd, s in self._stats.items():
+                out[tr_cd] = {
+                    "calls": s["calls"],
+                    "errors": s["errors"],
+                    "retries": s["retries"],
+                    "bytes_out": s["bytes_out"],
+                    "bytes_in": s["bytes_in"],
+                    "avg_ms": round(s["latency_total"] / s["calls"] * 1000, 1) if s["calls"] else 0.0,
+                    "max_ms": round(s["latency_max"] * 1000, 1),
+                }
+            return out
+
+    def close(self):
+        self.session.close()
@@ -8,8 +8,14 @@
 
 import requests
 from datetime import datetime, timedelta
+from .records import parse_number
+from src.utils.flow import run
 
 BASE_URL = "https://apis.data.go.kr/1160100/service/GetDerivativeProductInfoService"
+
+# 숫자 필드: 응답 수신 시 한 번만 int/float로 변환 (종가, 대비, 등락률, 시/고/저가, 거래량, 거래대금, 미결제약정, 내재변동성 ...)
+NUMERIC_FIELDS = ("clpr", "vs", "fltRt", "mkp", "hipr", "lopr", "trqu", "trPrc", "opnint", "iptVlty",
+                  "spotPrc", "setlPrc", "xrcPrc")
 SERVICE_KEY = "b54b56bbc01baee17e4a9a2a5a4011e84e7f20b7929ac65484f6ea69fdeb2526"
 
 
@@ -20,37 +26,67 @@ class PublicDataClient:
 
     def _request(self, endpoint, params):
         """공통 API 호출"""
-        url = f"{BASE_URL}/{endpoint}"
-        params["serviceKey"] = self.service_key
-        params["resultType"] = "json"
+        url = self._prepare(endpoint, params)
         try:
             r = self.session.get(url, params=params, timeout=15)
             r.raise_for_status()
-            data = r.json()
-            body = data.get("response", {}).get("body", {})
-            items = body.get("items", {}).get("item", [])
-            return {
-                "totalCount": body.get("totalCount", 0),
-                "items": items
-            }
+            return self._parse_items(r.json())
         except Exception as e:
             print(f"[PublicData] API Error: {e}")
             return {"totalCount": 0, "items": []}
 
+    def _prepare(self, endpoint, params):
+        params["serviceKey"] = self.service_key
+        params["resultType"] = "json"
+        return f"{BASE_URL}/{endpoint}"
+
+    @staticmethod
+    def _parse_items(data):
+        body = data.get("response", {}).get("body", {})
+        items = body.get("items", {}).get("item", [])
+        if isinstance(items, dict): items = [items]   # a single result comes back as an object
+        for item in items:
+            for field in NUMERIC_FIELDS:
+                if field in item: item[field] = parse_number(item[field], default=item[field])
+        return {
+            "totalCount": body.get("totalCount", 0),
+            "items": items
+        }
+
     def _find_latest_date(self, endpoint, max_lookback=5, category=None):
         """데이터가 있는 가장 최근 거래일 자동 탐색"""
+        return run(self._latest_date_flow(endpoint, max_lookback, category), self._perform)
+
+    def _get_prices(self, endpoint, bas_dt, category, num_rows):
+        return run(self._prices_flow(endpoint, bas_dt, category, num_rows), self._perform)
+
+    def _perform(self, step):
+        """Flow step (endpoint, params) -> _request result. AsyncPublicDataClient awaits the same steps."""
+        return self._request(*step)
+
+    def _latest_date_flow(self, endpoint, max_lookback=5, category=None):
         dt = datetime.now()
         for _ in range(max_lookback):
             bas_dt = dt.strftime("%Y%m%d")
             params = {"basDt": bas_dt, "numOfRows": "1", "pageNo": "1"}
             if category:
                 params["prdCtg"] = category
-            result = self._request(endpoint, params)
+            result = yield (endpoint, params)
             if result["totalCount"] > 0:
                 return bas_dt
             dt -= timedelta(days=1)
         return (datetime.now() - timedelta(days=1)).strftime("%Y%m%d")
 
+    def _prices_flow(self, endpoint, bas_dt, category, num_rows):
+        if not bas_dt:
+            bas_dt = yield from self._latest_date_flow(endpoint, category=category)
+        params = {"basDt": bas_dt, "numOfRows": str(num_rows), "pageNo": "1"}
+        if category:
+            params["prdCtg"] = category
+        result = yield (endpoint, params)
+        result["date"] = bas_dt
+        return result
+
     # ---- Futures ----
 
     def get_futures_prices(self, bas_dt=None, category=None, num_rows=20):
@@ -62,15 +98,7 @@ class PublicDataClient:
         Returns:
             dict with 'date', 'totalCount', 'items'
         """
-        endpoint = "getStockFuturesPriceInfo"
-        if not bas_dt:
-            bas_dt = self._find_latest_date(endpoint, category=category)
-        params = {"basDt": bas_dt, "numOfRows": str(num_rows), "pageNo": "1"}
-        if category:
-            params["prdCtg"] = category
-        result = self._request(endpoint, params)
-        result["date"] = bas_dt
-        return result
+        return self._get_prices("getStockFuturesPriceInfo", bas_dt, category, num_rows)
 
     def get_kospi200_futures(self, bas_dt=None):
         """코스피200 선물 전용 조회 (주간)"""
@@ -84,15 +112,7 @@ class PublicDataClient:
 
     def get_options_prices(self, bas_dt=None, category=None, num_rows=20):
         """옵션 시세 조회"""
-        endpoint = "getOptionsPriceInfo"
-        if not bas_dt:
-            bas_dt = self._find_latest_date(endpoint, category=category)
-        params = {"basDt": bas_dt, "numOfRows": str(num_rows), "pageNo": "1"}
-        if category:
-            params["prdCtg"] = category
-        result = self._request(endpoint, params)
-        result["date"] = bas_dt
-        return result
+        return self._get_prices("getOptionsPriceInfo", bas_dt, category, num_rows)
 
     def get_kospi200_options(self, bas_dt=None, num_rows=30):
         """코스피200 옵션 조회 (콜/풋 모두)"""
@@ -108,7 +128,10 @@ class PublicDataClient:
         """AI 분석용 종합 시장 요약 데이터"""
         futures = self.get_kospi200_futures(bas_dt)
         options = self.get_kospi200_options(bas_dt, num_rows=50)
+        return self._summarize(futures, options)
 
+    @staticmethod
+    def _summarize(futures, options):
         # Filter active futures (거래량 > 0)
         active_futures = [f for f in futures.get("items", [])
                           if int(f.get("trqu", 0)) > 0]
@@ -0,0 +1,147 @@
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+
+from src.utils.token_bucket import TokenBucket
+
+# Priority classes (lower value is served first)
+PRIORITY_ORDER = 0         # CFOAT* order TRs
+PRIORITY_ALERT = 1         # AlertMonitor
+PRIORITY_INTERACTIVE = 2   # user commands / NLP (default)
+PRIORITY_BACKGROUND = 3    # scheduler, data server, cache warmers
+
+PRIORITY_NAMES = {PRIORITY_ORDER: "order", PRIORITY_ALERT: "alert", PRIORITY_INTERACTIVE: "interactive", PRIORITY_BACKGROUND: "background"}
+
+# Requests per second per TR. LS throttles per TR; override with "rate_limits" in xing_config.json.
+DEFAULT_TR_RATES = {
+    "t1102": 10,
+    "t2101": 10,
+    "t8407": 2,
+    "t4201": 1,
+    "t4203": 1,
+    "t8413": 1,
+    "t8401": 2,
+    "t8402": 2,
+    "CFOAT00100": 10,
+}
+
+_local = threading.local()
+
+@contextmanager
+def call_priority(priority):
+    """Run the enclosed LS calls on this thread with the given priority class."""
+    previous = getattr(_local, "priority", None)
+    _local.priority = priority
+    try:
+        yield
+    finally:
+        _local.priority = previous
+
+def current_priority(tr_cd=""):
+    if tr_cd.startswith("CFOAT"): return PRIORITY_ORDER
+    priority = getattr(_local, "priority", None)
+    return PRIORITY_INTERACTIVE if priority is None else priority
+
+class _TRSlot:
+    __slots__ = ("bucket", "cond", "waiters", "calls", "throttled", "wait_total", "wait_max")
+
+    def __init__(self, rate):
+        self.bucket = TokenBucket(rate, capacity=1)
+        self.cond = threading.Condition()
+        self.waiters = []   # heap of (priority, seq)
+        self.calls = 0
+        self.throttled = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+class TRRateLimiter:
+    """
+    Client-side per-TR rate limiter shared by every caller of one XingRestTrader.
+    Calls over the limit wait for a slot instead of being rejected by LS; waiting callers
+    are served by priority class (orders > alerts > interactive > background), then FIFO.
+    """
+    def __init__(self, rates=None, default_rate=2):
+        self.rates = dict(DEFAULT_TR_RATES)
+        self.rates.update(rates or {})
+        self.default_rate = default_rate
+        self._slots = {}
+        self._lock = threading.Lock()
+        self._seq = itertools.count()
+
+    def _slot(self, tr_cd):
+        slot = self._slots.get(tr_cd)
+        if slot is None:
+            with self._lock:
+                slot = self._slots.get(tr_cd)
+                if slot is None:
+                    slot = self._slots[tr_cd] = _TRSlot(self.rates.get(tr_cd, self.default_rate))
+        return slot
+
+    def _account(self, slot, waited, throttled):
+        slot.calls += 1
+        if throttled:
+            self._account_wait(slot, waited)
+
+    def _account_wait(self, slot, waited):
+        slot.throttled += 1
+        slot.wait_total += waited
+        if waited > slot.wait_max: slot.wait_max = waited
+
+    def acquire(self, tr_cd, priority=None):
+        """Block until tr_cd may be called. Returns the seconds spent waiting."""
+        priority = current_priority(tr_cd) if priority is None else priority
+        slot = self._slot(tr_cd)
+        started = time.monotonic()
+        throttled = False
+        with slot.cond:
+            ticket = (priority, next(self._seq))
+            heapq.heappush(slot.waiters, ticket)
+            while True:
+                if slot.waiters[0] == ticket:
+                    wait = slot.bucket.try_acquire()
+                    if wait == 0:
+                        heapq.heappop(slot.waiters)
+                        slot.cond.notify_all()
+                        waited = time.monotonic() - started
+                        self._account(slot, waited, throttled)
+                        return waited
+                    slot.cond.wait(timeout=wait)
+                else:
+                    slot.cond.wait()
+                throttled = True
+
+    def try_acquire(self, tr_cd, priority=PRIORITY_INTERACTIVE):
+        """
+        Non-blocking variant for the asyncio runtime: 0 if a slot was taken, else seconds to wait.
+        A caller that had to poll reports its total wait once, with record_wait(), after taking the slot.
+        """
+        slot = self._slot(tr_cd)
+        with slot.cond:
+            if slot.waiters and slot.waiters[0][0] <= priority:
+                return 1.0 / slot.bucket.rate
+            wait = slot.bucket.try_acquire()
+            if wait == 0:
+                self._account(slot, 0, False)
+            return wait
+
+    def record_wait(self, tr_cd, waited):
+        """Count one throttled try_acquire() call that got its slot after `waited` seconds."""
+        slot = self._slot(tr_cd)
+        with slot.cond:
+            self._account_wait(slot, waited)
+
+    def stats(self):
+        out = {}
+        for tr_cd, slot in list(self._slots.items()):
+            with slot.cond:
+                out[tr_cd] = {
+                    "rate": slot.bucket.rate,
+                    "calls": slot.calls,
+                    "throttled": slot.throttled,
+                    "waiting": len(slot.waiters),
+                    "avg_wait_ms": round(slot.wait_total / slot.throttled * 1000, 1) if slot.throttled else 0.0,
+                    "max_wait_ms": round(slot.wait_max * 1000, 1),
+                }
+        return out
@@ -0,0 +1,187 @@
+import threading
+import queue
+import time
+from collections import deque, OrderedDict
+
+QUEUE = "queue"        # deliver every message; when full, the oldest queued one is dropped
+CONFLATE = "conflate"  # keep only the latest message per tr_key (orderbooks: only the current book matters)
+
+DEFAULT_POLICY = {"FH0": CONFLATE, "OH0": CONFLATE}
+
+class _Subscriber:
+    __slots__ = ("tr_cd", "tr_key", "callback", "policy", "max_queue", "pending", "scheduled", "removed",
+                 "delivered", "dropped", "conflated", "max_depth")
+
+    def __init__(self, tr_cd, callback, policy, max_queue, tr_key=None):
+        self.tr_cd = tr_cd
+        self.tr_key = tr_key   # None = every key of tr_cd
+        self.callback = callback
+        self.policy = policy
+        self.max_queue = max_queue
+        self.pending = OrderedDict() if policy == CONFLATE else deque()   # (enqueued_at, tr_key, body)
+        self.scheduled = False
+        self.removed = False
+        self.delivered = 0
+        self.dropped = 0
+        self.conflated = 0
+        self.max_depth = 0
+
+class RealtimeDispatcher:
+    """
+    Delivers realtime messages to subscribers on a worker pool, off the websocket receive thread.
+    Each subscriber has its own bounded queue (QUEUE) or latest-per-key slot map (CONFLATE) and is run
+    by at most one worker at a time, so its messages arrive in order while a slow subscriber only
+    delays itself. Queue lag (enqueue -> callback start) is tracked for /stats.
+    """
+    def __init__(self, num_workers=2, max_queue=1000):
+        self.num_workers = max(1, int(num_workers))
+        self.max_queue = max_queue
+        self._lock = threading.RLock()
+        self._subscribers = {}   # tr_cd -> [_Subscriber, ...]
+        self._ready = queue.Queue()
+        self._workers = []
+
+        # Counters
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.conflated = 0
+        self.failed = 0
+        self.pending = 0
+        self.max_pending = 0
+        self.lag_count = 0
+        self.lag_total = 0.0
+        self.lag_max = 0.0
+
+    def start(self):
+        if self._workers: return
+        for i in range(self.num_workers):
+            t = threading.Thread(target=self._worker_loop, name=f"realtime-{i}", daemon=True)
+            t.start()
+            self._workers.append(t)
+        print(f"[Realtime] Dispatch started: {self.num_workers} workers (max {self.max_queue} queued per subscriber)")
+
+    def stop(self, timeout=5):
+        for _ in self._workers:
+            self._ready.put(None)
+        for t in self._workers:
+            t.join(timeout=timeout)
+        self._workers = []
+
+    def add(self, tr_cd, callback, policy=None, max_queue=None, tr_key=None):
+        """
+        Register callback(tr_cd, tr_key, body) for tr_cd (only messages for tr_key, if given).
+        Policy defaults to CONFLATE for orderbooks, else QUEUE.
+        """
+        sub = _Subscriber(tr_cd, callback, policy or DEFAULT_POLICY.get(tr_cd, QUEUE), max_queue or self.max_queue, tr_key)
+        with self._lock:
+            self._subscribers.setdefault(tr_cd, []).append(sub)
+        return sub
+
+    def remove(self, tr_cd, callback):
+        """Unregister callback; anything still queued for it is discarded. Returns True if it was registered."""
+        with self._lock:
+            for sub in self._subscribers.get(tr_cd, []):
+                if sub.callback == callback:
+                    return self.discard(sub)
+        return False
+
+    def discard(self, sub):
+        """Unregister the subscriber returned by add()."""
+        with self._lock:
+            subs = self._subscribers.get(sub.tr_cd, [])
+            if sub not in subs: return False
+            subs.remove(sub)
+            sub.removed = True
+            self.pending -= len(sub.pending)
+            sub.pending.clear()
+            return True
+
+    def has_subscribers(self, tr_cd):
+        with self._lock:
+            return bool(self._subscribers.get(tr_cd))
+
+    def publish(self, tr_cd, tr_key, body):
+        """Called on the receive thread: enqueue only, never run callbacks here."""
+        now = time.monotonic()
+        with self._lock:
+            subs = self._subscribers.get(tr_cd)
+            if not subs: return
+            self.published += 1
+            for sub in subs:
+                if sub.tr_key is not None and sub.tr_key != tr_key: continue
+                pending = sub.pending
+                if sub.policy == CONFLATE:
+                    if tr_key in pending:
+                        pending[tr_key] = (now, tr_key, body)   # replaces the undelivered one, keeps its turn
+                        sub.conflated += 1
+                        self.conflated += 1
+                        continue
+                    pending[tr_key] = (now, tr_key, body)
+                else:
+                    if len(pending) >= sub.max_queue:
+                        pending.popleft()
+                        sub.dropped += 1
+                        self.dropped += 1
+                        self.pending -= 1
+                    pending.append((now, tr_key, body))
+                self.pending += 1
+                if self.pending > self.max_pending: self.max_pending = self.pending
+                if len(pending) > sub.max_depth: sub.max_depth = len(pending)
+                if not sub.scheduled:
+                    sub.scheduled = True
+                    self._ready.put(sub)
+
+    def _worker_loop(self):
+        while True:
+            sub = self._ready.get()
+            if sub is None: return
+
+            with self._lock:
+                if not sub.pending:
+                    sub.scheduled = False
+                    continue
+                if sub.policy == CONFLATE:
+                    enqueued_at, tr_key, body = sub.pending.popitem(last=False)[1]
+                else:
+                    enqueued_at, tr_key, body = sub.pending.popleft()
+                self.pending -= 1
+                lag = time.monotonic() - enqueued_at
+                self.lag_count += 1
+                self.lag_total += lag
+                if lag > self.lag_max: self.lag_max = lag
+
+            failed = False
+            try:
+                sub.callback(sub.tr_cd, tr_key, body)
+            except Exception as e:
+                failed = True
+                print(f"[Realtime] Callback error for {sub.tr_cd}: {e}")
+
+            with self._lock:
+                sub.delivered += 1
+                self.delivered += 1
+                if failed: self.failed += 1
+                if sub.pending and not sub.removed:
+                    # Back of the line so one busy subscriber can't starve the others
+                    self._ready.put(sub)
+                else:
+                    sub.scheduled = False
+
+    def stats(self):
+        with self._lock:
+            subs = [s for group in self._subscribers.values() for s in group]
+            return {
+                "workers": self.num_workers,
+                "subscribers": len(subs),
+                "pending": self.pending,
+                "max_pending": self.max_pending,
+                "published": self.published,
+                "delivered": self.delivered,
+                "dropped": self.dropped,
+                "conflated": self.conflated,
+                "failed": self.failed,
+                "avg_lag_ms": round(self.lag_total / self.lag_count * 1000, 2) if self.lag_count else 0.0,
+                "max_lag_ms": round(self.lag_max * 1000, 2),
+                "max_depth": max((s.max_depth for s in subs), default=0),
+            }
@@ -0,0 +1,200 @@
+import json
+import ssl
+import threading
+import time
+
+import websocket
+
+class RealtimeConnection:
+    """
+    One websocket of the pool, with its own receive thread and its share of the subscriptions.
+    Messages go straight to the owning client's _on_message, so every connection feeds the same
+    last values, recorder and dispatcher.
+    """
+    RECONNECT_DELAY = 5
+
+    def __init__(self, client, index):
+        self.client = client
+        self.index = index
+        self.ws = None
+        self.subscriptions = {}   # (tr_cd, tr_key) -> sent; owned and guarded by the ConnectionPool
+        self.messages = 0
+        self.connects = 0
+        self._connected = threading.Event()
+        self._thread = None
+
+    def is_connected(self):
+        return self._connected.is_set()
+
+    def send(self, tr_cd, tr_key, tr_type):
+        """tr_type "3" subscribes, "4" unsubscribes. False if the socket isn't up (the caller keeps it queued)."""
+        if not (self.ws and self._connected.is_set()): return False
+        msg = {
+            "header": {"token": self.client.access_token, "tr_type": tr_type},
+            "body": {"tr_cd": tr_cd, "tr_key": tr_key},
+        }
+        try:
+            self.ws.send(json.dumps(msg))
+            return True
+        except Exception as e:
+            print(f"[Realtime#{self.index}] Send failed for {tr_cd}/{tr_key}: {e}")
+            return False
+
+    def _on_open(self, ws):
+        self.connects += 1
+        self._connected.set()
+        print(f"[Realtime#{self.index}] WebSocket connected to {self.client.ws_url}")
+        self.client._on_connection_open(self)
+
+    def _on_message(self, ws, message):
+        self.messages += 1
+        self.client._on_message(ws, message)
+
+    def _on_error(self, ws, error):
+        print(f"[Realtime#{self.index}] Error: {error}")
+
+    def _on_close(self, ws, close_status_code, close_msg):
+        self._connected.clear()
+        print(f"[Realtime#{self.index}] Disconnected. Code={close_status_code}, Msg={close_msg}")
+        self.client._on_connection_close(self)
+
+    def _run(self):
+        while self.client._running:
+            # Pick up a refreshed token on every (re)connect
+            if self.client.trader.get_access_token():
+                self.client.access_token = self.client.trader.access_token
+            self.ws = websocket.WebSocketApp(
+                self.client.ws_url,
+                on_open=self._on_open,
+                on_message=self._on_message,
+                on_error=self._on_error,
+                on_close=self._on_close
+            )
+            self.ws.run_forever(sslopt={"cert_reqs": ssl.CERT_NONE})
+            if self.client._running:
+                print(f"[Realtime#{self.index}] Reconnecting in {self.RECONNECT_DELAY} seconds...")
+                time.sleep(self.RECONNECT_DELAY)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name=f"realtime-ws-{self.index}", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        if self.ws:
+            self.ws.close()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+class ConnectionPool:
+    """
+    Splits (tr_cd, tr_key) subscriptions across connections. A new key goes to the least-loaded
+    live connection under `max_per_connection` (0 = no cap). When a connection drops its keys move
+    to the others; when it comes back, keys are moved from the busiest connection until loads
+    differ by at most one. Connections need is_connected(), send(tr_cd, tr_key, tr_type) and a
+    `subscriptions` dict, which the pool updates under its lock.
+    """
+    def __init__(self, connections, max_per_connection=0):
+        self.connections = list(connections)
+        self.max_per_connection = max_per_connection
+        self._lock = threading.Lock()
+        self._owner = {}   # (tr_cd, tr_key) -> connection
+        self.moved = 0
+        self.rejected = 0
+
+    def _pick(self, exclude=None, live_only=False):
+        cap = self.max_per_connection
+        candidates = [c for c in self.connections if c is not exclude and not (cap and len(c.subscriptions) >= cap)]
+        live = [c for c in candidates if c.is_connected()]
+        candidates = live if live or live_only else candidates
+        return min(candidates, key=lambda c: len(c.subscriptions)) if candidates else None
+
+    def subscribed(self):
+        with self._lock:
+            return list(self._owner)
+
+    def owner(self, tr_cd, tr_key):
+        with self._lock:
+            return self._owner.get((tr_cd, tr_key))
+
+    def subscribe(self, tr_cd, tr_key):
+        """Connection the key was assigned to (the same one if already subscribed), or None if every connection is full."""
+        key = (tr_cd, tr_key)
+        with self._lock:
+            conn = self._owner.get(key)
+            if conn is not None: return conn
+            conn = self._pick()
+            if conn is None:
+                self.rejected += 1
+                return None
+            self._owner[key] = conn
+            conn.subscriptions[key] = conn.send(tr_cd, tr_key, "3")
+            return conn
+
+    def unsubscribe(self, tr_cd, tr_key):
+        key = (tr_cd, tr_key)
+        with self._lock:
+            conn = self._owner.pop(key, None)
+            if conn is None: return None
+            if conn.subscriptions.pop(key, False):
+                conn.send(tr_cd, tr_key, "4")
+            return conn
+
+    def _move(self, key, source, target):
+        sent = source.subscriptions.pop(key)
+        if sent: source.send(*key, "4")
+        target.subscriptions[key] = target.send(*key, "3")
+        self._owner[key] = target
+        self.moved += 1
+
+    def _drain(self, conn):
+        """Move the (unsent) keys of a connection that is down to live connections with room."""
+        for key in list(conn.subscriptions):
+            target = self._pick(exclude=conn, live_only=True)
+            if target is None: return
+            self._move(key, conn, target)
+
+    def on_open(self, conn):
+        """
+        Send what was queued on this connection, adopt keys queued on connections that are still down,
+        then even out the load across live connections. Returns the number of keys rebalanced.
+        """
+        with self._lock:
+            for key, sent in list(conn.subscriptions.items()):
+                if not sent:
+                    conn.subscriptions[key] = conn.send(*key, "3")
+            for other in self.connections:
+                if not other.is_connected(): self._drain(other)
+            return self._rebalance()
+
+    def on_close(self, conn):
+        """The server forgot this connection's subscriptions: move them to live connections, or queue them here."""
+        with self._lock:
+            for key in conn.subscriptions:
+                conn.subscriptions[key] = False   # nothing to unsubscribe on a dead socket
+            self._drain(conn)
+
+    def rebalance(self):
+        with self._lock:
+            return self._rebalance()
+
+    def _rebalance(self):
+        live = [c for c in self.connections if c.is_connected()]
+        moved = 0
+        while len(live) > 1:
+            busiest = max(live, key=lambda c: len(c.subscriptions))
+            idlest = min(live, key=lambda c: len(c.subscriptions))
+            if len(busiest.subscriptions) - len(idlest.subscriptions) <= 1: break
+            key = next(reversed(busiest.subscriptions))   # newest key: oldest feeds keep their connection
+            self._move(key, busiest, idlest)
+            moved += 1
+        return moved
+
+    def stats(self):
+        with self._lock:
+            return {
+                "connections": [{"connected": c.is_connected(), "subscriptions": len(c.subscriptions),
+                                 "messages": c.messages, "connects": c.connects} for c in self.connections],
+                "subscriptions": len(self._owner),
+                "moved": self.moved,
+                "rejected": self.rejected,
+            }
@@ -0,0 +1,201 @@
+"""
+Typed market data records. LS and data.go.kr send every number as a string ("70,000", "352.45");
+these are parsed once at the client boundary so alerts, formatting and the caches work on numbers.
+Records keep a dict-style get()/[] so existing consumers and prompts read them unchanged.
+"""
+
+def parse_number(value, default=0):
+    """'1,234' -> 1234, '352.45' -> 352.45, ''/None/garbage -> default. Numbers pass through."""
+    if isinstance(value, (int, float)): return value
+    if value is None: return default
+    text = str(value).replace(",", "").strip()
+    if not text: return default
+    try:
+        return int(text)
+    except ValueError:
+        pass
+    try:
+        return float(text)
+    except ValueError:
+        return default
+
+class _Record:
+    """Slot-backed record with a read/write mapping view; keys outside the slots live in `extra`."""
+    __slots__ = ("extra",)
+    FIELDS = ()
+    ALIASES = {}   # mapping key -> slot name (e.g. "_fetched_at" -> "fetched_at")
+
+    def _slot(self, key):
+        key = self.ALIASES.get(key, key)
+        return key if key in self.FIELDS else None
+
+    def get(self, key, default=None):
+        slot = self._slot(key)
+        if slot is not None:
+            value = getattr(self, slot)
+            return default if value is None else value
+        return self.extra.get(key, default) if self.extra else default
+
+    def __getitem__(self, key):
+        value = self.get(key, KeyError)
+        if value is KeyError: raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        slot = self._slot(key)
+        if slot is not None:
+            setattr(self, slot, value)
+        else:
+            if self.extra is None: self.extra = {}
+            self.extra[key] = value
+
+    def __contains__(self, key):
+        return self.get(key, KeyError) is not KeyError
+
+    def keys(self):
+        names = {slot: key for key, slot in self.ALIASES.items()}
+        out = [names.get(f, f) for f in self.FIELDS if getattr(self, f) is not None]
+        return out + list(self.extra or ())
+
+    def to_dict(self):
+        return {key: self[key] for key in self.keys()}
+
+    def copy(self):
+        clone = object.__new__(type(self))
+        for f in self.FIELDS:
+            setattr(clone, f, getattr(self, f))
+        clone.extra = dict(self.extra) if self.extra else None
+        return clone
+
+    def __eq__(self, other):
+        if isinstance(other, _Record): other = other.to_dict()
+        return self.to_dict() == other
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+class Quote(_Record):
+    """Last price snapshot for one code (t1102 / t2101 / t8407 / FC0)."""
+    __slots__ = ("code", "price", "open", "high", "low", "change", "volume", "fetched_at", "source")
+    FIELDS = __slots__
+    ALIASES = {"_fetched_at": "fetched_at", "_source": "source"}
+
+    def __init__(self, code="", price=0, open=0, high=0, low=0, change=None, volume=None, fetched_at=None, source=None):
+        self.code, self.price, self.open, self.high, self.low = code, price, open, high, low
+        self.change, self.volume = change, volume
+        self.fetched_at, self.source = fetched_at, source
+        self.extra = None
+
+    @classmethod
+    def from_ls(cls, code, block):
+        """t1102OutBlock / t2101OutBlock / t8407OutBlock1 row -> Quote."""
+        change = block.get("change")
+        volume = block.get("volume")
+        return cls(code, parse_number(block.get("price")), parse_number(block.get("open")),
+                   parse_number(block.get("high")), parse_number(block.get("low")),
+                   parse_number(change) if change is not None else None,
+                   parse_number(volume) if volume is not None else None)
+
+class Tick(_Record):
+    """One realtime execution (FC0/OC0): price/change/volume of the trade plus the session OHLC so far."""
+    __slots__ = ("code", "price", "change", "diff", "volume", "time", "buysell", "open", "high", "low", "total_volume")
+    FIELDS = __slots__
+
+    def __init__(self, code="", price=0, change=0, diff=0, volume=0, time="", buysell="", open=0, high=0, low=0, total_volume=0):
+        self.code, self.price, self.change, self.diff, self.volume = code, price, change, diff, volume
+        self.time, self.buysell = time, buysell
+        self.open, self.high, self.low, self.total_volume = open, high, low, total_volume
+        self.extra = None
+
+    @classmethod
+    def from_ls(cls, body):
+        return cls(
+            body.get("futcode") or body.get("optcode") or body.get("tr_key", ""),
+            parse_number(body.get("price", body.get("close"))),
+            parse_number(body.get("change")),
+            parse_number(body.get("diff", body.get("drate"))),
+            parse_number(body.get("cvolume", body.get("volume"))),
+            body.get("chetime", body.get("time", "")),
+            body.get("cgubun", ""),   # 1=sell, 2=buy
+            parse_number(body.get("open")),
+            parse_number(body.get("high")),
+            parse_number(body.get("low")),
+            parse_number(body.get("volume")),
+        )
+
+class Bar(_Record):
+    """One OHLCV bar; ts = YYYYMMDDHHMMSS of the bar start (HHMMSS = 0 for daily bars)."""
+    __slots__ = ("ts", "open", "high", "low", "close", "volume")
+    FIELDS = __slots__
+
+    def __init__(self, ts, open, high, low, close, volume):
+        self.ts, self.open, self.high, self.low, self.close, self.volume = ts, open, high, low, close, volume
+        self.extra = None
+
+    @classmethod
+    def from_ls(cls, row):
+        """t4201/t4203/t8413 OutBlock1 row -> Bar."""
+        stamp = str(row.get("date", "")) + str(row.get("time") or "000000").ljust(6, "0")[:6]
+        return cls(int(stamp), float(parse_number(row.get("open"))), float(parse_number(row.get("high"))),
+                   float(parse_number(row.get("low"))), float(parse_number(row.get("close"))),
+                   int(parse_number(row.get("jdiff_vol"))))
+
+    def astuple(self):
+        return (self.ts, self.open, self.high, self.low, self.close, self.volume)
+
+class OrderBook(_Record):
+    """
+    Depth snapshot (FH0/OH0): asks/bids are [(price, qty), ...] best first.
+    The mapping view keeps the flat ask{i}/ask{i}_qty/bid{i}/bid{i}_qty keys (1-based).
+    """
+    __slots__ = ("code", "time", "asks", "bids")
+    FIELDS = ("code", "time")
+    DEPTH = 5
+
+    def __init__(self, code="", asks=None, bids=None, time=""):
+        self.code, self.time = code, time
+        self.asks, self.bids = asks or [], bids or []
+        self.extra = None
+
+    @classmethod
+    def from_ls(cls, body, depth=DEPTH):
+        asks = [(parse_number(body.get(f"offerho{i}")), parse_number(body.get(f"offerrem{i}"))) for i in range(1, depth + 1)]
+        bids = [(parse_number(body.get(f"bidho{i}")), parse_number(body.get(f"bidrem{i}"))) for i in range(1, depth + 1)]
+        return cls(body.get("futcode") or body.get("optcode") or body.get("tr_key", ""), asks, bids, body.get("hotime", ""))
+
+    def _level(self, key):
+        side = self.asks if key.startswith("ask") else self.bids if key.startswith("bid") else None
+        if side is None: return None
+        num, _, qty = key[3:].partition("_")
+        if not num.isdigit() or qty not in ("", "qty") or not 1 <= int(num) <= len(side): return None
+        return side[int(num) - 1][1 if qty else 0]
+
+    def get(self, key, default=None):
+        value = self._level(key)
+        return value if value is not None else super().get(key, default)
+
+    def keys(self):
+        levels = []
+        for i in range(1, len(self.asks) + 1):
+            levels += [f"ask{i}", f"ask{i}_qty"]
+        for i in range(1, len(self.bids) + 1):
+            levels += [f"bid{i}", f"bid{i}_qty"]
+        return super().keys() + levels
+
+    def copy(self):
+        clone = super().copy()
+        clone.asks, clone.bids = list(self.asks), list(self.bids)
+        return clone
+
+    @property
+    def best_ask(self):
+        return self.asks[0][0] if self.asks else None
+
+    @property
+    def best_bid(self):
+        return self.bids[0][0] if self.bids else None
+
+def to_json(obj):
+    """json.dumps default= hook for records."""
+    if isinstance(obj, _Record): return obj.to_dict()
+    raise TypeError(f"{type(obj).__name__} is not JSON serializable")
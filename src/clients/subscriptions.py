@@ -0,0 +1,111 @@
+import threading
+
+class SubscriptionHandle:
+    """One consumer's share of a (tr_cd, tr_key) feed. Use as a context manager or call close()."""
+    def __init__(self, manager, tr_cd, tr_key, sub):
+        self.manager = manager
+        self.tr_cd = tr_cd
+        self.tr_key = tr_key
+        self._sub = sub
+        self.closed = False
+
+    def close(self):
+        self.manager._release(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+class SubscriptionManager:
+    """
+    Reference-counted server-side subscriptions shared by every consumer of a (tr_cd, tr_key).
+    The first handle subscribes, the last one to close schedules the real unsubscribe `linger`
+    seconds later; a new handle within that window reuses the live feed without resubscribing.
+    Handle callbacks are registered with the client's dispatcher for their tr_key only and are
+    removed when the handle closes.
+    """
+    def __init__(self, client, linger=30):
+        self.client = client
+        self.linger = linger
+        self._lock = threading.Lock()
+        self._refs = {}      # (tr_cd, tr_key) -> open handle count
+        self._timers = {}    # (tr_cd, tr_key) -> pending unsubscribe Timer
+        self.subscribes = 0
+        self.unsubscribes = 0
+        self.reused = 0
+        self.rejected = 0
+
+    def acquire(self, tr_cd, tr_key, callback=None, policy=None, max_queue=None):
+        """
+        Open a handle on (tr_cd, tr_key); callback(tr_cd, tr_key, body) receives that key's messages.
+        None if the client refused the subscription (every connection at its cap).
+        """
+        key = (tr_cd, tr_key)
+        sub = self.client.dispatcher.add(tr_cd, callback, policy, max_queue, tr_key=tr_key) if callback else None
+        # Server calls happen under the lock so a subscribe can't overtake an expiring unsubscribe
+        with self._lock:
+            timer = self._timers.pop(key, None)
+            if timer: timer.cancel()
+            refs = self._refs.get(key, 0)
+            if refs == 0 and timer is None:
+                if not self.client.subscribe(tr_cd, tr_key):
+                    self.rejected += 1
+                    if sub is not None: self.client.dispatcher.discard(sub)
+                    return None
+                self.subscribes += 1
+            else:
+                self.reused += 1
+            self._refs[key] = refs + 1
+        return SubscriptionHandle(self, tr_cd, tr_key, sub)
+
+    def _release(self, handle):
+        key = (handle.tr_cd, handle.tr_key)
+        with self._lock:
+            if handle.closed: return
+            handle.closed = True
+            if handle._sub is not None:
+                self.client.dispatcher.discard(handle._sub)
+            self._refs[key] -= 1
+            if self._refs[key] > 0: return
+            del self._refs[key]
+            if self.linger <= 0:
+                self.unsubscribes += 1
+                self.client.unsubscribe(*key)
+                return
+            timer = threading.Timer(self.linger, lambda: self._expire(key, timer))
+            timer.daemon = True
+            self._timers[key] = timer
+            timer.start()
+
+    def _expire(self, key, timer):
+        with self._lock:
+            if self._timers.get(key) is not timer: return   # re-acquired (and maybe re-released) meanwhile
+            del self._timers[key]
+            self.unsubscribes += 1
+            self.client.unsubscribe(*key)
+
+    def refcount(self, tr_cd, tr_key):
+        with self._lock:
+            return self._refs.get((tr_cd, tr_key), 0)
+
+    def close_all(self):
+        """Cancel lingering unsubscribes (the connection is going away)."""
+        with self._lock:
+            for timer in self._timers.values():
+                timer.cancel()
+            self._timers.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "active": len(self._refs),
+                "handles": sum(self._refs.values()),
+                "lingering": len(self._timers),
+                "subscribes": self.subscribes,
+                "unsubscribes": self.unsubscribes,
+                "reused": self.reused,
+                "rejected": self.rejected,
+            }
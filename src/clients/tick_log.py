@@ -0,0 +1,160 @@
+"""
+Append-only log of realtime messages and a replayer that feeds them back through XingRealtimeClient.
+
+File layout (one file per KST trading day, <root>/YYYYMMDD.ticks):
+  record = HEADER(payload length, receive epoch seconds, tr_cd) + payload
+  payload = compact UTF-8 JSON [tr_key, body]
+Records are only ever appended, so a crash loses at most the unflushed tail, and readers
+can memory-map a file while the recorder is still writing to it.
+"""
+import os
+import sys
+import mmap
+import json
+import time
+import struct
+import threading
+from datetime import datetime, timedelta
+
+from src.utils.symbol_master import KST
+
+HEADER = struct.Struct("<Id4s")
+RECORDED_TRS = ("FC0", "FH0", "OC0", "OH0")
+
+def _next_midnight(now):
+    day = datetime.fromtimestamp(now, KST).date() + timedelta(days=1)
+    return datetime(day.year, day.month, day.day, tzinfo=KST).timestamp()
+
+def _complete_length(f):
+    """Byte length of the whole records at the start of an open log file (the file position ends up at EOF)."""
+    size = f.seek(0, os.SEEK_END)
+    pos = 0
+    with open(f.name, "rb") as r:
+        while pos + HEADER.size <= size:
+            r.seek(pos)
+            length = HEADER.unpack(r.read(HEADER.size))[0]
+            if pos + HEADER.size + length > size: break
+            pos += HEADER.size + length
+    return pos
+
+class TickRecorder:
+    """Appends every realtime message to the day's log. record() is called on the receive thread and only buffers."""
+    FLUSH_EVERY = 256   # records; also flushed on rotation and close
+
+    def __init__(self, root, trs=RECORDED_TRS):
+        self.root = root
+        self.trs = set(trs)
+        self._lock = threading.Lock()
+        self._file = None
+        self._rotate_at = 0.0
+        self._unflushed = 0
+        self.path = None
+        self.records = 0
+        self.bytes = 0
+
+    def _open(self, now):
+        if self._file: self._file.close()
+        os.makedirs(self.root, exist_ok=True)
+        self.path = os.path.join(self.root, datetime.fromtimestamp(now, KST).strftime("%Y%m%d") + ".ticks")
+        self._file = open(self.path, "ab")
+        # after a crash the file may end in a torn record; appending past it would mis-frame everything after
+        end = _complete_length(self._file)
+        if end < self._file.tell():
+            print(f"[TickLog] Truncating torn tail of {self.path}: {self._file.tell() - end} bytes")
+            self._file.truncate(end)
+            self._file.seek(end)
+        self._rotate_at = _next_midnight(now)
+
+    def record(self, tr_cd, tr_key, body, now=None):
+        if tr_cd not in self.trs: return
+        now = time.time() if now is None else now
+        payload = json.dumps([tr_key, body], ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        with self._lock:
+            if self._file is None or now >= self._rotate_at:
+                self._open(now)
+            self._file.write(HEADER.pack(len(payload), now, tr_cd.encode("ascii")[:4]))
+            self._file.write(payload)
+            self.records += 1
+            self.bytes += HEADER.size + len(payload)
+            self._unflushed += 1
+            if self._unflushed >= self.FLUSH_EVERY:
+                self._file.flush()
+                self._unflushed = 0
+
+    def flush(self):
+        with self._lock:
+            if self._file:
+                self._file.flush()
+                self._unflushed = 0
+
+    def close(self):
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+    def stats(self):
+        return {"path": self.path, "records": self.records, "bytes": self.bytes}
+
+def read_ticks(path):
+    """Yield (receive_ts, tr_cd, tr_key, body) from a tick log; a torn last record is ignored."""
+    if os.path.getsize(path) == 0: return
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        pos, end = 0, len(mm)
+        while pos + HEADER.size <= end:
+            length, ts, tr_cd = HEADER.unpack_from(mm, pos)
+            start = pos + HEADER.size
+            if start + length > end: return
+            tr_key, body = json.loads(mm[start:start + length])
+            yield ts, tr_cd.rstrip(b"\0").decode("ascii"), tr_key, body
+            pos = start + length
+
+class TickReplayer:
+    """
+    Feeds a recorded session into a sink (default: XingRealtimeClient.feed, i.e. last values + dispatch),
+    passing each record's receive time so time-bucketed consumers see the recorded day.
+    speed=1 replays in real time, N replays N times faster, None replays as fast as possible.
+    """
+    def __init__(self, path, trs=None):
+        self.path = path
+        self.trs = set(trs) if trs else None
+
+    def replay(self, sink, speed=None, limit=None):
+        """Returns {"messages", "seconds", "rate"} where rate is messages per second."""
+        feed = getattr(sink, "feed", None)
+        if feed is None:
+            feed = lambda tr_cd, tr_key, body, received_at: sink(tr_cd, tr_key, body)
+        count = 0
+        first_ts = None
+        started = time.perf_counter()
+        for ts, tr_cd, tr_key, body in read_ticks(self.path):
+            if self.trs is not None and tr_cd not in self.trs: continue
+            if speed:
+                if first_ts is None: first_ts = ts
+                delay = (ts - first_ts) / speed - (time.perf_counter() - started)
+                if delay > 0: time.sleep(delay)
+            feed(tr_cd, tr_key, body, received_at=ts)
+            count += 1
+            if limit and count >= limit: break
+        elapsed = time.perf_counter() - started
+        return {"messages": count, "seconds": round(elapsed, 3), "rate": round(count / elapsed, 1) if elapsed else 0.0}
+
+if __name__ == "__main__":
+    # python -m src.clients.tick_log data/ticks/20260105.ticks [speed]
+    # Replays through an offline client (no websocket) with a counting callback per TR and prints throughput.
+    from src.clients.xing_rest import XingRestTrader
+    from src.clients.xing_realtime import XingRealtimeClient
+
+    client = XingRealtimeClient(trader=XingRestTrader("does_not_exist.json"))
+    seen = {tr_cd: 0 for tr_cd in RECORDED_TRS}
+    def count(tr_cd, tr_key, body):
+        seen[tr_cd] += 1
+    for tr_cd in RECORDED_TRS:
+        client.on_callback(tr_cd, count)
+    client.dispatcher.start()
+    result = TickReplayer(sys.argv[1]).replay(client, speed=float(sys.argv[2]) if len(sys.argv) > 2 else None)
+    while client.dispatcher.stats()["pending"]:
+        time.sleep(0.01)
+    client.dispatcher.stop()
+    print(f"Replayed {result['messages']} messages in {result['seconds']}s ({result['rate']}/s)")
+    print(f"Delivered: {seen} | dispatch: {client.dispatcher.stats()}")
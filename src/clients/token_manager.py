@@ -0,0 +1,113 @@
+import os
+import json
+import time
+import hashlib
+import threading
+
+class TokenManager:
+    """
+    LS OAuth token lifecycle shared by the REST and WebSocket clients.
+    - Cached on disk with its expiry, so restarts skip the OAuth round trip.
+    - Refreshed `refresh_margin` seconds before expiry.
+    - Single-flight: concurrent callers wait for one refresh instead of each requesting a token.
+    fetch_fn() must return (access_token, expires_in_seconds) or None.
+    """
+    DEFAULT_TTL = 20 * 3600     # used when the response has no expires_in
+    FAILURE_COOLDOWN = 5        # seconds before retrying after a failed fetch
+
+    def __init__(self, fetch_fn, cache_file=None, app_key="", refresh_margin=600):
+        self.fetch_fn = fetch_fn
+        self.cache_file = cache_file
+        self.refresh_margin = refresh_margin
+        self._key_id = hashlib.sha256(app_key.encode("utf-8")).hexdigest()[:16] if app_key else ""
+        self._token = None
+        self._expires_at = 0.0
+        self._refreshing = False
+        self._last_failure = 0.0
+        self._cond = threading.Condition()
+        self.refreshes = 0
+        self._load()
+
+    def _load(self):
+        if not self.cache_file or not os.path.exists(self.cache_file): return
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+            if cached.get("key_id") == self._key_id and cached.get("expires_at", 0) > time.time():
+                self._token = cached.get("access_token")
+                self._expires_at = cached["expires_at"]
+                print(f"[Token] Loaded cached token (expires in {(self._expires_at - time.time()) / 3600:.1f}h)")
+        except Exception as e:
+            print(f"[Token] Could not read token cache: {e}")
+
+    def _save(self):
+        if not self.cache_file: return
+        try:
+            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+            tmp = self.cache_file + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"key_id": self._key_id, "access_token": self._token, "expires_at": self._expires_at}, f)
+            os.replace(tmp, self.cache_file)
+        except Exception as e:
+            print(f"[Token] Could not write token cache: {e}")
+
+    def _valid(self, now=None):
+        now = time.time() if now is None else now
+        return bool(self._token) and now < self._expires_at - self.refresh_margin
+
+    def peek(self):
+        """Current token if it is still valid, else None. Never blocks or fetches."""
+        with self._cond:
+            return self._token if self._valid() else None
+
+    def expires_in(self):
+        with self._cond:
+            return max(0.0, self._expires_at - time.time()) if self._token else 0.0
+
+    def get_token(self):
+        """Return a valid token, refreshing it (once, for all waiting callers) if needed. None on failure."""
+        with self._cond:
+            while True:
+                if self._valid(): return self._token
+                if time.time() - self._last_failure < self.FAILURE_COOLDOWN: return None
+                if not self._refreshing:
+                    self._refreshing = True
+                    break
+                self._cond.wait(timeout=30)
+
+        result = None
+        try:
+            result = self.fetch_fn()
+        except Exception as e:
+            print(f"[Token] Refresh error: {e}")
+        finally:
+            with self._cond:
+                self._refreshing = False
+                if result and result[0]:
+                    token, expires_in = result
+                    self._token = token
+                    self._expires_at = time.time() + float(expires_in or self.DEFAULT_TTL)
+                    self.refreshes += 1
+                    self._save()
+                else:
+                    self._last_failure = time.time()
+                self._cond.notify_all()
+        return result[0] if result and result[0] else None
+
+    def invalidate(self, token):
+        """Drop `token` after the server rejected it. No-op if it was already replaced."""
+        with self._cond:
+            if token and token == self._token:
+                self._token = None
+                self._expires_at = 0.0
+                self._last_failure = 0.0
+
+    def start_auto_refresh(self):
+        """Background thread that refreshes shortly before expiry, so idle periods don't leave a stale token."""
+        def _loop():
+            while True:
+                wait = self.expires_in() - self.refresh_margin
+                time.sleep(min(max(wait, 30), 3600))
+                if self.peek() is None:
+                    self.get_token()
+        threading.Thread(target=_loop, name="token-refresh", daemon=True).start()
@@ -0,0 +1,121 @@
+"""
+Declarative descriptions of the LS REST TRs the bot uses, plus the paging logic shared by
+the blocking and asyncio traders. A TR call is then just: build the InBlock from the spec,
+POST it, pull the rows out, and follow tr_cont / tr_cont_key until a stop condition is hit.
+"""
+
+STOCK_MARKET_DATA = "/stock/market-data"
+FO_MARKET_DATA = "/futureoption/market-data"
+
+class TRSpec:
+    """
+    Static description of one TR.
+    - code_field: InBlock field that takes the symbol (shcode / focode), if any.
+    - defaults: the rest of the InBlock.
+    - rows_block: where the rows are (a list, or a single dict for quote TRs).
+    - count_field / page_size: per-request row count, for TRs that page.
+    - cont_fields: OutBlock fields echoed back into the next InBlock on continuation (cts_date, ...).
+    - rows_ascending: rows inside one page are oldest first while pages walk back in time (chart TRs).
+    """
+    def __init__(self, tr_cd, path, code_field=None, defaults=None, rows_block=None, count_field=None,
+                 page_size=None, cont_fields=(), date_field="date", rows_ascending=False, timeout=None):
+        self.tr_cd = tr_cd
+        self.path = path
+        self.code_field = code_field
+        self.defaults = defaults or {}
+        self.in_block = f"{tr_cd}InBlock"
+        self.out_block = f"{tr_cd}OutBlock"
+        self.rows_block = rows_block or self.out_block
+        self.count_field = count_field
+        self.page_size = page_size
+        self.cont_fields = cont_fields
+        self.date_field = date_field
+        self.rows_ascending = rows_ascending
+        self.timeout = timeout
+
+    def url(self, base_url):
+        return f"{base_url}{self.path}"
+
+    def body(self, code=None, cont=None, count=None, **params):
+        block = dict(self.defaults)
+        if self.code_field and code is not None:
+            block[self.code_field] = code
+        if self.count_field and count is not None:
+            block[self.count_field] = count
+        block.update(params)
+        if cont:
+            block.update(cont)
+        return {self.in_block: block}
+
+    def rows(self, result):
+        rows = result.get(self.rows_block)
+        if rows is None: return []
+        return [rows] if isinstance(rows, dict) else rows
+
+    def next_cont(self, result, headers):
+        """(InBlock overrides, tr_cont_key) for the next page, or None if this was the last one."""
+        if str(headers.get("tr_cont", "N")).upper() != "Y":
+            return None
+        out = result.get(self.out_block)
+        out = out if isinstance(out, dict) else {}
+        cont = {f: out.get(f, "") for f in self.cont_fields}
+        return cont, headers.get("tr_cont_key", "")
+
+
+class TRPager:
+    """
+    Stop conditions for a paged TR. feed() takes one page of rows and returns the ones to emit,
+    newest first; `done` is set once max_rows rows were emitted or a row older than `since`
+    (YYYYMMDD, compared against spec.date_field) was reached.
+    """
+    MAX_PAGES = 200   # hard stop in case the server keeps answering tr_cont=Y
+
+    def __init__(self, spec, max_rows=None, since=None):
+        self.spec = spec
+        self.max_rows = max_rows
+        self.since = str(since) if since else None
+        self.emitted = 0
+        self.pages = 0
+        self.done = False
+
+    def next_count(self):
+        """Row count to request for the next page."""
+        if not self.spec.count_field: return None
+        if self.max_rows is None: return self.spec.page_size
+        return max(1, min(self.spec.page_size or self.max_rows, self.max_rows - self.emitted))
+
+    def feed(self, rows):
+        self.pages += 1
+        if not rows or self.pages >= self.MAX_PAGES:
+            self.done = True
+        if self.spec.rows_ascending:
+            rows = rows[::-1]
+        out = []
+        for row in rows:
+            if self.since and str(row.get(self.spec.date_field, "")) < self.since:
+                self.done = True
+                break
+            out.append(row)
+            self.emitted += 1
+            if self.max_rows is not None and self.emitted >= self.max_rows:
+                self.done = True
+                break
+        return out
+
+
+_CHART = dict(count_field="qrycnt", page_size=500, cont_fields=("cts_date", "cts_time"), rows_ascending=True)
+
+TR_SPECS = {
+    "t1102": TRSpec("t1102", STOCK_MARKET_DATA, code_field="shcode"),
+    "t2101": TRSpec("t2101", FO_MARKET_DATA, code_field="focode"),
+    "t4201": TRSpec("t4201", STOCK_MARKET_DATA, code_field="shcode", rows_block="t4201OutBlock1",
+                    defaults={"gubun": "0", "sdate": "", "edate": "", "cts_date": "", "cts_time": "", "comp_yn": "N"}, **_CHART),
+    "t4203": TRSpec("t4203", STOCK_MARKET_DATA, code_field="shcode", rows_block="t4203OutBlock1",
+                    defaults={"ncnt": 1, "sdate": "", "stime": "", "edate": "", "etime": "", "cts_date": "", "cts_time": ""}, **_CHART),
+    "t8413": TRSpec("t8413", FO_MARKET_DATA, code_field="focode", rows_block="t8413OutBlock1",
+                    defaults={"ncnt": 1, "nday": "0", "sdate": "", "stime": "", "edate": "", "etime": "", "cts_date": "", "cts_time": "", "comp_yn": "N"}, **_CHART),
+    "t8407": TRSpec("t8407", STOCK_MARKET_DATA, rows_block="t8407OutBlock1"),
+    "t8401": TRSpec("t8401", FO_MARKET_DATA, defaults={"dummy": "0"}, timeout=15),
+    "t8402": TRSpec("t8402", FO_MARKET_DATA, defaults={"dummy": "0"}, timeout=15),
+    "t8433": TRSpec("t8433", FO_MARKET_DATA, defaults={"dummy": "0"}, timeout=15),
+}
@@ -11,10 +11,12 @@ TR Codes:
 import os
 import json
 import threading
-import time
-import ssl
-import websocket
 from .xing_rest import XingRestTrader
+from .records import Tick, OrderBook
+from src.utils.last_values import EXECUTION_TRS
+from .realtime_dispatch import RealtimeDispatcher
+from .subscriptions import SubscriptionManager
+from .realtime_pool import ConnectionPool, RealtimeConnection
 
 
 # --- TR Code Descriptions ---
@@ -32,23 +34,34 @@ class XingRealtimeClient:
     WS_URL_REAL = "wss://openapi.ls-sec.co.kr:9443/websocket"
     WS_URL_SIM  = "wss://openapi.ls-sec.co.kr:29443/websocket"
 
-    def __init__(self, config_file="xing_config.json", simulation=False):
-        if not os.path.isabs(config_file):
-             # __file__ is in spk-mobile-bot/src/clients/
-             # root is spk-mobile-bot's parent (scratch/)
-             root_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-             config_file = os.path.join(root_dir, config_file)
-        self.trader = XingRestTrader(config_file)
+    def __init__(self, config_file="xing_config.json", simulation=False, trader=None, workers=2, linger=30, recorder=None,
+                 connections=1, max_per_connection=0):
+        if trader is None:
+            if not os.path.isabs(config_file):
+                 # __file__ is in spk-mobile-bot/src/clients/
+                 # root is spk-mobile-bot's parent (scratch/)
+                 root_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+                 config_file = os.path.join(root_dir, config_file)
+            trader = XingRestTrader(config_file)
+        # Sharing the bot's trader also shares its TokenManager (no second OAuth token)
+        self.trader = trader
         self.access_token = None
-        self.ws = None
         self.ws_url = self.WS_URL_SIM if simulation else self.WS_URL_REAL
         self.simulation = simulation
         self._running = False
-        self._thread = None
-        self._subscriptions = {}  # key: (tr_cd, tr_key) -> True
-        self._callbacks = {}     # key: tr_cd -> [callback_fn, ...]
-        self._lock = threading.Lock()
-        self._connected = threading.Event()
+        # Subscriptions are sharded over `connections` websockets, each with its own receive thread;
+        # all of them deliver into the one pipeline below (last values, recorder, dispatcher)
+        self.pool = ConnectionPool([RealtimeConnection(self, i) for i in range(max(1, connections))],
+                                   max_per_connection=max_per_connection)
+        # Callbacks run on the dispatcher's workers; the websocket threads only decode and enqueue
+        self.dispatcher = RealtimeDispatcher(num_workers=workers)
+        for tr_cd in ("FC0", "OC0"):
+            # every execution counts towards the bars, so this queue is sized not to drop during bursts
+            self.dispatcher.add(tr_cd, self.trader.live_bars.on_message, max_queue=100000)
+        # Consumers share refcounted subscriptions; the last one out unsubscribes after `linger` seconds
+        self.subscriptions = SubscriptionManager(self, linger=linger)
+        self.recorder = recorder   # optional tick_log.TickRecorder: every market data message is appended to disk
+        self._connected = threading.Event()   # set while at least one connection is up
 
     def authenticate(self):
         """Get access token via REST API."""
@@ -59,82 +72,60 @@ class XingRealtimeClient:
         print("[Realtime] Failed to get access token.")
         return False
 
-    def on_callback(self, tr_cd, callback):
-        """Register a callback for a TR code. callback(tr_cd, tr_key, data)"""
-        with self._lock:
-            if tr_cd not in self._callbacks:
-                self._callbacks[tr_cd] = []
-            self._callbacks[tr_cd].append(callback)
+    def on_callback(self, tr_cd, callback, policy=None, max_queue=None):
+        """
+        Register a callback for a TR code. callback(tr_cd, tr_key, data), run on a dispatch worker.
+        policy: realtime_dispatch.QUEUE (every message, bounded, oldest dropped) or CONFLATE
+        (latest per tr_key only); orderbook TRs conflate by default.
+        """
+        self.dispatcher.add(tr_cd, callback, policy, max_queue)
 
-    def subscribe(self, tr_cd, tr_key):
-        """Subscribe to a real-time data feed."""
-        key = (tr_cd, tr_key)
-        if key in self._subscriptions:
-            print(f"[Realtime] Already subscribed: {tr_cd}/{tr_key}")
-            return
+    def remove_callback(self, tr_cd, callback):
+        return self.dispatcher.remove(tr_cd, callback)
 
-        msg = {
-            "header": {
-                "token": self.access_token,
-                "tr_type": "3"   # 3 = subscribe
-            },
-            "body": {
-                "tr_cd": tr_cd,
-                "tr_key": tr_key
-            }
-        }
+    def subscribed(self):
+        """(tr_cd, tr_key) pairs currently subscribed (or queued until connect)."""
+        return self.pool.subscribed()
 
-        if self.ws and self._connected.is_set():
-            self.ws.send(json.dumps(msg))
-            self._subscriptions[key] = True
+    def subscribe(self, tr_cd, tr_key):
+        """
+        Subscribe to a real-time data feed on the least-loaded connection. Low level: consumers should
+        use subscriptions.acquire() so feeds are shared instead of cancelled by each other.
+        Returns False if every connection is at its cap (nothing was subscribed or queued).
+        """
+        if self.pool.owner(tr_cd, tr_key) is not None:
+            print(f"[Realtime] Already subscribed: {tr_cd}/{tr_key}")
+            return True
+        conn = self.pool.subscribe(tr_cd, tr_key)
+        if conn is None:
+            print(f"[Realtime] [X] Every connection is full ({self.pool.max_per_connection} each). Not subscribed: {tr_cd}/{tr_key}")
+            return False
+        if conn.subscriptions.get((tr_cd, tr_key)):
             desc = TR_DESCRIPTIONS.get(tr_cd, tr_cd)
-            print(f"[Realtime] Subscribed: {desc} / {tr_key}")
+            print(f"[Realtime#{conn.index}] Subscribed: {desc} / {tr_key}")
         else:
-            print(f"[Realtime] Not connected. Queuing subscription: {tr_cd}/{tr_key}")
-            self._subscriptions[key] = False  # Queued, will send on connect
+            print(f"[Realtime#{conn.index}] Not connected. Queuing subscription: {tr_cd}/{tr_key}")
+        return True
 
     def unsubscribe(self, tr_cd, tr_key):
         """Unsubscribe from a real-time data feed."""
-        key = (tr_cd, tr_key)
-        if key not in self._subscriptions:
-            return
-
-        msg = {
-            "header": {
-                "token": self.access_token,
-                "tr_type": "4"   # 4 = unsubscribe
-            },
-            "body": {
-                "tr_cd": tr_cd,
-                "tr_key": tr_key
-            }
-        }
-
-        if self.ws and self._connected.is_set():
-            self.ws.send(json.dumps(msg))
-        del self._subscriptions[key]
-        print(f"[Realtime] Unsubscribed: {tr_cd}/{tr_key}")
+        if self.pool.unsubscribe(tr_cd, tr_key) is not None:
+            print(f"[Realtime] Unsubscribed: {tr_cd}/{tr_key}")
 
-    def _on_open(self, ws):
-        print(f"[Realtime] WebSocket connected to {self.ws_url}")
+    def _on_connection_open(self, conn):
         self._connected.set()
+        # Re-send queued subscriptions, then take over keys from busier connections
+        moved = self.pool.on_open(conn)
+        if moved:
+            print(f"[Realtime] Rebalanced {moved} subscriptions onto connection #{conn.index}")
 
-        # Re-send any queued or existing subscriptions
-        for (tr_cd, tr_key), sent in list(self._subscriptions.items()):
-            if not sent:
-                msg = {
-                    "header": {
-                        "token": self.access_token,
-                        "tr_type": "3"
-                    },
-                    "body": {
-                        "tr_cd": tr_cd,
-                        "tr_key": tr_key
-                    }
-                }
-                ws.send(json.dumps(msg))
-                self._subscriptions[(tr_cd, tr_key)] = True
-                print(f"[Realtime] Re-subscribed: {tr_cd}/{tr_key}")
+    def _on_connection_close(self, conn):
+        if self._running:
+            self.pool.on_close(conn)
+        if not any(c.is_connected() for c in self.pool.connections):
+            self._connected.clear()
+            self.trader.last_values.clear()   # no longer live; readers fall back to REST until ticks resume
+        # otherwise the dropped keys resume on the other connections; their last values age out meanwhile
 
     def _on_message(self, ws, message):
         try:
@@ -161,52 +152,43 @@ class XingRealtimeClient:
                 print(f"[Realtime] [X] {tr_cd}/{tr_key}: [{rsp_cd}] {rsp_msg}")
             return
 
-        # Real-time data arrived — dispatch to callbacks
-        with self._lock:
-            callbacks = self._callbacks.get(tr_cd, [])
-
-        for cb in callbacks:
+        if self.recorder:
             try:
-                cb(tr_cd, tr_key, body)
+                self.recorder.record(tr_cd, tr_key, body)
             except Exception as e:
-                print(f"[Realtime] Callback error for {tr_cd}: {e}")
-
-    def _on_error(self, ws, error):
-        print(f"[Realtime] Error: {error}")
-
-    def _on_close(self, ws, close_status_code, close_msg):
-        self._connected.clear()
-        print(f"[Realtime] Disconnected. Code={close_status_code}, Msg={close_msg}")
-
-        # Auto-reconnect if still running
-        if self._running:
-            print("[Realtime] Reconnecting in 5 seconds...")
-            # Mark all subscriptions as not-sent for re-subscribe
-            for key in self._subscriptions:
-                self._subscriptions[key] = False
-            time.sleep(5)
-            self._connect()
+                print(f"[Realtime] Tick recording failed: {e}")
+        self.feed(tr_cd, tr_key, body)
+
+    def feed(self, tr_cd, tr_key, body, received_at=None):
+        """
+        Real-time data arrived (from the socket or a TickReplayer): keep the last value, then dispatch.
+        A replayer passes the recorded receive time, carried to callbacks as body["_received_at"].
+        FC0/OC0 are parsed once here; the Tick rides along as body["_tick"] for the last values and live bars.
+        """
+        if received_at is not None:
+            body["_received_at"] = received_at
+        if tr_cd in EXECUTION_TRS:
+            try:
+                body["_tick"] = Tick.from_ls(body)
+            except Exception as e:
+                print(f"[Realtime] Tick parse failed for {tr_cd}/{tr_key}: {e}")
+        try:
+            self.trader.last_values.on_message(tr_cd, tr_key, body)
+        except Exception as e:
+            print(f"[Realtime] Last-value update failed for {tr_cd}/{tr_key}: {e}")
 
-    def _connect(self):
-        """Internal: create and run WebSocket."""
-        self.ws = websocket.WebSocketApp(
-            self.ws_url,
-            on_open=self._on_open,
-            on_message=self._on_message,
-            on_error=self._on_error,
-            on_close=self._on_close
-        )
-        self.ws.run_forever(sslopt={"cert_reqs": ssl.CERT_NONE})
+        self.dispatcher.publish(tr_cd, tr_key, body)
 
     def start(self):
-        """Start the WebSocket connection in a background thread."""
+        """Start every pool connection on its own background thread; ready once one is up."""
         if not self.access_token:
             if not self.authenticate():
                 return False
 
         self._running = True
-        self._thread = threading.Thread(target=self._connect, daemon=True)
-        self._thread.start()
+        self.dispatcher.start()
+        for conn in self.pool.connections:
+            conn.start()
 
         # Wait for connection
         if self._connected.wait(timeout=10):
@@ -217,12 +199,14 @@ class XingRealtimeClient:
             return False
 
     def stop(self):
-        """Stop the WebSocket connection."""
+        """Stop the WebSocket connections."""
         self._running = False
-        if self.ws:
-            self.ws.close()
-        if self._thread:
-            self._thread.join(timeout=5)
+        self.subscriptions.close_all()
+        for conn in self.pool.connections:
+            conn.close()
+        self.dispatcher.stop()
+        if self.recorder:
+            self.recorder.close()
         print("[Realtime] Stopped.")
 
     def is_connected(self):
@@ -231,32 +215,10 @@ class XingRealtimeClient:
 
 # --- Helper: Parse common fields from FC0 (futures execution) ---
 def parse_futures_execution(body):
-    """Parse FC0 body into a readable dict."""
-    # FC0 OutBlock fields (common ones)
-    return {
-        "code": body.get("futcode", body.get("tr_key", "")),
-        "price": body.get("price", body.get("close", "")),
-        "change": body.get("change", ""),
-        "diff": body.get("diff", body.get("drate", "")),
-        "volume": body.get("cvolume", body.get("volume", "")),
-        "time": body.get("chetime", body.get("time", "")),
-        "buysell": body.get("cgubun", ""),  # 1=sell, 2=buy
-        "open": body.get("open", ""),
-        "high": body.get("high", ""),
-        "low": body.get("low", ""),
-        "total_volume": body.get("volume", ""),
-    }
+    """Parse an FC0 body into a Tick (numeric fields parsed once)."""
+    return Tick.from_ls(body)
 
 
 def parse_futures_orderbook(body):
-    """Parse FH0 body into a readable dict (5-level depth)."""
-    result = {
-        "code": body.get("futcode", body.get("tr_key", "")),
-    }
-    # 5-level ask/bid
-    for i in range(1, 6):
-        result[f"ask{i}"] = body.get(f"offerho{i}", "")
-        result[f"ask{i}_qty"] = body.get(f"offerrem{i}", "")
-        result[f"bid{i}"] = body.get(f"bidho{i}", "")
-        result[f"bid{i}_qty"] = body.get(f"bidrem{i}", "")
-    return result
+    """Parse an FH0 body into an OrderBook (5-level depth)."""
+    return OrderBook.from_ls(body)
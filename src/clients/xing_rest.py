@@ -1,5 +1,13 @@
 import os
-import requests
+from .ls_transport import LSTransport
+from .token_manager import TokenManager
+from .rate_limiter import TRRateLimiter
+from .tr_specs import TR_SPECS, TRPager
+from .records import Quote
+from src.utils.single_flight import SingleFlight
+from src.utils.quote_cache import QuoteCache
+from src.utils.last_values import LastValueStore
+from src.utils.bar_aggregator import StreamingBars
 import json
 import sys
 import argparse
@@ -14,6 +22,8 @@ class XingRestTrader:
         self.base_url = "https://openapi.ls-sec.co.kr:8080"
         self.access_token = None
         self.config = None
+        self.transport = LSTransport()
+        self.flight = SingleFlight()   # concurrent identical quote calls share one request
 
         try:
             with open(config_file, "r", encoding="utf-8-sig") as f:
@@ -37,9 +47,26 @@ class XingRestTrader:
             else:
                 print(f"Config file '{config_file}' not found and Env vars missing. Xing API disabled.")
 
+        self.limiter = TRRateLimiter((self.config or {}).get("rate_limits"))
+        # Last quote per code for get_price_data(max_age=...); TTLs overridable via "quote_ttl": {"stock": s, "future": s}
+        self.quote_cache = QuoteCache(ttl=(self.config or {}).get("quote_ttl"))
+        # Latest FC0/FH0/OC0/OH0 values, fed by XingRealtimeClient; consulted before quote_cache and REST
+        self.last_values = LastValueStore((self.config or {}).get("realtime_max_age"))
+        # 1s/1m/5m OHLCV+VWAP built from the same stream (no t8413/t4203 polling for streamed codes)
+        self.live_bars = StreamingBars()
+        token_cache = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "config", "ls_token_cache.json")
+        self.tokens = TokenManager(self._request_new_token, cache_file=token_cache,
+                                   app_key=(self.config or {}).get("app_key", "") + (self.config or {}).get("base_url", ""))
+
     def get_access_token(self):
+        """Make sure self.access_token holds a valid token (cached on disk, refreshed before expiry)."""
         if self.config is None:
             return False
+        self.access_token = self.tokens.get_token()
+        return bool(self.access_token)
+
+    def _request_new_token(self):
+        """OAuth round trip used by TokenManager. Returns (token, expires_in) or None."""
         url = f"{self.base_url}/oauth2/token"
         headers = {
             "Content-Type": "application/x-www-form-urlencoded"
@@ -53,79 +80,140 @@ class XingRestTrader:
         
         try:
             # print(f"Requesting token from {url}...")
-            response = requests.post(url, headers=headers, data=data, verify=False, timeout=10) 
+            response = self.transport.post(url, "oauth2/token", headers, data=data, timeout=10)
             
             if response.status_code == 200:
                 result = response.json()
-                self.access_token = result.get("access_token")
-                # print("Token Access Success")
-                return True
+                print("[Token] New access token issued.")
+                return result.get("access_token"), result.get("expires_in")
             else:
                 print(f"Token Request Failed: {response.status_code}")
                 # print(response.text)
-                return False
+                return None
         except Exception as e:
             print(f"Error getting token: {e}")
+            return None
+
+    # rsp_cd LS returns with a non-401/403 status when the token itself was refused
+    AUTH_RSP_CDS = ("IGW00121",)
+    # Order TRs are never replayed: a token error doesn't prove LS didn't take the order
+    ORDER_TRS = ("CFOAT00100", "CFOAT00200", "CFOAT00300")
+
+    @classmethod
+    def _is_auth_error(cls, status_code, text):
+        """True if LS rejected the request because of the token (expired/revoked)."""
+        if status_code in (401, 403): return True
+        if status_code == 200: return False
+        try:
+            return json.loads(text or "").get("rsp_cd") in cls.AUTH_RSP_CDS
+        except (ValueError, AttributeError):
             return False
 
+    def _send(self, url, tr_cd, body, timeout=None, retries=None, tr_cont="N", tr_cont_key=""):
+        """
+        POST a TR with the current token, after waiting for a per-TR rate-limit slot
+        (priority from call_priority()). If LS rejects the token, refresh it and retry once,
+        except for order TRs, whose response goes back to the caller as is.
+        """
+        # Every call picks up the current token, so a background refresh takes effect at once (a lock, no I/O)
+        self.get_access_token()
+        token = self.access_token
+        self.limiter.acquire(tr_cd)
+        response = self.transport.post(url, tr_cd, self._headers(tr_cd, tr_cont, tr_cont_key), json=body, timeout=timeout, retries=retries)
+        if self._is_auth_error(response.status_code, response.text):
+            self.tokens.invalidate(token)
+            if tr_cd in self.ORDER_TRS:
+                print(f"[Token] {tr_cd} rejected the access token; order not resent")
+                return response
+            print(f"[Token] {tr_cd} rejected the access token, refreshing and retrying once...")
+            if self.get_access_token():
+                self.limiter.acquire(tr_cd)
+                response = self.transport.post(url, tr_cd, self._headers(tr_cd, tr_cont, tr_cont_key), json=body, timeout=timeout, retries=retries)
+        return response
+
+    def _headers(self, tr_cd, tr_cont="N", tr_cont_key=""):
+        return {
+            "Content-Type": "application/json; charset=UTF-8",
+            "Authorization": f"Bearer {self.access_token}",
+            "tr_cd": tr_cd,
+            "tr_cont": tr_cont,
+            "tr_cont_key": tr_cont_key,
+        }
+
+    def iter_tr(self, tr_cd, code=None, max_rows=None, since=None, **params):
+        """
+        Run the TR described by TR_SPECS[tr_cd] and yield its rows as they arrive, newest first
+        for chart TRs. Follows tr_cont / tr_cont_key until max_rows rows were yielded, a row
+        older than `since` (YYYYMMDD) shows up, or the server has no more pages.
+        Raises RuntimeError on a non-200 page.
+        """
+        spec = TR_SPECS[tr_cd]
+        pager = TRPager(spec, max_rows, since)
+        url = spec.url(self.base_url)
+        cont, cont_key = None, ""
+        while True:
+            body = spec.body(code, cont, count=pager.next_count(), **params)
+            response = self._send(url, tr_cd, body, timeout=spec.timeout, tr_cont="Y" if cont else "N", tr_cont_key=cont_key)
+            if response.status_code != 200:
+                raise RuntimeError(f"{tr_cd} HTTP {response.status_code}: {response.text[:200]}")
+            result = response.json()
+            for row in pager.feed(spec.rows(result)):
+                yield row
+            if pager.done: return
+            nxt = spec.next_cont(result, response.headers)
+            if nxt is None: return
+            cont, cont_key = nxt
+
+    def fetch_tr(self, tr_cd, code=None, max_rows=None, since=None, **params):
+        """iter_tr() collected into a list in the server's row order. None if the first page failed."""
+        if not self.access_token: return None
+        rows = []
+        try:
+            for row in self.iter_tr(tr_cd, code, max_rows=max_rows, since=since, **params):
+                rows.append(row)
+        except Exception as e:
+            print(f"Error {tr_cd}: {e}")
+            if not rows: return None
+        if TR_SPECS[tr_cd].rows_ascending:
+            rows.reverse()
+        return rows
+
+    def _price_request(self, type, code):
+        """Returns (url, tr_cd, body, out_block) for a single-symbol quote TR."""
+        tr_cd = {"stock": "t1102", "future": "t2101"}.get(type)
+        if tr_cd is None:
+            return None
+        spec = TR_SPECS[tr_cd]
+        return spec.url(self.base_url), tr_cd, spec.body(code), spec.out_block
+
+    @staticmethod
+    def _parse_price_result(result, out_block, code):
+        if out_block in result:
+            return Quote.from_ls(code, result[out_block])
+        else:
+            print(f"XingRestTrader: No out_block '{out_block}' in result for {code}. Result keys: {list(result.keys())}", flush=True)
+            if "rsp_msg" in result:
+                print(f"XingRestTrader: Response message: {result['rsp_msg']}", flush=True)
+            return None
+
     def _get_price_generic(self, type, code):
         if not self.access_token:
             print("No access token.")
             return None
             
-        if type == "stock":
-            url = f"{self.base_url}/stock/market-data"
-            tr_cd = "t1102"
-            in_block = "t1102InBlock"
-            out_block = "t1102OutBlock"
-            code_field = "shcode"
-        elif type == "future":
-            url = f"{self.base_url}/futureoption/market-data"
-            tr_cd = "t2101"
-            in_block = "t2101InBlock"
-            out_block = "t2101OutBlock"
-            code_field = "focode" 
-        else:
+        req = self._price_request(type, code)
+        if req is None:
             return None
+        url, tr_cd, body, out_block = req
+        return self.flight.do((tr_cd, code), self._fetch_price, url, tr_cd, body, out_block, code)
 
-        headers = {
-            "Content-Type": "application/json; charset=UTF-8",
-            "Authorization": f"Bearer {self.access_token}",
-            "tr_cd": tr_cd,
-            "tr_cont": "N",
-            "tr_cont_key": "",
-        }
-        
-        body = {
-            in_block: {
-                code_field: code
-            }
-        }
-
+    def _fetch_price(self, url, tr_cd, body, out_block, code):
         try:
             # print(f"Requesting {type} price for {code}...")
-            response = requests.post(url, headers=headers, json=body, verify=False, timeout=10)
+            response = self._send(url, tr_cd, body)
             
             if response.status_code == 200:
-                result = response.json()
-                if out_block in result:
-                    data = result[out_block]
-                    price = data.get("price")
-                    open_price = data.get("open")
-                    high_price = data.get("high")
-                    low_price = data.get("low")
-                    
-                    return {
-                        "price": price,
-                        "open": open_price,
-                        "high": high_price,
-                        "low": low_price
-                    }
-                else:
-                    print(f"XingRestTrader: No out_block '{out_block}' in result for {code}. Result keys: {list(result.keys())}", flush=True)
-                    if "rsp_msg" in result:
-                        print(f"XingRestTrader: Response message: {result['rsp_msg']}", flush=True)
-                    return None
+                return self._parse_price_result(response.json(), out_block, code)
             else:
                 print(f"XingRestTrader: Request Failed for {code}: HTTP {response.status_code}", flush=True)
                 print(f"XingRestTrader: Response: {response.text}", flush=True)
@@ -137,62 +225,44 @@ class XingRestTrader:
     def get_stock_price(self, shcode):
         return self._get_price_generic("stock", shcode)
 
-    def get_stock_chart_daily(self, shcode, count=10):
-        if not self.access_token: return None
-        url = f"{self.base_url}/stock/market-data"
-        headers = {
-            "Content-Type": "application/json; charset=UTF-8",
-            "Authorization": f"Bearer {self.access_token}",
-            "tr_cd": "t4201", "tr_cont": "N", "tr_cont_key": "",
-        }
-        body = { "t4201InBlock": { "shcode": shcode, "gubun": "0", "qrycnt": count, "sdate": "", "edate": "", "comp_yn": "N" } }
-        try:
-            response = requests.post(url, headers=headers, json=body, verify=False, timeout=10)
-            if response.status_code == 200:
-                result = response.json()
-                return result.get("t4201OutBlock1", [])
-            return None
-        except Exception as e:
-            print(f"Error t4201: {e}")
-            return None
+    QUOTE_BATCH = 50   # t8407 takes up to 50 stock codes per request
 
-    def get_stock_chart_minute(self, shcode, interval=1, count=10):
-        if not self.access_token: return None
-        url = f"{self.base_url}/stock/market-data"
-        headers = {
-            "Content-Type": "application/json; charset=UTF-8",
-            "Authorization": f"Bearer {self.access_token}",
-            "tr_cd": "t4203", "tr_cont": "N", "tr_cont_key": "",
-        }
-        body = { "t4203InBlock": { "shcode": shcode, "ncnt": interval, "qrycnt": count, "sdate": "", "stime": "", "edate": "", "etime": "" } }
-        try:
-            response = requests.post(url, headers=headers, json=body, verify=False, timeout=10)
-            if response.status_code == 200:
-                result = response.json()
-                return result.get("t4203OutBlock1", [])
-            return None
-        except Exception as e:
-            print(f"Error t4203: {e}")
-            return None
+    @staticmethod
+    def _split_quote_codes(codes):
+        """Unique codes split into (stock chunks for t8407, futures codes)."""
+        stocks, futures = [], []
+        for code in dict.fromkeys(codes):
+            (stocks if code.isdigit() and len(code) == 6 else futures).append(code)
+        chunks = [stocks[i:i + XingRestTrader.QUOTE_BATCH] for i in range(0, len(stocks), XingRestTrader.QUOTE_BATCH)]
+        return chunks, futures
 
-    def get_futures_chart_minute(self, focode, interval=1, count=10):
-        if not self.access_token: return None
-        url = f"{self.base_url}/futureoption/market-data"
-        headers = {
-            "Content-Type": "application/json; charset=UTF-8",
-            "Authorization": f"Bearer {self.access_token}",
-            "tr_cd": "t8413", "tr_cont": "N", "tr_cont_key": "",
-        }
-        body = { "t8413InBlock": { "focode": focode, "ncnt": interval, "qrycnt": count, "nday": "0", "sdate": "", "stime": "", "edate": "", "etime": "", "comp_yn": "N" } }
-        try:
-            response = requests.post(url, headers=headers, json=body, verify=False, timeout=10)
-            if response.status_code == 200:
-                result = response.json()
-                return result.get("t8413OutBlock1", [])
-            return None
-        except Exception as e:
-            print(f"Error t8413: {e}")
-            return None
+    @staticmethod
+    def _parse_multi_quote(rows):
+        """t8407OutBlock1 rows -> {shcode: Quote}, as _parse_price_result builds them."""
+        return {row["shcode"]: Quote.from_ls(row["shcode"], row) for row in rows if row.get("shcode")}
+
+    def get_quotes(self, codes):
+        """
+        Quotes for many codes: {code: Quote or None}.
+        Stocks cost one t8407 request per 50 codes; futures have no multi-quote TR here and use t2101 per code.
+        """
+        chunks, futures = self._split_quote_codes(codes)
+        quotes = {}
+        for chunk in chunks:
+            quotes.update(self._parse_multi_quote(self.fetch_tr("t8407", nrec=len(chunk), shcode="".join(chunk)) or []))
+        for code in futures:
+            quotes[code] = self.get_futures_price(code)
+        return {code: quotes.get(code) for code in codes}
+
+    # Chart TRs page automatically: count can exceed one page (500 bars), `since` stops at a date.
+    def get_stock_chart_daily(self, shcode, count=10, since=None):
+        return self.fetch_tr("t4201", shcode, max_rows=count, since=since)
+
+    def get_stock_chart_minute(self, shcode, interval=1, count=10, since=None):
+        return self.fetch_tr("t4203", shcode, max_rows=count, since=since, ncnt=interval)
+
+    def get_futures_chart_minute(self, focode, interval=1, count=10, since=None):
+        return self.fetch_tr("t8413", focode, max_rows=count, since=since, ncnt=interval)
 
     def get_futures_price(self, shcode):
         return self._get_price_generic("future", shcode)
@@ -201,31 +271,8 @@ class XingRestTrader:
         if not self.access_token:
             return []
         
-        url = f"{self.base_url}/futureoption/market-data"
-        headers = {
-            "Content-Type": "application/json; charset=UTF-8",
-            "Authorization": f"Bearer {self.access_token}",
-            "tr_cd": "t8402", 
-            "tr_cont": "N",
-            "tr_cont_key": "",
-        }
-        body = { "t8402InBlock": { "dummy": "0" } }
-
-        try:
-            print("Requesting KOSPI 200 Futures List (t8402)...")
-            response = requests.post(url, headers=headers, json=body, verify=False, timeout=15)
-            if response.status_code == 200:
-                result = response.json()
-                if "t8402OutBlock" in result:
-                    return result["t8402OutBlock"]
-                else:
-                    return []
-            else:
-                print(f"t8402 Request Failed: {response.status_code}")
-                return []
-        except Exception as e:
-            print(f"Error getting KOSPI 200 list: {e}")
-            return []
+        print("Requesting KOSPI 200 Futures List (t8402)...")
+        return self.fetch_tr("t8402") or []
 
     def get_futures_code_list(self):
         # ... (Keep existing simplified logic or merge) ...
@@ -234,51 +281,18 @@ class XingRestTrader:
         index_futures = self.get_kospi200_futures_list()
         return index_futures + stock_futures
 
+    def get_index_option_list(self):
+        """KOSPI200 option master (t8433): every listed call/put strike, monthly and weekly series."""
+        if not self.access_token:
+            return []
+        return self.fetch_tr("t8433") or []
+
     def _get_futures_code_list_t8401(self):
         if not self.access_token:
             print("No access token.")
             return []
 
-        url = f"{self.base_url}/futureoption/market-data"
-        headers = {
-            "Content-Type": "application/json; charset=UTF-8",
-            "Authorization": f"Bearer {self.access_token}",
-            "tr_cd": "t8401", 
-            "tr_cont": "N",
-            "tr_cont_key": "",
-        }
-        
-        body = {
-            "t8401InBlock": {
-                "dummy": "0" 
-            }
-        }
-
-        try:
-            # print("Requesting Futures Code List (t8401)...")
-            response = requests.post(url, headers=headers, json=body, verify=False, timeout=15)
-            if response.status_code == 200:
-                result = response.json()
-                codes = []
-                
-                if "t8401OutBlock" in result:
-                    # Dump full list to file for debugging
-                    with open("futures_codes_dump.json", "w", encoding="utf-8") as dump_file:
-                        json.dump(result["t8401OutBlock"], dump_file, ensure_ascii=False, indent=2)
-                    # print(f"Dumped {len(result['t8401OutBlock'])} codes to futures_codes_dump.json")
-
-                    for item in result["t8401OutBlock"]:
-                        codes.append(item)
-                    return codes
-                else:
-                    # print(f"No t8401OutBlock in response. Keys: {result.keys()}")
-                    return []
-            else:
-                 # print(f"Code List Request Failed: {response.status_code}")
-                 return []
-        except Exception as e:
-            print(f"Error getting code list: {e}")
-            return []
+        return self.fetch_tr("t8401") or []
 
     def place_futures_order(self, shcode, qty, price, buy_sell_type="2"): 
         account_no = self.config.get("account_no")
@@ -287,13 +301,6 @@ class XingRestTrader:
             return None
 
         url = f"{self.base_url}/futureoption/order"
-        headers = {
-            "Content-Type": "application/json; charset=UTF-8",
-            "Authorization": f"Bearer {self.access_token}",
-            "tr_cd": "CFOAT00100", 
-            "tr_cont": "N",
-            "tr_cont_key": "",
-        }
         
         body = {
             "CFOAT00100InBlock1": {
@@ -310,7 +317,7 @@ class XingRestTrader:
 
         try:
             print(f"Placing Futures Order: {buy_sell_type} {qty} of {shcode} at {price}...")
-            response = requests.post(url, headers=headers, json=body, verify=False, timeout=10)
+            response = self._send(url, "CFOAT00100", body, retries=0)
             if response.status_code == 200:
                 result = response.json()
                 if "CFOAT00100OutBlock1" in result:
@@ -0,0 +1,73 @@
+import asyncio
+from src.utils.helpers import get_price_data_async, get_price_data_many_async, candle_store, multi_timeframe_bars_async
+from src.clients.public_data import PublicDataClient
+from src.handlers.nlp_router import NLPRouter, live_prices
+from src.utils.flow import run_async, awaited
+
+class AsyncIO:
+    """BlockingIO's methods as coroutines on the async clients (`clients` is the AsyncBotRuntime)."""
+    def __init__(self, clients):
+        self.clients = clients
+
+    def gather(self, *awaitables):
+        return asyncio.gather(*awaitables)
+
+    async def value(self, value):
+        return value
+
+    async def analyze_intent(self, text):
+        return await self.clients.advisor.analyze_intent(text)
+
+    async def price(self, code):
+        return await get_price_data_async(self.clients.trader, code)
+
+    async def prices(self, codes):
+        return await get_price_data_many_async(self.clients.trader, codes)
+
+    async def daily_bars(self, code, count):
+        return await candle_store.bars_async(self.clients.trader, "stock_daily", code, count=count)
+
+    async def intraday_bars(self, code, timeframes, count):
+        return await multi_timeframe_bars_async(self.clients.trader, code, timeframes=timeframes, count=count)
+
+    async def search(self, query, fallback):
+        return await self.clients.brave_client.search(query) if self.clients.brave_client else fallback
+
+    async def market_summary(self):
+        return await self.clients.public_data.get_market_summary()
+
+    async def market_summary_text(self, failure_label):
+        try: return PublicDataClient.format_market_summary(await self.market_summary())
+        except Exception as e: return f"{failure_label}: {e}"
+
+    async def live_prices(self, codes):
+        try: return live_prices(await self.prices(codes))
+        except Exception: return {}
+
+    async def kospi200_futures(self):
+        return await self.clients.public_data.get_kospi200_futures()
+
+    async def kospi200_options(self):
+        return await self.clients.public_data.get_kospi200_options()
+
+    async def format_response(self, text, data, data_type):
+        return await self.clients.advisor.format_response(text, data, data_type=data_type)
+
+    async def format_multi_timeframe_response(self, *args):
+        return await self.clients.advisor.format_multi_timeframe_response(*args)
+
+    async def portfolio_strategy(self, user_portfolio_text, market_context):
+        return await self.clients.advisor.get_portfolio_strategy(user_portfolio_text=user_portfolio_text, market_context=market_context)
+
+    async def chat_response(self, text, market_data, symbol):
+        return await self.clients.advisor.get_chat_response(text, market_data, symbol=symbol)
+
+class AsyncNLPRouter(NLPRouter):
+    """NLPRouter's conversation on the async clients, for the async runtime. Quote, candles and searches run concurrently."""
+    def __init__(self, bot_context, clients):
+        super().__init__(bot_context)
+        self.clients = clients
+        self.io = AsyncIO(clients)
+
+    async def handle(self, chat_id, text):
+        await run_async(self.conversation(chat_id, text), awaited)
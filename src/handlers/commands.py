@@ -1,10 +1,14 @@
-from src.utils.helpers import lookup_name, get_price_data
+from src.utils.helpers import lookup_name, get_price_data, get_price_data_many, symbol_master, contract_resolver, candle_store
 from src.clients.public_data import PublicDataClient
+from src.services.telegram_sender import PRIORITY_ALERT
+from src.utils.option_chain import OptionChain, ChainSubscriber
 import time
+import threading
 
 class CommandHandler:
     def __init__(self, bot_context):
         self.bot = bot_context
+        self._chain_lock = threading.Lock()
 
     def handle(self, chat_id, text, cmd, parts):
         if cmd == "/subscribe":
@@ -69,19 +73,20 @@ class CommandHandler:
             return True
 
         elif cmd == "/list":
-            self.bot.send_message(chat_id, "Fetching futures list...")
-            codes = self.bot.trader.get_futures_code_list()
+            if symbol_master.is_stale():
+                self.bot.send_message(chat_id, "Fetching futures list...")
+                symbol_master.refresh(self.bot.trader)
+            codes = symbol_master.all()
             if not codes:
                 self.bot.send_message(chat_id, "No futures found.")
                 return True
 
             index_futures, samsung_futures, other_futures = [], [], []
             for c in codes:
-                shcode, hname = c.get("shcode", ""), c.get("hname", "")
-                if not shcode: continue
+                shcode, hname = c["shcode"], c["hname"]
                 entry = f"`{shcode}`: {hname}"
-                if shcode.startswith("101"): index_futures.append(entry)
-                elif '삼성전자' in hname: samsung_futures.append(entry)
+                if c["underlying"] == "KOSPI200": index_futures.append(entry)
+                elif c["underlying"] == "005930": samsung_futures.append(entry)
                 else: other_futures.append(entry)
 
             msg_parts = []
@@ -107,7 +112,7 @@ class CommandHandler:
                 if price == 0:
                      self.bot.send_message(chat_id, f"⚠️ **{name}** (`{code}`)\nPrice is 0 (Check Permissions)")
                 else:
-                     msg = (f"📊 **{name}** (`{code}`)\nPrice: **{price:,}**\nOpen: {data.get('open', 'N/A'):,}\nHigh: {data.get('high', 'N/A'):,}\nLow: {data.get('low', 'N/A'):,}{fallback_line}")
+                     msg = (f"📊 **{name}** (`{code}`)\nPrice: **{price:,}**\nOpen: {data.get('open', 0):,}\nHigh: {data.get('high', 0):,}\nLow: {data.get('low', 0):,}{fallback_line}")
                      self.bot.send_message(chat_id, msg)
             else:
                 self.bot.send_message(chat_id, f"[오류] Could not fetch data for `{code}`")
@@ -134,6 +139,9 @@ class CommandHandler:
                     ctx_lines = futures_ctx + ([calls_ctx] if mkt.get('calls_top') else []) + ([puts_ctx] if mkt.get('puts_top') else [])
                     if ctx_lines: data['_derivatives_context'] = "\n".join(ctx_lines)
             except Exception: pass
+            book = self.bot.trader.last_values.book_metrics(code)
+            if book:
+                data['_orderbook'] = {k: book.to_dict()[k] for k in ("best_bid", "best_ask", "spread", "microprice", "imbalance_l1", "imbalance", "bid_depth", "ask_depth")}
                 
             analysis = self.bot.advisor.get_analysis(data, symbol=code)
             self.bot.send_message(chat_id, f"🤖 **Strategy Scenario**\n\n{analysis}")
@@ -156,11 +164,11 @@ class CommandHandler:
             
             if result and "CFOAT00100OutBlock1" in result:
                  ord_no = result["CFOAT00100OutBlock1"]["OrdNo"]
-                 self.bot.send_message(chat_id, f"✅ **Order Placed!**\nNumber: `{ord_no}`\n{cmd.upper()} {qty} of {code} at {price}")
+                 self.bot.send_message(chat_id, f"✅ **Order Placed!**\nNumber: `{ord_no}`\n{cmd.upper()} {qty} of {code} at {price}", priority=PRIORITY_ALERT)
             elif result and "rsp_msg" in result:
-                 self.bot.send_message(chat_id, f"[오류] Order Failed: {result['rsp_msg']}")
+                 self.bot.send_message(chat_id, f"[오류] Order Failed: {result['rsp_msg']}", priority=PRIORITY_ALERT)
             else:
-                 self.bot.send_message(chat_id, f"[오류] Order Failed (Unknown Error): {result}")
+                 self.bot.send_message(chat_id, f"[오류] Order Failed (Unknown Error): {result}", priority=PRIORITY_ALERT)
             return True
 
         elif cmd == "/realtime":
@@ -181,14 +189,13 @@ class CommandHandler:
             def on_exec(tr_cd, tr_key, body):
                 collected.append(parse_futures_execution(body))
 
-            self.bot.realtime_client.on_callback("FC0", on_exec)
-            self.bot.realtime_client.subscribe("FC0", code)
-            time.sleep(duration)
-            self.bot.realtime_client.unsubscribe("FC0", code)
-
-            if "FC0" in self.bot.realtime_client._callbacks:
-                try: self.bot.realtime_client._callbacks["FC0"].remove(on_exec)
-                except: pass
+            # Shared, refcounted feed: other viewers of the same code keep receiving after we leave
+            handle = self.bot.realtime_client.subscriptions.acquire("FC0", code, on_exec)
+            if handle is None:
+                self.bot.send_message(chat_id, "⚠️ Realtime connections are full (REALTIME_MAX_PER_CONNECTION). Try again later.")
+                return True
+            with handle:
+                time.sleep(duration)
 
             if collected:
                 lines = [f"{'🔴' if d.get('buysell') == '1' else '🔵' if d.get('buysell') == '2' else '⚪'} {d.get('time','')} | {d.get('price',''):>10} | Δ{d.get('change','')} | Vol:{d.get('volume','')}" for d in collected[-15:]]
@@ -207,32 +214,99 @@ class CommandHandler:
                 self.bot.send_message(chat_id, "⚠️ Realtime WebSocket not connected.")
                 return True
 
-            self.bot.send_message(chat_id, f"📋 Fetching orderbook for `{code}`...")
-            orderbook = [None]
-
-            from src.clients.xing_realtime import parse_futures_orderbook
-            def on_ob(tr_cd, tr_key, body):
-                orderbook[0] = parse_futures_orderbook(body)
-
-            self.bot.realtime_client.on_callback("FH0", on_ob)
-            self.bot.realtime_client.subscribe("FH0", code)
-            time.sleep(3)
-            self.bot.realtime_client.unsubscribe("FH0", code)
-
-            if "FH0" in self.bot.realtime_client._callbacks:
-                try: self.bot.realtime_client._callbacks["FH0"].remove(on_ob)
-                except: pass
-
-            if orderbook[0]:
-                ob = orderbook[0]
+            # A feed that is still live (or lingering) answers at once; otherwise wait up to 3s for the first book
+            last_values = self.bot.trader.last_values
+            if last_values.orderbook(code) is None:
+                self.bot.send_message(chat_id, f"📋 Fetching orderbook for `{code}`...")
+                got = threading.Event()
+                handle = self.bot.realtime_client.subscriptions.acquire("FH0", code, lambda tr_cd, tr_key, body: got.set())
+                if handle is None:
+                    self.bot.send_message(chat_id, "⚠️ Realtime connections are full (REALTIME_MAX_PER_CONNECTION). Try again later.")
+                    return True
+                with handle:
+                    got.wait(3)
+
+            ob = last_values.orderbook(code)
+            if ob:
+                m = last_values.book_metrics(code)
                 lines = ["  매도(Ask)     수량  │  매수(Bid)     수량", "  ───────────  ─────  │  ───────────  ─────"]
                 for i in range(5, 0, -1):
-                    lines.append(f"  {ob.get(f'ask{i}', '-'):>10}  {ob.get(f'ask{i}_qty', '-'):>5}  │  {ob.get(f'bid{i}', '-'):>10}  {ob.get(f'bid{i}_qty', '-'):>5}")
+                    ask, ask_qty = ob.asks[i - 1] if i <= len(ob.asks) else ('-', '-')
+                    bid, bid_qty = ob.bids[i - 1] if i <= len(ob.bids) else ('-', '-')
+                    lines.append(f"  {ask:>10}  {ask_qty:>5}  │  {bid:>10}  {bid_qty:>5}")
+                if m and m.spread is not None:
+                    lines.append(f"  spread {m.spread:g} | micro {m.microprice:.3f} | imbalance L1 {m.imbalance_l1:+.2f} / 5L {m.imbalance:+.2f}")
                 self.bot.send_message(chat_id, f"📋 **{code} Orderbook**\n```\n" + "\n".join(lines) + "\n```")
             else:
                 self.bot.send_message(chat_id, f"⚠️ No orderbook data for `{code}`.\n(Market may be closed)")
             return True
 
+        elif cmd == "/bars":
+            if len(parts) < 2:
+                self.bot.send_message(chat_id, "Usage: `/bars [code] [1s|1m|5m]`\nEx: `/bars 101V6000 1m`")
+                return True
+            code = parts[1].upper()
+            label = parts[2].lower() if len(parts) > 2 else "1m"
+            interval = {"1s": 1, "1m": 60, "5m": 300}.get(label)
+            if interval is None:
+                self.bot.send_message(chat_id, "Interval must be one of `1s`, `1m`, `5m`")
+                return True
+            live_bars = self.bot.trader.live_bars
+
+            if not live_bars.bars(code, interval, 1, include_forming=True):
+                if not self.bot.realtime_client or not self.bot.realtime_client.is_connected():
+                    self.bot.send_message(chat_id, "⚠️ Realtime WebSocket not connected.")
+                    return True
+                # Not streaming yet: subscribe (the feed lingers, so follow-up calls are served from memory)
+                self.bot.send_message(chat_id, f"📡 Collecting ticks for `{code}`...")
+                handle = self.bot.realtime_client.subscriptions.acquire("FC0", code)
+                if handle is None:
+                    self.bot.send_message(chat_id, "⚠️ Realtime connections are full (REALTIME_MAX_PER_CONNECTION). Try again later.")
+                    return True
+                with handle:
+                    time.sleep(max(3, min(interval, 10)))
+
+            bars = live_bars.bars(code, interval, 12, include_forming=True)
+            if bars:
+                lines = [f"{str(ts)[8:10]}:{str(ts)[10:12]}:{str(ts)[12:14]} | O {o} H {h} L {l} C {c} | V {v} | VWAP {vwap:.2f}" for ts, o, h, l, c, v, vwap in bars]
+                self.bot.send_message(chat_id, f"🕯️ **{code} {label} bars** (live, last is forming)\n```\n" + "\n".join(lines) + "\n```")
+            else:
+                self.bot.send_message(chat_id, f"⚠️ No ticks for `{code}` yet.\n(Market may be closed)")
+            return True
+
+        elif cmd == "/chain":
+            if not self.bot.realtime_client or not self.bot.realtime_client.is_connected():
+                self.bot.send_message(chat_id, "⚠️ Realtime WebSocket not connected.")
+                return True
+            expiry = contract_resolver.nearest_weekly_option()
+            # One chain for the whole bot: concurrent /chain calls must not each start (and leak) a subscriber
+            with self._chain_lock:
+                chain_sub = self.bot.option_chain
+                created = chain_sub is None or chain_sub.chain.expiry != expiry["expiry"]
+                if created:
+                    records = contract_resolver.option_series(expiry)
+                    if not records:
+                        self.bot.send_message(chat_id, f"⚠️ No KOSPI200 option series for {expiry['expiry']} in the symbol master.")
+                        return True
+                    if chain_sub: chain_sub.close()
+                    chain_sub = self.bot.option_chain = ChainSubscriber(self.bot.realtime_client, OptionChain(records, expiry["expiry"])).start()
+            if created:
+                self.bot.send_message(chat_id, f"📡 Subscribing {len(records)} options ({expiry['expiry']} {'monthly' if expiry['monthly'] else expiry['weekday'] + ' weekly'})...")
+                time.sleep(5)
+
+            chain = chain_sub.chain
+            snap = chain.snapshot()
+            atm = chain.atm_index()
+            mid = atm if atm is not None else len(snap["strikes"]) // 2
+            lines = ["    콜 Last   Bid/Ask   │  Strike  │   풋 Last   Bid/Ask"]
+            for i in range(max(0, mid - 5), min(len(snap["strikes"]), mid + 6)):
+                c, p = snap["call"], snap["put"]
+                mark = "*" if i == atm else " "
+                lines.append(f"{c['last'][i]:>8g} {c['bid'][i]:g}/{c['ask'][i]:g} │{mark}{snap['strikes'][i]:>7g} │ {p['last'][i]:>8g} {p['bid'][i]:g}/{p['ask'][i]:g}")
+            done, total = chain_sub.progress()
+            self.bot.send_message(chat_id, f"🧮 **KOSPI200 Options {snap['expiry']}** ({done}/{total} subscribed, {chain.updates} updates)\n```\n" + "\n".join(lines) + "\n```")
+            return True
+
         elif cmd == "/market":
             self.bot.send_message(chat_id, "🏦 시장 종합 분석 중... (공공데이터 + AI)")
             try:
@@ -246,14 +320,14 @@ class CommandHandler:
                     live_f_px = 0
                     try:
                         from datetime import datetime
-                        f_list = self.bot.trader.get_kospi200_futures_list()
-                        if f_list:
-                            main_f_code = f_list[0].get('shcode')
-                            f_px = get_price_data(self.bot.trader, main_f_code)
+                        main_f_code = contract_resolver.main_kospi200_future()
+                        quotes = get_price_data_many(self.bot.trader, [main_f_code, "005930"] if main_f_code else ["005930"])
+                        if main_f_code:
+                            f_px = quotes.get(main_f_code)
                             if f_px and f_px.get('price'):
                                 live_f_px = float(f_px['price'])
                                 live_msg += f"- 코스피200 선물({main_f_code}): {f_px['price']}\n"
-                        s_px = get_price_data(self.bot.trader, "005930")
+                        s_px = quotes.get("005930")
                         if s_px and s_px.get('price'): live_msg += f"- 삼성전자(005930): {s_px['price']}\n"
                         if live_msg: live_msg = f"\n[실시간 시장 지표 - {datetime.now().strftime('%m-%d %H:%M')}]\n" + live_msg
                     except Exception: pass
@@ -276,13 +350,56 @@ class CommandHandler:
             if self.bot.realtime_client:
                 from src.clients.xing_realtime import TR_DESCRIPTIONS
                 connected = self.bot.realtime_client.is_connected()
-                subs = list(self.bot.realtime_client._subscriptions.keys())
+                subs = self.bot.realtime_client.subscribed()
+                shared = self.bot.realtime_client.subscriptions
                 msg = f"{'🟢' if connected else '🔴'} **Realtime WebSocket**\nConnected: **{connected}**\nServer: `{self.bot.realtime_client.ws_url}`\nActive Subscriptions: {len(subs)}\n"
+                pool = self.bot.realtime_client.pool
+                for i, c in enumerate(pool.stats()["connections"]):
+                    msg += f"  #{i}: {'🟢' if c['connected'] else '🔴'} {c['subscriptions']} subscriptions, {c['messages']} messages\n"
                 for tr_cd, tr_key in subs:
-                    msg += f"  • `{tr_cd}` ({TR_DESCRIPTIONS.get(tr_cd, tr_cd)}) / `{tr_key}`\n"
+                    refs = shared.refcount(tr_cd, tr_key)
+                    conn = pool.owner(tr_cd, tr_key)
+                    msg += f"  • `{tr_cd}` ({TR_DESCRIPTIONS.get(tr_cd, tr_cd)}) / `{tr_key}` ({refs} handles, #{conn.index if conn else '-'})\n"
                 self.bot.send_message(chat_id, msg)
             else:
                 self.bot.send_message(chat_id, "🔴 Realtime client not initialized.")
             return True
 
+        elif cmd == "/stats":
+            lines = ["📈 **Bot Runtime Stats**"]
+            if getattr(self.bot, "dispatcher", None):
+                d = self.bot.dispatcher.stats()
+                lines.append(f"Inbound: pending {d['pending']} (max {d['max_pending']}) | busy {d['busy']}/{d['workers']} | wait avg {d['avg_wait_ms']}ms max {d['max_wait_ms']}ms | dropped {d['dropped']}")
+            if getattr(self.bot, "sender", None):
+                o = self.bot.sender.stats()
+                lines.append(f"Outbound: backlog {o['backlog']} (alert {o['backlog_alert']}/normal {o['backlog_normal']}/bulk {o['backlog_bulk']}) | sent {o['sent']} failed {o['failed']} | latency avg {o['avg_latency_ms']}ms max {o['max_latency_ms']}ms")
+            if self.bot.trader:
+                f = self.bot.trader.flight.stats()
+                lines.append(f"LS coalescing: {f['calls']} calls, {f['executed']} fetched, {f['merged']} merged ({f['merge_rate']}%) | in flight {f['inflight']}")
+                q = self.bot.trader.quote_cache.stats()
+                lines.append(f"Quote cache: {q['size']} codes | {q['hits']} hits / {q['misses']} misses ({q['hit_rate']}%) | evicted {q['evictions']}")
+                lb = self.bot.trader.live_bars.stats()
+                lines.append(f"Live bars: {lb['symbols']} symbols | {lb['ticks']} ticks, {lb['closed']} bars closed")
+                lv = self.bot.trader.last_values.stats()
+                lines.append(f"Realtime last values: {lv['quotes']} quotes, {lv['orderbooks']} books | {lv['updates']} updates | {lv['hits']} reads served ({lv['hit_rate']}%)")
+                if self.bot.realtime_client:
+                    rd = self.bot.realtime_client.dispatcher.stats()
+                    if self.bot.realtime_client.recorder:
+                        tr = self.bot.realtime_client.recorder.stats()
+                        lines.append(f"Tick log: {tr['records']} records, {tr['bytes'] // 1024}KB -> `{tr['path']}`")
+                    ss = self.bot.realtime_client.subscriptions.stats()
+                    lines.append(f"Realtime feeds: {ss['active']} shared by {ss['handles']} handles, {ss['lingering']} lingering | {ss['subscribes']} subscribes, {ss['unsubscribes']} unsubscribes, {ss['reused']} reused, {ss['rejected']} refused")
+                    ps = self.bot.realtime_client.pool.stats()
+                    shards = ", ".join(f"#{i} {'up' if c['connected'] else 'down'} {c['subscriptions']} subs/{c['messages']} msgs" for i, c in enumerate(ps['connections']))
+                    lines.append(f"Realtime connections: {shards} | {ps['moved']} moved, {ps['rejected']} rejected")
+                    lines.append(f"Realtime dispatch: {rd['subscribers']} subscribers on {rd['workers']} workers | pending {rd['pending']} (max {rd['max_pending']}) | lag avg {rd['avg_lag_ms']}ms max {rd['max_lag_ms']}ms | dropped {rd['dropped']}, conflated {rd['conflated']}")
+                cs = candle_store.stats()
+                lines.append(f"Candle store: {cs['series']} series | {cs['fetches']} TR syncs ({cs['failed']} failed), {cs['served_from_disk']} served from disk")
+                limits = self.bot.trader.limiter.stats()
+                for tr_cd, t in sorted(self.bot.trader.transport.stats().items(), key=lambda kv: -kv[1]["calls"])[:8]:
+                    throttled = limits.get(tr_cd, {}).get("throttled", 0)
+                    lines.append(f"LS `{tr_cd}`: {t['calls']} calls, {t['errors']} err, {t['retries']} retry, {throttled} throttled | avg {t['avg_ms']}ms max {t['max_ms']}ms | {t['bytes_in'] // 1024}KB in")
+            self.bot.send_message(chat_id, "\n".join(lines))
+            return True
+
         return False # Not a recognized command
@@ -10,12 +10,16 @@ from dotenv import load_dotenv
 from src.clients.xing_rest import XingRestTrader
 from src.clients.gemini import GeminiAdvisor
 from src.clients.xing_realtime import XingRealtimeClient
+from src.clients.tick_log import TickRecorder
 from src.clients.public_data import PublicDataClient
 from src.clients.brave_search import BraveSearchClient
-from src.utils.helpers import build_futures_cache
+from src.utils.helpers import build_futures_cache, parse_text_update, symbol_master
+from src.utils.startup import StartupTimer
 
 from src.services.alert_monitor import AlertMonitor
 from src.services.scheduler import BotScheduler
+from src.services.dispatcher import UpdateDispatcher
+from src.services.telegram_sender import TelegramSender, PRIORITY_NORMAL
 from src.handlers.commands import CommandHandler
 from src.handlers.nlp_router import NLPRouter
 
@@ -25,31 +29,36 @@ TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN", "REPLACE_ME")
 TELEGRAM_API_URL = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}"
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "REPLACE_ME")
 BRAVE_API_KEY = os.getenv("BRAVE_API_KEY", "")
+BOT_WORKERS = int(os.getenv("BOT_WORKERS", "4"))
+REALTIME_WORKERS = int(os.getenv("REALTIME_WORKERS", "2"))
+REALTIME_LINGER = float(os.getenv("REALTIME_LINGER", "30"))
+REALTIME_CONNECTIONS = int(os.getenv("REALTIME_CONNECTIONS", "1"))
+REALTIME_MAX_PER_CONNECTION = int(os.getenv("REALTIME_MAX_PER_CONNECTION", "0"))  # 0 = no cap
+TICK_LOG_DIR = os.getenv("TICK_LOG_DIR", "")  # set to record every realtime message (replay with src.clients.tick_log)
+BOT_RUNTIME = os.getenv("BOT_RUNTIME", "threaded").lower()  # "threaded" or "async"
+# Webhook mode: set TELEGRAM_WEBHOOK_URL to the public https URL that forwards to the local receiver
+TELEGRAM_WEBHOOK_URL = os.getenv("TELEGRAM_WEBHOOK_URL", "")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8443"))
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+WEBHOOK_CERT = os.getenv("WEBHOOK_CERT", "")
+WEBHOOK_KEY = os.getenv("WEBHOOK_KEY", "")
 
 class BotContext:
     """Shared context passed to handlers and services"""
     def __init__(self):
         self.trader = None
         self.realtime_client = None
+        self.option_chain = None   # ChainSubscriber for /chain, created on first use
         self.public_data = None
         self.brave_client = None
         self.advisor = None
         self.alert_monitor = None
         self.scheduler = None
+        self.dispatcher = None
+        self.sender = TelegramSender(TELEGRAM_API_URL)
 
-    def send_message(self, chat_id, text, parse_mode="Markdown"):
-        try:
-            url = f"{TELEGRAM_API_URL}/sendMessage"
-            payload = {"chat_id": chat_id, "text": text}
-            if parse_mode: payload["parse_mode"] = parse_mode
-            res = requests.post(url, json=payload, timeout=15)
-            data = res.json()
-            if not data.get("ok"):
-                print(f"⚠️ Telegram API Error: {data.get('description')}")
-                if parse_mode is not None and "parse" in data.get("description", "").lower():
-                    self.send_message(chat_id, text, parse_mode=None)
-        except Exception as e:
-            print(f"[Error] sending message: {e}")
+    def send_message(self, chat_id, text, parse_mode="Markdown", priority=PRIORITY_NORMAL):
+        self.sender.send(chat_id, text, parse_mode=parse_mode, priority=priority)
 
 bot_ctx = BotContext()
 command_handler = None
@@ -84,7 +93,11 @@ def run_bot():
             r = requests.get(f"{TELEGRAM_API_URL}/getMe", timeout=10)
             if r.json().get("ok"): print(f"Telegram bot connected: @{r.json()['result'].get('username', '?')}")
         except Exception as e: print(f"Telegram connection check failed: {e}")
-            
+
+    # A registered webhook makes getUpdates fail with 409, so clear it before polling
+    try: requests.post(f"{TELEGRAM_API_URL}/deleteWebhook", timeout=10)
+    except Exception: pass
+
     print("Bot polling started...")
     error_consecutive_cnt = 0
     
@@ -100,12 +113,11 @@ def run_bot():
                     update_id = update["update_id"]
                     if update_id >= offset: offset = update_id + 1
                     
-                    if "message" in update and "text" in update["message"]:
-                        chat_id = update["message"]["chat"]["id"]
-                        text = update["message"]["text"]
-                        user = update["message"]["from"].get("username", "Unknown")
+                    msg = parse_text_update(update)
+                    if msg:
+                        chat_id, text, user = msg
                         print(f"[Msg] {user}: {text}")
-                        threading.Thread(target=handle_incoming_message, args=(chat_id, text)).start()
+                        bot_ctx.dispatcher.submit(chat_id, text)
             else:
                 error_code = data.get("error_code")
                 error_consecutive_cnt += 1
@@ -120,6 +132,23 @@ def run_bot():
             print(f"Polling Network Error: {e}. Retrying in {backoff_time}s...")
             time.sleep(backoff_time)
 
+def run_webhook():
+    from urllib.parse import urlparse
+    from src.services.webhook_server import WebhookServer
+    path = urlparse(TELEGRAM_WEBHOOK_URL).path or "/telegram"
+    server = WebhookServer(bot_ctx.dispatcher.submit, port=WEBHOOK_PORT, path=path, secret_token=WEBHOOK_SECRET,
+                           certfile=WEBHOOK_CERT or None, keyfile=WEBHOOK_KEY or None)
+    server.start()
+    try:
+        payload = {"url": TELEGRAM_WEBHOOK_URL, "allowed_updates": ["message"]}
+        if WEBHOOK_SECRET: payload["secret_token"] = WEBHOOK_SECRET
+        r = requests.post(f"{TELEGRAM_API_URL}/setWebhook", json=payload, timeout=10)
+        print(f"Telegram setWebhook: {r.json().get('description', r.text)}")
+    except Exception as e:
+        print(f"setWebhook failed: {e}")
+    while True:
+        time.sleep(3600)
+
 if __name__ == "__main__":
     _root = os.path.join(os.path.dirname(__file__), "..")
     _pid_file = os.path.abspath(os.path.join(_root, "spk_bot.pid"))
@@ -132,28 +161,40 @@ if __name__ == "__main__":
         except Exception: pass
     atexit.register(_remove_pid)
 
-    # 1. Initialize API Clients into Context
+    startup = StartupTimer()
+
+    # 1. Initialize API Clients into Context (constructors are local; network work runs in parallel)
     print("Initializing API Clients...", flush=True)
-    bot_ctx.trader = XingRestTrader()
-    bot_ctx.trader.get_access_token()
-    build_futures_cache(bot_ctx.trader)
-    
-    bot_ctx.public_data = PublicDataClient()
-    bot_ctx.brave_client = BraveSearchClient(api_key=BRAVE_API_KEY)
-    bot_ctx.advisor = GeminiAdvisor(GEMINI_API_KEY)
-    
-    bot_ctx.realtime_client = XingRealtimeClient()
-    bot_ctx.realtime_client.start()
+    with startup.phase("clients"):
+        bot_ctx.trader = XingRestTrader()
+        bot_ctx.public_data = PublicDataClient()
+        bot_ctx.brave_client = BraveSearchClient(api_key=BRAVE_API_KEY)
+        bot_ctx.advisor = GeminiAdvisor(GEMINI_API_KEY)
+        recorder = TickRecorder(os.path.abspath(TICK_LOG_DIR)) if TICK_LOG_DIR else None
+        bot_ctx.realtime_client = XingRealtimeClient(trader=bot_ctx.trader, workers=REALTIME_WORKERS, linger=REALTIME_LINGER, recorder=recorder,
+                                                     connections=REALTIME_CONNECTIONS, max_per_connection=REALTIME_MAX_PER_CONNECTION)
+    token_thread = startup.run_background("token", bot_ctx.trader.get_access_token)
+    bot_ctx.trader.tokens.start_auto_refresh()
+    with startup.phase("symbol_master"):
+        symbol_master.load()   # yesterday's master is good enough for names until the background refresh lands
 
     # 2. Initialize Services and Handlers
     print("Initializing Services...", flush=True)
-    bot_ctx.alert_monitor = AlertMonitor(bot_ctx)
-    bot_ctx.scheduler = BotScheduler(bot_ctx)
-    command_handler = CommandHandler(bot_ctx)
-    nlp_router = NLPRouter(bot_ctx)
+    with startup.phase("services"):
+        bot_ctx.alert_monitor = AlertMonitor(bot_ctx)
+        bot_ctx.scheduler = BotScheduler(bot_ctx)
+        command_handler = CommandHandler(bot_ctx)
+        nlp_router = NLPRouter(bot_ctx)
+        bot_ctx.dispatcher = UpdateDispatcher(handle_incoming_message, num_workers=BOT_WORKERS)
+
+    # Quotes and orders need the token, so wait for it (bounded) before taking messages
+    with startup.phase("token_wait"):
+        token_thread.join(timeout=15)
 
     # 3. Start Background Threads
     print("Starting Background Threads...")
+    bot_ctx.sender.start()
+    if BOT_RUNTIME != "async": bot_ctx.dispatcher.start()
     threading.Thread(target=bot_ctx.alert_monitor.check_alerts_loop, daemon=True).start()
     threading.Thread(target=bot_ctx.alert_monitor.monitor_guidelines_loop, daemon=True).start()
     threading.Thread(target=bot_ctx.scheduler.run_schedule_loop, daemon=True).start()
@@ -161,11 +202,25 @@ if __name__ == "__main__":
     # 4. Phase 2: Start SPK Shared Data Server (Port 18791)
     try:
         from src.services.data_server import start_shared_data_server
-        from src.utils.helpers import get_price_data
+        from src.utils.helpers import get_price_data, contract_resolver
         print("Starting Shared Data Server for CoreBot (Port 18791)...")
-        start_shared_data_server(lambda code: get_price_data(bot_ctx.trader, code), bot_ctx.trader.get_kospi200_futures_list, port=18791)
+        start_shared_data_server(lambda code: get_price_data(bot_ctx.trader, code), contract_resolver.front_month, port=18791,
+                                 orderbook_func=bot_ctx.trader.last_values.book_metrics)
     except Exception as e:
         print(f"Failed to start Shared Data Server: {e}")
     
-    # 5. Start Polling Loop
-    run_bot()
+    # 5. Deferred, non-critical startup: symbol master refresh and realtime WebSocket load while we already poll
+    startup.run_background("futures_cache", build_futures_cache, bot_ctx.trader)
+    startup.run_background("realtime_connect", bot_ctx.realtime_client.start)
+    startup.ready()
+
+    # 6. Start Polling Loop
+    if BOT_RUNTIME == "async":
+        import asyncio
+        from src.services.async_runtime import AsyncBotRuntime
+        runtime = AsyncBotRuntime(bot_ctx, TELEGRAM_API_URL, command_handler, GEMINI_API_KEY, BRAVE_API_KEY)
+        asyncio.run(runtime.run())
+    elif TELEGRAM_WEBHOOK_URL:
+        run_webhook()
+    else:
+        run_bot()
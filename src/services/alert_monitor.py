@@ -2,7 +2,9 @@ import os
 import json
 import time
 import schedule
-from src.utils.helpers import lookup_name, get_price_data
+from src.utils.helpers import lookup_name, get_price_data_many
+from src.services.telegram_sender import PRIORITY_ALERT
+from src.clients.rate_limiter import call_priority, PRIORITY_ALERT as LS_PRIORITY_ALERT
 
 CONFIG_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "config")
 SUBSCRIBERS_FILE = os.path.join(CONFIG_DIR, "subscribers.json")
@@ -46,17 +48,19 @@ class AlertMonitor:
         """Background function to check active alerts."""
         while True:
             if self.active_alerts:
-                codes_to_check = set(a['code'] for a in self.active_alerts)
+                codes_to_check = list(dict.fromkeys(a['code'] for a in self.active_alerts))
+                try:
+                    with call_priority(LS_PRIORITY_ALERT):
+                        quotes = get_price_data_many(self.bot.trader, codes_to_check)
+                except Exception as e:
+                    print(f"[Alert] Quote fetch failed: {e}")
+                    quotes = {}
                 for code in codes_to_check:
-                    data = get_price_data(self.bot.trader, code)
+                    data = quotes.get(code)
                     if not data: continue
                     
-                    try:
-                        raw_cprice = str(data.get('price', '0')).replace(',', '').strip()
-                        current_price = float(raw_cprice)
-                        if current_price == 0: continue
-                    except Exception as e:
-                        continue
+                    current_price = data.get('price', 0)
+                    if not current_price: continue
 
                     for alert in self.active_alerts[:]: 
                         if alert['code'] == code:
@@ -72,7 +76,7 @@ class AlertMonitor:
                                     f"Current: **{current_price}**\n"
                                     f"Action: **Check Chart / Execute Trade!**"
                                 )
-                                self.bot.send_message(alert['chat_id'], msg)
+                                self.bot.send_message(alert['chat_id'], msg, priority=PRIORITY_ALERT)
                                 self.active_alerts.remove(alert)
                                 self.save_alerts()
             time.sleep(5)
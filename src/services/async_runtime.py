@@ -0,0 +1,164 @@
+import asyncio
+import time
+from collections import deque
+import aiohttp
+
+from src.clients.async_clients import create_session, AsyncXingRestTrader, AsyncGeminiAdvisor, AsyncBraveSearchClient, AsyncPublicDataClient
+from src.handlers.async_nlp_router import AsyncNLPRouter
+from src.utils.helpers import parse_text_update
+
+class AsyncBotRuntime:
+    """
+    Opt-in asyncio runtime (BOT_RUNTIME=async).
+    Long-polls getUpdates on the event loop and runs NLP handlers as coroutines on the async
+    clients, so hundreds of Gemini-bound requests can be in flight without a thread each.
+    Deterministic commands still run on the blocking CommandHandler via asyncio.to_thread.
+    Messages of one chat are handled in order; max_inflight bounds concurrent handlers.
+    """
+    def __init__(self, bot_context, api_url, command_handler, gemini_api_key, brave_api_key, max_inflight=200):
+        self.bot = bot_context
+        self.api_url = api_url
+        self.command_handler = command_handler
+        self.gemini_api_key = gemini_api_key
+        self.brave_api_key = brave_api_key
+        self.max_inflight = max_inflight
+        self.session = None
+        self.trader = None
+        self.advisor = None
+        self.brave_client = None
+        self.public_data = None
+        self.nlp_router = None
+        self._sem = None
+        self._queues = {}   # chat_id -> deque[(enqueued_at, text)]
+        self._tasks = {}    # chat_id -> drain task
+
+        # Counters
+        self.submitted = 0
+        self.processed = 0
+        self.inflight = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    async def _setup(self):
+        self.session = create_session()
+        self._sem = asyncio.Semaphore(self.max_inflight)
+        sync_trader = getattr(self.bot, "trader", None)
+        # Share the blocking trader's token, rate limiter and quote cache so both runtimes count against one LS budget,
+        # and its last values / live bars, which are what the realtime client feeds
+        self.trader = AsyncXingRestTrader(self.session, tokens=sync_trader.tokens if sync_trader else None,
+                                          limiter=sync_trader.limiter if sync_trader else None,
+                                          quote_cache=sync_trader.quote_cache if sync_trader else None,
+                                          last_values=sync_trader.last_values if sync_trader else None,
+                                          live_bars=sync_trader.live_bars if sync_trader else None)
+        await self.trader.get_access_token()
+        self.advisor = AsyncGeminiAdvisor(self.session, self.gemini_api_key)
+        self.brave_client = AsyncBraveSearchClient(self.session, self.brave_api_key)
+        self.public_data = AsyncPublicDataClient(self.session)
+        self.nlp_router = AsyncNLPRouter(self.bot, self)
+
+    def submit(self, chat_id, text):
+        q = self._queues.get(chat_id)
+        if q is None:
+            q = self._queues[chat_id] = deque()
+        q.append((time.monotonic(), text))
+        self.submitted += 1
+        if chat_id not in self._tasks:
+            self._tasks[chat_id] = asyncio.create_task(self._drain_chat(chat_id))
+
+    async def _drain_chat(self, chat_id):
+        q = self._queues[chat_id]
+        try:
+            while q:
+                enqueued_at, text = q.popleft()
+                async with self._sem:
+                    waited = time.monotonic() - enqueued_at
+                    self.wait_total += waited
+                    if waited > self.wait_max: self.wait_max = waited
+                    self.inflight += 1
+                    try:
+                        await self.handle_message(chat_id, text)
+                    finally:
+                        self.inflight -= 1
+                        self.processed += 1
+        finally:
+            del self._queues[chat_id]
+            del self._tasks[chat_id]
+
+    async def handle_message(self, chat_id, text):
+        try:
+            parts = text.split()
+            if not parts: return
+            cmd = parts[0].lower()
+            print(f"[CMD] {cmd} | text={text[:60]}", flush=True)
+
+            # 1. Try Deterministic Commands
+            handled = await asyncio.to_thread(self.command_handler.handle, chat_id, text, cmd, parts)
+
+            # 2. Fallback to NLP Router
+            if not handled:
+                await self.nlp_router.handle(chat_id, text)
+
+        except Exception as e:
+            import traceback; traceback.print_exc()
+            try: self.bot.send_message(chat_id, f"치명적 오류: {e}")
+            except: pass
+
+    def stats(self):
+        return {
+            "inflight": self.inflight,
+            "pending": sum(len(q) for q in self._queues.values()),
+            "chats_active": len(self._tasks),
+            "submitted": self.submitted,
+            "processed": self.processed,
+            "avg_wait_ms": round(self.wait_total / self.processed * 1000, 1) if self.processed else 0.0,
+            "max_wait_ms": round(self.wait_max * 1000, 1),
+        }
+
+    async def poll_loop(self):
+        offset = 0
+        error_consecutive_cnt = 0
+        # A registered webhook makes getUpdates fail with 409, so clear it before polling
+        try:
+            async with self.session.post(f"{self.api_url}/deleteWebhook", timeout=aiohttp.ClientTimeout(total=10)): pass
+        except Exception: pass
+        print("Bot polling started (asyncio runtime)...")
+
+        while True:
+            try:
+                payload = {"offset": offset, "timeout": 30, "allowed_updates": ["message"]}
+                async with self.session.post(f"{self.api_url}/getUpdates", json=payload, timeout=aiohttp.ClientTimeout(total=40)) as response:
+                    data = await response.json(content_type=None)
+
+                if data.get("ok"):
+                    error_consecutive_cnt = 0
+                    for update in data.get("result", []):
+                        update_id = update["update_id"]
+                        if update_id >= offset: offset = update_id + 1
+
+                        msg = parse_text_update(update)
+                        if msg:
+                            chat_id, text, user = msg
+                            print(f"[Msg] {user}: {text}")
+                            self.submit(chat_id, text)
+                else:
+                    error_code = data.get("error_code")
+                    error_consecutive_cnt += 1
+                    backoff_time = min(5 * (2 ** (error_consecutive_cnt - 1)), 600)
+                    if error_code == 409: print(f"⚠️ [409 Conflict] Another bot instance is stealing updates. Sleeping for {backoff_time}s...")
+                    else: print(f"⚠️ API Error backing off for {backoff_time}s...")
+                    await asyncio.sleep(backoff_time)
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                error_consecutive_cnt += 1
+                backoff_time = min(5 * (2 ** (error_consecutive_cnt - 1)), 300)
+                print(f"Polling Network Error: {e}. Retrying in {backoff_time}s...")
+                await asyncio.sleep(backoff_time)
+
+    async def run(self):
+        await self._setup()
+        try:
+            await self.poll_loop()
+        finally:
+            await self.session.close()
@@ -2,10 +2,12 @@ import threading
 import time
 import json
 from http.server import HTTPServer, BaseHTTPRequestHandler
+from src.clients.rate_limiter import call_priority, PRIORITY_BACKGROUND
 
 # Global reference to main.py's helper
 _get_price_data_func = None
-_get_futures_func = None
+_get_main_future_func = None
+_get_orderbook_func = None
 
 class DataCacheHandler(BaseHTTPRequestHandler):
     def log_message(self, format, *args):
@@ -25,6 +27,11 @@ class DataCacheHandler(BaseHTTPRequestHandler):
         self.send_header('Content-type', 'application/json')
         self.end_headers()
 
+        with call_priority(PRIORITY_BACKGROUND):
+            response_data = self._collect()
+        self.wfile.write(json.dumps(response_data).encode('utf-8'))
+
+    def _collect(self):
         response_data = {}
         
         try:
@@ -34,35 +41,44 @@ class DataCacheHandler(BaseHTTPRequestHandler):
                 if s_px:
                     response_data["005930"] = {
                         "price": s_px.get('price'),
-                        "change": s_px.get('change', '0'),
+                        "change": s_px.get('change', 0),
                         "type": "Stock",
                         "name": "삼성전자"
                     }
                     
                 # 2. Fetch KOSPI 200 Futures (Active Month)
-                if _get_futures_func:
-                    f_list = _get_futures_func()
-                    if f_list:
-                        main_f = f_list[0].get('shcode')
+                if _get_main_future_func:
+                    front = _get_main_future_func()
+                    if front:
+                        main_f = front.get('shcode')
                         if main_f:
                             f_px = _get_price_data_func(main_f)
                             if f_px:
+                                # Live FH0 book metrics when streaming; the REST fallback has no orderbook (short of t8411)
+                                book = _get_orderbook_func(main_f) if _get_orderbook_func else None
                                 response_data[main_f] = {
                                     "price": f_px.get('price'),
-                                    "bid": f_px.get('price'), # REST Fallback doesn't easily return orderbook unless t8411 is used
-                                    "ask": f_px.get('price'),
+                                    "bid": book.best_bid if book else f_px.get('price'),
+                                    "ask": book.best_ask if book else f_px.get('price'),
+                                    "spread": book.spread if book else None,
+                                    "microprice": book.microprice if book else None,
+                                    "imbalance": book.imbalance if book else None,
                                     "type": "Futures",
-                                    "name": f_list[0].get('hname', 'KOSPI200 선물')
+                                    "name": front.get('hname') or 'KOSPI200 선물'
                                 }
         except Exception as e:
             print(f"[SharedCache] Error fetching fallback REST data: {e}")
+        return response_data
 
-        self.wfile.write(json.dumps(response_data).encode('utf-8'))
-
-def start_shared_data_server(price_func, futures_list_func, port=18791):
-    global _get_price_data_func, _get_futures_func
+def start_shared_data_server(price_func, main_future_func, port=18791, orderbook_func=None):
+    """
+    main_future_func() returns the front-month symbol master record (shcode, hname) or None;
+    orderbook_func(code) returns live BookMetrics (best_bid/best_ask/spread/microprice/imbalance) or None.
+    """
+    global _get_price_data_func, _get_main_future_func, _get_orderbook_func
     _get_price_data_func = price_func
-    _get_futures_func = futures_list_func
+    _get_main_future_func = main_future_func
+    _get_orderbook_func = orderbook_func
     
     def run_server():
         try:
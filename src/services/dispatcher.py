@@ -0,0 +1,115 @@
+import threading
+import queue
+import time
+from collections import deque
+
+class UpdateDispatcher:
+    """
+    Fixed-size worker pool for incoming Telegram updates.
+    Each chat has its own FIFO queue and is handled by at most one worker at a time,
+    so a chat's messages run in order while different chats run in parallel.
+    """
+    def __init__(self, handler, num_workers=4, max_queue_per_chat=20):
+        self.handler = handler
+        self.num_workers = max(1, int(num_workers))
+        self.max_queue_per_chat = max_queue_per_chat
+        self._lock = threading.Lock()
+        self._queues = {}         # chat_id -> deque[(enqueued_at, args)]
+        self._scheduled = set()   # chat_ids waiting in _ready or being handled by a worker
+        self._ready = queue.Queue()
+        self._workers = []
+
+        # Counters
+        self.submitted = 0
+        self.processed = 0
+        self.dropped = 0
+        self.failed = 0
+        self.pending = 0
+        self.max_pending = 0
+        self.busy = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def start(self):
+        if self._workers: return
+        for i in range(self.num_workers):
+            t = threading.Thread(target=self._worker_loop, name=f"dispatch-{i}", daemon=True)
+            t.start()
+            self._workers.append(t)
+        print(f"[Dispatcher] Started {self.num_workers} workers (max {self.max_queue_per_chat} queued per chat)")
+
+    def stop(self, timeout=5):
+        for _ in self._workers:
+            self._ready.put(None)
+        for t in self._workers:
+            t.join(timeout=timeout)
+        self._workers = []
+
+    def submit(self, chat_id, *args):
+        """Queue an update for chat_id. Returns False if that chat's queue is full."""
+        with self._lock:
+            q = self._queues.get(chat_id)
+            if q is None:
+                q = self._queues[chat_id] = deque()
+            if len(q) >= self.max_queue_per_chat:
+                self.dropped += 1
+                print(f"⚠️ [Dispatcher] Queue full for chat {chat_id}, dropping update.")
+                return False
+            q.append((time.monotonic(), args))
+            self.submitted += 1
+            self.pending += 1
+            if self.pending > self.max_pending: self.max_pending = self.pending
+            if chat_id not in self._scheduled:
+                self._scheduled.add(chat_id)
+                self._ready.put(chat_id)
+        return True
+
+    def _worker_loop(self):
+        while True:
+            chat_id = self._ready.get()
+            if chat_id is None: return
+
+            with self._lock:
+                enqueued_at, args = self._queues[chat_id].popleft()
+                self.pending -= 1
+                self.busy += 1
+                waited = time.monotonic() - enqueued_at
+                self.wait_total += waited
+                if waited > self.wait_max: self.wait_max = waited
+
+            failed = False
+            try:
+                self.handler(chat_id, *args)
+            except Exception as e:
+                failed = True
+                print(f"[Dispatcher] Handler error for chat {chat_id}: {e}")
+
+            with self._lock:
+                self.busy -= 1
+                self.processed += 1
+                if failed: self.failed += 1
+                if self._queues[chat_id]:
+                    # Go to the back of the line so one busy chat can't starve the others
+                    self._ready.put(chat_id)
+                else:
+                    del self._queues[chat_id]
+                    self._scheduled.discard(chat_id)
+
+    def stats(self):
+        with self._lock:
+            depths = {chat_id: len(q) for chat_id, q in self._queues.items() if q}
+            started = self.processed + self.busy
+            return {
+                "workers": self.num_workers,
+                "busy": self.busy,
+                "pending": self.pending,
+                "max_pending": self.max_pending,
+                "chats_queued": len(depths),
+                "max_chat_depth": max(depths.values()) if depths else 0,
+                "submitted": self.submitted,
+                "processed": self.processed,
+                "failed": self.failed,
+                "dropped": self.dropped,
+                "avg_wait_ms": round(self.wait_total / started * 1000, 1) if started else 0.0,
+                "max_wait_ms": round(self.wait_max * 1000, 1),
+            }
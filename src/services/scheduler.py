@@ -2,8 +2,10 @@ import os
 import json
 import time
 import schedule
-from src.utils.helpers import get_price_data
+from src.utils.helpers import get_price_data, build_futures_cache, contract_resolver
 from src.clients.public_data import PublicDataClient
+from src.services.telegram_sender import PRIORITY_BULK
+from src.clients.rate_limiter import call_priority, PRIORITY_BACKGROUND
 
 CONFIG_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "config")
 SUBSCRIBERS_FILE = os.path.join(CONFIG_DIR, "subscribers.json")
@@ -23,6 +25,10 @@ class BotScheduler:
             json.dump(subs, f, ensure_ascii=False, indent=4)
 
     def job_morning_report(self, is_open=False):
+        with call_priority(PRIORITY_BACKGROUND):
+            self._morning_report(is_open)
+
+    def _morning_report(self, is_open):
         print(f"⏰ Running Scheduled Report (is_open={is_open})...")
         subs = self.load_subscribers()
         if not subs: return
@@ -35,9 +41,8 @@ class BotScheduler:
                 live_msg = ""
                 try:
                     from datetime import datetime
-                    f_list = self.bot.trader.get_kospi200_futures_list()
-                    if f_list:
-                        main_f = f_list[0].get('shcode')
+                    main_f = contract_resolver.main_kospi200_future()
+                    if main_f:
                         f_px = get_price_data(self.bot.trader, main_f)
                         if f_px and f_px.get('price'): live_msg += f"- 코스피200 선물({main_f}): {f_px['price']}\n"
                     s_px = get_price_data(self.bot.trader, "005930")
@@ -57,13 +62,14 @@ class BotScheduler:
                 title = "🌅 **[Unified Operations] 장전 포지션 시나리오 보고서 (v1.3.0)**" if is_open else "🌃 **[Unified Operations] 야간 장 마무리 분석 리포트 (v1.3.0)**"
                 report_msg = (f"{title}\n\n📝 설정 포지션: `{position}`\n\nAI가 'Strategic Operations' 모드로 분석 중입니다. (1분 소요)")
                 
-                self.bot.send_message(chat_id_str, report_msg)
+                self.bot.send_message(chat_id_str, report_msg, priority=PRIORITY_BULK)
                 reply = self.bot.advisor.get_portfolio_strategy(user_portfolio_text=position, market_context=market_context)
-                self.bot.send_message(chat_id_str, reply)
+                self.bot.send_message(chat_id_str, reply, priority=PRIORITY_BULK)
             except Exception as e:
                 print(f"Error sending scheduled report to {chat_id_str}: {e}")
 
     def run_schedule_loop(self):
+        schedule.every().day.at("07:30").do(build_futures_cache, self.bot.trader)   # daily symbol master refresh
         schedule.every().day.at("05:00").do(self.job_morning_report, is_open=False)
         schedule.every().day.at("08:50").do(self.job_morning_report, is_open=True)
         
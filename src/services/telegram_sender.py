@@ -0,0 +1,187 @@
+import threading
+import time
+from collections import deque
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.utils.token_bucket import TokenBucket
+
+# Priority lanes (lower value goes first)
+PRIORITY_ALERT = 0    # AlertMonitor triggers, order results
+PRIORITY_NORMAL = 1   # Interactive replies
+PRIORITY_BULK = 2     # Scheduled broadcasts, long AI reports
+
+class _Outgoing:
+    __slots__ = ("chat_id", "text", "parse_mode", "priority", "enqueued_at", "attempts")
+
+    def __init__(self, chat_id, text, parse_mode, priority):
+        self.chat_id = chat_id
+        self.text = text
+        self.parse_mode = parse_mode
+        self.priority = priority
+        self.enqueued_at = time.monotonic()
+        self.attempts = 0
+
+class TelegramSender:
+    """
+    Outbound Telegram message queue served by a single background thread.
+    Reuses one keep-alive session and respects Telegram's limits with a global
+    (~30 msg/s) and per-chat (~1 msg/s) token bucket. Messages for the same chat
+    keep their order within a priority lane; higher lanes may overtake.
+    """
+    def __init__(self, api_url, global_rate=30, per_chat_rate=1, per_chat_burst=3, max_attempts=3):
+        self.api_url = api_url
+        self.per_chat_rate = per_chat_rate
+        self.per_chat_burst = per_chat_burst
+        self.max_attempts = max_attempts
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=2))
+        self._global = TokenBucket(global_rate)
+        self._chats = {}   # chat_id -> TokenBucket
+        self._lanes = [deque(), deque(), deque()]
+        self._cond = threading.Condition()
+        self._blocked_until = 0.0   # set by 429 retry_after
+        self._running = False
+        self._thread = None
+
+        # Counters
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.throttled = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.send_total = 0.0
+
+    def start(self):
+        if self._running: return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="telegram-sender", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+
+    def send(self, chat_id, text, parse_mode="Markdown", priority=PRIORITY_NORMAL):
+        """Queue a message. Returns immediately."""
+        priority = min(max(int(priority), PRIORITY_ALERT), PRIORITY_BULK)
+        with self._cond:
+            self._lanes[priority].append(_Outgoing(chat_id, text, parse_mode, priority))
+            self._cond.notify()
+
+    def backlog(self):
+        with self._cond:
+            return sum(len(lane) for lane in self._lanes)
+
+    def _pick(self, now):
+        """Pop the first sendable message. Returns (msg, 0) or (None, seconds_to_wait)."""
+        wait = max(self._global.delay(now), self._blocked_until - now)
+        if wait > 0: return None, wait
+
+        wait = None
+        for lane in self._lanes:
+            skipped = set()
+            for idx, msg in enumerate(lane):
+                if msg.chat_id in skipped: continue
+                bucket = self._chats.get(msg.chat_id)
+                if bucket is None:
+                    bucket = self._chats[msg.chat_id] = TokenBucket(self.per_chat_rate, self.per_chat_burst)
+                chat_wait = bucket.try_acquire(now)
+                if chat_wait == 0:
+                    self._global.try_acquire(now)
+                    del lane[idx]
+                    return msg, 0
+                # Keep per-chat order: nothing behind this message for the same chat may go first
+                skipped.add(msg.chat_id)
+                wait = chat_wait if wait is None else min(wait, chat_wait)
+        return None, wait
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    if not self._running: return
+                    if not any(self._lanes):
+                        self._prune_buckets()
+                        self._cond.wait()
+                        continue
+                    msg, wait = self._pick(time.monotonic())
+                    if msg: break
+                    self.throttled += 1
+                    self._cond.wait(timeout=wait)
+            self._deliver(msg)
+
+    def _prune_buckets(self):
+        now = time.monotonic()
+        for chat_id in [c for c, b in self._chats.items() if b.idle(now)]:
+            del self._chats[chat_id]
+
+    def _requeue(self, msg):
+        with self._cond:
+            self._lanes[msg.priority].appendleft(msg)
+            self._cond.notify()
+
+    def _deliver(self, msg):
+        msg.attempts += 1
+        payload = {"chat_id": msg.chat_id, "text": msg.text}
+        if msg.parse_mode: payload["parse_mode"] = msg.parse_mode
+        t0 = time.monotonic()
+        try:
+            res = self.session.post(f"{self.api_url}/sendMessage", json=payload, timeout=15)
+            data = res.json()
+        except Exception as e:
+            self.send_total += time.monotonic() - t0
+            print(f"[Error] sending message: {e}")
+            if msg.attempts < self.max_attempts:
+                self.retried += 1
+                self._requeue(msg)
+            else:
+                self.failed += 1
+            return
+        self.send_total += time.monotonic() - t0
+
+        if data.get("ok"):
+            self.sent += 1
+            latency = time.monotonic() - msg.enqueued_at
+            self.latency_total += latency
+            if latency > self.latency_max: self.latency_max = latency
+            return
+
+        description = data.get("description", "")
+        if data.get("error_code") == 429 and msg.attempts < self.max_attempts:
+            retry_after = data.get("parameters", {}).get("retry_after", 1)
+            print(f"⚠️ Telegram rate limit hit, retrying after {retry_after}s")
+            with self._cond:
+                self._blocked_until = time.monotonic() + retry_after
+            self.retried += 1
+            self._requeue(msg)
+        elif msg.parse_mode is not None and "parse" in description.lower():
+            # Markdown rejected: resend the same text as plain text
+            msg.parse_mode = None
+            self.retried += 1
+            self._requeue(msg)
+        else:
+            self.failed += 1
+            print(f"⚠️ Telegram API Error: {description}")
+
+    def stats(self):
+        with self._cond:
+            lanes = [len(lane) for lane in self._lanes]
+        attempts = self.sent + self.failed + self.retried
+        return {
+            "backlog": sum(lanes),
+            "backlog_alert": lanes[PRIORITY_ALERT],
+            "backlog_normal": lanes[PRIORITY_NORMAL],
+            "backlog_bulk": lanes[PRIORITY_BULK],
+            "sent": self.sent,
+            "failed": self.failed,
+            "retried": self.retried,
+            "throttled": self.throttled,
+            "avg_latency_ms": round(self.latency_total / self.sent * 1000, 1) if self.sent else 0.0,
+            "max_latency_ms": round(self.latency_max * 1000, 1),
+            "avg_send_ms": round(self.send_total / attempts * 1000, 1) if attempts else 0.0,
+        }
@@ -0,0 +1,102 @@
+import threading
+import json
+import ssl
+from collections import deque
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from src.utils.helpers import parse_text_update
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+class UpdateDeduper:
+    """Remembers the last `size` update_ids so Telegram redeliveries are handled once."""
+    def __init__(self, size=2048):
+        self._seen = set()
+        self._order = deque()
+        self._size = size
+        self._lock = threading.Lock()
+
+    def first_time(self, update_id):
+        with self._lock:
+            if update_id in self._seen: return False
+            self._seen.add(update_id)
+            self._order.append(update_id)
+            if len(self._order) > self._size:
+                self._seen.discard(self._order.popleft())
+            return True
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass # Suppress HTTP logs to keep bot console clean
+
+    def _reply(self, status):
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_POST(self):
+        srv = self.server.webhook
+        if self.path != srv.path:
+            return self._reply(404)
+        if srv.secret_token and self.headers.get(SECRET_HEADER) != srv.secret_token:
+            srv.rejected += 1
+            return self._reply(403)
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            update = json.loads(self.rfile.read(length))
+            update_id = update["update_id"]
+        except Exception:
+            return self._reply(400)
+
+        # Acknowledge immediately; handling happens on the dispatcher's workers
+        self._reply(200)
+        if not srv.deduper.first_time(update_id):
+            srv.duplicates += 1
+            return
+        srv.received += 1
+        msg = parse_text_update(update)
+        if msg:
+            chat_id, text, user = msg
+            print(f"[Msg] {user}: {text}")
+            srv.submit(chat_id, text)
+
+class WebhookServer:
+    """
+    Local HTTP(S) receiver for Telegram webhook updates.
+    Validates the secret token, drops duplicate update_ids and hands text messages to `submit(chat_id, text)`.
+    """
+    def __init__(self, submit, host="0.0.0.0", port=8443, path="/telegram", secret_token="", certfile=None, keyfile=None):
+        self.submit = submit
+        self.host = host
+        self.port = port
+        self.path = path
+        self.secret_token = secret_token
+        self.certfile = certfile
+        self.keyfile = keyfile
+        self.deduper = UpdateDeduper()
+        self.httpd = None
+        self.received = 0
+        self.duplicates = 0
+        self.rejected = 0
+
+    def start(self):
+        """Bind and serve in a background thread. Returns the bound port."""
+        self.httpd = ThreadingHTTPServer((self.host, self.port), WebhookHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.webhook = self
+        if self.certfile:
+            ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            ctx.load_cert_chain(self.certfile, self.keyfile)
+            self.httpd.socket = ctx.wrap_socket(self.httpd.socket, server_side=True)
+        self.port = self.httpd.server_address[1]
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        print(f"✅ Webhook receiver listening on {'https' if self.certfile else 'http'}://{self.host}:{self.port}{self.path}")
+        return self.port
+
+    def stop(self):
+        if self.httpd:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+
+    def stats(self):
+        return {"received": self.received, "duplicates": self.duplicates, "rejected": self.rejected}
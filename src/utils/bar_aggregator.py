@@ -0,0 +1,149 @@
+import threading
+import time
+from array import array
+from datetime import datetime
+
+from src.clients.records import Tick
+from src.utils.symbol_master import KST
+
+EXECUTION_TRS = ("FC0", "OC0")
+DEFAULT_INTERVALS = (1, 60, 300)   # seconds: 1s, 1m, 5m
+
+def _label(epoch):
+    return int(datetime.fromtimestamp(epoch, KST).strftime("%Y%m%d%H%M%S"))
+
+class BarRing:
+    """Fixed-capacity ring of closed bars in array columns; the oldest bar is overwritten when full."""
+    __slots__ = ("capacity", "head", "size", "ts", "open", "high", "low", "close", "volume", "vwap")
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.head = 0   # next write position
+        self.size = 0
+        self.ts, self.volume = array("q", bytes(8 * capacity)), array("q", bytes(8 * capacity))
+        self.open, self.high, self.low, self.close, self.vwap = (array("d", bytes(8 * capacity)) for _ in range(5))
+
+    def append(self, ts, o, h, l, c, v, vwap):
+        i = self.head
+        self.ts[i], self.open[i], self.high[i], self.low[i], self.close[i], self.volume[i], self.vwap[i] = ts, o, h, l, c, v, vwap
+        self.head = (i + 1) % self.capacity
+        if self.size < self.capacity: self.size += 1
+
+    def __len__(self):
+        return self.size
+
+    def last(self, n=None):
+        """Up to n most recent bars, oldest first, as (ts, open, high, low, close, volume, vwap)."""
+        n = self.size if n is None else min(n, self.size)
+        start = (self.head - n) % self.capacity
+        idx = [(start + k) % self.capacity for k in range(n)]
+        return [(self.ts[i], self.open[i], self.high[i], self.low[i], self.close[i], self.volume[i], self.vwap[i]) for i in idx]
+
+class StreamingBars:
+    """
+    OHLCV + VWAP bars built in place from realtime executions (FC0/OC0), for every interval at once.
+    Each (code, interval) has one forming bar and a BarRing of closed ones. A bar closes when the first
+    tick of a later bucket arrives; listeners registered with on_close(fn) get fn(code, interval, bar).
+    Buckets are aligned to the exchange time in the tick (chetime), falling back to the receive time.
+    """
+    def __init__(self, intervals=DEFAULT_INTERVALS, capacity=1000):
+        self.intervals = tuple(intervals)
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._forming = {}   # (code, interval) -> [bucket, open, high, low, close, volume, price*volume]
+        self._rings = {}     # (code, interval) -> BarRing
+        self._listeners = []
+        self._day_start = 0.0
+        self._day_end = 0.0
+        self.ticks = 0
+        self.closed = 0
+
+    def on_close(self, listener):
+        self._listeners.append(listener)
+
+    def _exchange_epoch(self, hhmmss, now):
+        """Epoch seconds of an HHMMSS exchange time on the receive day (KST)."""
+        if not (self._day_start <= now < self._day_end):
+            day = datetime.fromtimestamp(now, KST).date()
+            self._day_start = datetime(day.year, day.month, day.day, tzinfo=KST).timestamp()
+            self._day_end = self._day_start + 86400
+        if len(hhmmss) < 6 or not hhmmss[:6].isdigit(): return now
+        ts = self._day_start + int(hhmmss[:2]) * 3600 + int(hhmmss[2:4]) * 60 + int(hhmmss[4:6])
+        # a 23:59:59 print received just after midnight belongs to the previous day (and vice versa)
+        if ts - now > 43200: ts -= 86400
+        elif now - ts > 43200: ts += 86400
+        return ts
+
+    def on_message(self, tr_cd, tr_key, body):
+        """
+        Dispatcher callback for FC0/OC0, reusing the Tick XingRealtimeClient.feed() parsed (_tick).
+        A replayed message's recorded receive time (_received_at) sets the day.
+        """
+        if tr_cd not in EXECUTION_TRS: return
+        tick = body.get("_tick") or Tick.from_ls(body)
+        if not tick.price: return
+        now = body.get("_received_at") or time.time()
+        self.on_tick(tr_key or tick.code, tick.price, tick.volume, self._exchange_epoch(str(tick.time), now))
+
+    def on_tick(self, code, price, volume, ts):
+        closed = []
+        with self._lock:
+            self.ticks += 1
+            for interval in self.intervals:
+                key = (code, interval)
+                bucket = ts - ts % interval
+                bar = self._forming.get(key)
+                if bar is not None and bucket > bar[0]:
+                    closed.append((key, self._close(key, bar)))
+                    bar = None
+                if bar is None:
+                    self._forming[key] = [bucket, price, price, price, price, volume, price * volume]
+                    continue
+                # same bucket (or a late tick for it): update in place
+                if price > bar[2]: bar[2] = price
+                if price < bar[3]: bar[3] = price
+                bar[4] = price
+                bar[5] += volume
+                bar[6] += price * volume
+        for (code_, interval), bar in closed:
+            for listener in self._listeners:
+                try:
+                    listener(code_, interval, bar)
+                except Exception as e:
+                    print(f"[Bars] Listener error: {e}")
+
+    def _close(self, key, bar):
+        bucket, o, h, l, c, v, pv = bar
+        closed = (_label(bucket), o, h, l, c, v, pv / v if v else c)
+        ring = self._rings.get(key)
+        if ring is None:
+            ring = self._rings[key] = BarRing(self.capacity)
+        ring.append(*closed)
+        self.closed += 1
+        return closed
+
+    def forming(self, code, interval):
+        """The in-progress bar (ts, open, high, low, close, volume, vwap) or None."""
+        with self._lock:
+            bar = self._forming.get((code, interval))
+            if bar is None: return None
+            bucket, o, h, l, c, v, pv = bar
+            return (_label(bucket), o, h, l, c, v, pv / v if v else c)
+
+    def bars(self, code, interval, count=None, include_forming=False):
+        """Last `count` closed bars (oldest first), optionally followed by the forming one."""
+        with self._lock:
+            ring = self._rings.get((code, interval))
+            out = ring.last(count) if ring else []
+        if include_forming:
+            bar = self.forming(code, interval)
+            if bar: out = (out + [bar])[-count:] if count else out + [bar]
+        return out
+
+    def codes(self):
+        with self._lock:
+            return sorted({code for code, _ in self._forming})
+
+    def stats(self):
+        with self._lock:
+            return {"symbols": len({code for code, _ in self._forming}), "ticks": self.ticks, "closed": self.closed}
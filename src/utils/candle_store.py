@@ -0,0 +1,182 @@
+import os
+import mmap
+import time
+import struct
+import threading
+
+from src.clients.records import Bar
+
+# One bar = ts (YYYYMMDDHHMMSS), open, high, low, close, volume. Files are append-only arrays of these.
+RECORD = struct.Struct("<qddddq")
+
+CHART_TRS = {"stock_daily": "t4201", "stock_minute": "t4203", "futures_minute": "t8413"}
+
+def bar_from_row(row):
+    """LS chart row (t4201/t4203/t8413 OutBlock1) -> (ts, open, high, low, close, volume)."""
+    return Bar.from_ls(row).astuple()
+
+def row_from_bar(bar, with_time=True):
+    """Inverse of bar_from_row, in the field names the prompts already use."""
+    ts = str(bar[0])
+    row = {"date": ts[:8]}
+    if with_time: row["time"] = ts[8:]
+    row.update({"open": bar[1], "high": bar[2], "low": bar[3], "close": bar[4], "jdiff_vol": bar[5]})
+    return row
+
+class CandleStore:
+    """
+    On-disk OHLCV store, one fixed-width binary file per (code, TR, interval).
+    Only bars newer than the last stored one are fetched (the last bar is rewritten, since it may have
+    been in progress); reads binary-search a memory-mapped view of the file.
+    """
+    DAILY_FRESH_SECONDS = 300
+
+    def __init__(self, root):
+        self.root = root
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._synced = {}   # key -> monotonic time of the last successful sync
+        self.fetches = 0   # TR replies stored
+        self.failed = 0    # TR syncs that got no reply (the stored bars are served instead)
+        self.served_from_disk = 0
+
+    @staticmethod
+    def key(kind, code, interval=1):
+        return f"{code}_{CHART_TRS[kind]}_{'D' if kind == 'stock_daily' else interval}"
+
+    def _path(self, key):
+        return os.path.join(self.root, f"{key}.bin")
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.RLock())
+
+    # --- storage -----------------------------------------------------------------
+
+    def count(self, key):
+        try:
+            return os.path.getsize(self._path(key)) // RECORD.size
+        except OSError:
+            return 0
+
+    def _read(self, key, start_index, end_index):
+        path = self._path(key)
+        if end_index <= start_index: return []
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return [RECORD.unpack_from(mm, i * RECORD.size) for i in range(start_index, end_index)]
+
+    def _lower_bound(self, mm, n, ts):
+        lo, hi = 0, n
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if RECORD.unpack_from(mm, mid * RECORD.size)[0] < ts: lo = mid + 1
+            else: hi = mid
+        return lo
+
+    def range(self, key, start=None, end=None):
+        """Bars with start <= ts <= end (YYYYMMDDHHMMSS ints, either bound optional), oldest first."""
+        with self._key_lock(key):
+            n = self.count(key)
+            if n == 0: return []
+            with open(self._path(key), "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                lo = self._lower_bound(mm, n, start) if start is not None else 0
+                hi = self._lower_bound(mm, n, end + 1) if end is not None else n
+                return [RECORD.unpack_from(mm, i * RECORD.size) for i in range(lo, hi)]
+
+    def tail(self, key, n):
+        with self._key_lock(key):
+            total = self.count(key)
+            return self._read(key, max(0, total - n), total) if total else []
+
+    def last_ts(self, key):
+        last = self.tail(key, 1)
+        return last[0][0] if last else None
+
+    def write(self, key, bars):
+        """Merge bars (any order) into the store: appends in the common case, rewrites on backfill."""
+        if not bars: return
+        bars = sorted(bars)
+        with self._key_lock(key):
+            os.makedirs(self.root, exist_ok=True)
+            path = self._path(key)
+            n = self.count(key)
+            last = self._read(key, n - 1, n)[0][0] if n else None
+            if last is None or bars[0][0] >= last:
+                with open(path, "r+b" if n else "wb") as f:
+                    if last is not None and bars[0][0] == last:
+                        f.seek((n - 1) * RECORD.size)   # the stored last bar was still forming
+                    else:
+                        f.seek(n * RECORD.size)
+                    for bar in bars:
+                        f.write(RECORD.pack(*bar))
+                return
+            merged = {bar[0]: bar for bar in self._read(key, 0, n)}
+            merged.update((bar[0], bar) for bar in bars)
+            tmp = path + ".tmp"
+            with open(tmp, "wb") as f:
+                for ts in sorted(merged):
+                    f.write(RECORD.pack(*merged[ts]))
+            os.replace(tmp, path)
+
+    # --- chart access ---------------------------------------------------------------
+
+    def _plan(self, key, kind, interval, count):
+        """None if the stored bars can be served as-is, else fetch kwargs (max_rows / since)."""
+        stored = self.count(key)
+        if stored < count:
+            return {"max_rows": count}
+        fresh = self.DAILY_FRESH_SECONDS if kind == "stock_daily" else interval * 60
+        synced = self._synced.get(key)
+        if synced is not None and time.monotonic() - synced < fresh:
+            return None
+        return {"since": str(self.last_ts(key))[:8]}
+
+    def _params(self, kind, interval):
+        return {} if kind == "stock_daily" else {"ncnt": interval}
+
+    def _store_rows(self, key, rows, plan):
+        if rows is None:
+            self.failed += 1
+            return
+        self.fetches += 1
+        bars = [bar_from_row(r) for r in rows if r.get("date")]
+        if "since" in plan:
+            # `since` is a date, so the reply repeats the stored part of that day; keeping only the
+            # last stored bar onwards lets write() append instead of rewriting the whole series
+            last = self.last_ts(key)
+            bars = [bar for bar in bars if bar[0] >= last]
+        self.write(key, bars)
+        self._synced[key] = time.monotonic()
+
+    def _rows(self, key, kind, count):
+        return [row_from_bar(bar, with_time=kind != "stock_daily") for bar in self.tail(key, count)]
+
+    def sync(self, trader, kind, code, interval=1, count=10):
+        """Make sure the store holds the last `count` bars, fetching only what it lacks. Returns the series key."""
+        key = self.key(kind, code, interval)
+        plan = self._plan(key, kind, interval, count)
+        if plan is None:
+            self.served_from_disk += 1
+        else:
+            self._store_rows(key, trader.fetch_tr(CHART_TRS[kind], code, **plan, **self._params(kind, interval)), plan)
+        return key
+
+    async def sync_async(self, trader, kind, code, interval=1, count=10):
+        """sync() for AsyncXingRestTrader."""
+        key = self.key(kind, code, interval)
+        plan = self._plan(key, kind, interval, count)
+        if plan is None:
+            self.served_from_disk += 1
+        else:
+            self._store_rows(key, await trader.fetch_tr(CHART_TRS[kind], code, **plan, **self._params(kind, interval)), plan)
+        return key
+
+    def bars(self, trader, kind, code, interval=1, count=10):
+        """Last `count` bars as LS-style rows (oldest first)."""
+        return self._rows(self.sync(trader, kind, code, interval, count), kind, count)
+
+    async def bars_async(self, trader, kind, code, interval=1, count=10):
+        return self._rows(await self.sync_async(trader, kind, code, interval, count), kind, count)
+
+    def stats(self):
+        return {"fetches": self.fetches, "failed": self.failed, "served_from_disk": self.served_from_disk, "series": len(self._synced)}
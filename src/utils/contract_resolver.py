@@ -0,0 +1,102 @@
+import threading
+from datetime import date, datetime, timedelta
+
+from src.utils.symbol_master import KST
+
+WEEKLY_EXPIRY_WEEKDAYS = {0: "MON", 3: "THU"}   # KOSPI200 weekly options (Monday and Thursday series)
+
+def _today():
+    return datetime.now(KST).date()
+
+def second_thursday(year, month):
+    first = date(year, month, 1)
+    return first + timedelta(days=(3 - first.weekday()) % 7 + 7)
+
+def expiry_date(yyyymm):
+    """KRX monthly derivatives expire on the second Thursday of the month (holiday shifts are not modelled)."""
+    return second_thursday(int(yyyymm[:4]), int(yyyymm[4:6]))
+
+def _is_main_kospi200(record):
+    # 101xxxxx (old codes) / A01xxxxx (new codes): regular KOSPI200 futures, not mini (105 / A05) or spreads
+    return record["shcode"][1:3] == "01"
+
+class ContractResolver:
+    """
+    Front-month / next-month lookup on top of the SymbolMaster, with no network calls.
+    The (front, next) pair per underlying is cached until the front month's roll date
+    (expiry minus `roll_days`) or until the master is refreshed, so repeat lookups are O(1).
+    """
+    def __init__(self, master, roll_days=0):
+        self.master = master
+        self.roll_days = roll_days
+        self._lock = threading.Lock()
+        self._cache = {}   # underlying -> (master version, front, next, valid_until)
+
+    def _roll_date(self, record):
+        return expiry_date(record["expiry"]) - timedelta(days=self.roll_days)
+
+    def _chain(self, underlying, today):
+        version = self.master.version
+        with self._lock:
+            cached = self._cache.get(underlying)
+            if cached and cached[0] == version and today <= cached[3]:
+                return cached[1], cached[2]
+
+        records = [r for r in self.master.by_underlying(underlying) if r["product"] == "future" and r["expiry"]]
+        if underlying == "KOSPI200":
+            records = [r for r in records if _is_main_kospi200(r)]
+        live, seen = [], set()
+        for r in sorted(records, key=lambda r: r["expiry"]):
+            if r["expiry"] in seen or self._roll_date(r) < today: continue
+            seen.add(r["expiry"])
+            live.append(r)
+        front = live[0] if live else None
+        nxt = live[1] if len(live) > 1 else None
+        # an empty chain is only cached for the day, so a later master refresh is picked up
+        valid_until = self._roll_date(front) if front else today
+        with self._lock:
+            self._cache[underlying] = (version, front, nxt, valid_until)
+        return front, nxt
+
+    def front_month(self, underlying="KOSPI200", today=None):
+        """Symbol master record of the current front-month future, or None if the master has none."""
+        return self._chain(underlying, today or _today())[0]
+
+    def next_month(self, underlying="KOSPI200", today=None):
+        return self._chain(underlying, today or _today())[1]
+
+    def main_kospi200_future(self, today=None):
+        front = self.front_month("KOSPI200", today)
+        return front["shcode"] if front else None
+
+    def main_stock_future(self, stock_code="005930", today=None):
+        front = self.front_month(stock_code, today)
+        return front["shcode"] if front else None
+
+    def option_series(self, expiry=None, today=None):
+        """
+        Call/put master records of one KOSPI200 option series (mini options excluded).
+        `expiry` is a nearest_weekly_option()-style dict; default: the nearest series. Weekly series are
+        matched by the tag in the name (W<n> Thursday / M<n> Monday, n = week of the month).
+        """
+        expiry = expiry or self.nearest_weekly_option(today)
+        day = datetime.strptime(expiry["expiry"], "%Y%m%d").date()
+        tag = "" if expiry["monthly"] else f"{'W' if expiry['weekday'] == 'THU' else 'M'}{(day.day - 1) // 7 + 1}"
+        return [r for r in self.master.by_expiry(expiry["expiry"][:6])
+                if r["product"] in ("call", "put") and r["underlying"] == "KOSPI200" and r["strike"] is not None
+                and r["series"] == tag and "미니" not in r["hname"] and "MINI" not in r["hname"].upper()]
+
+    @staticmethod
+    def nearest_weekly_option(today=None):
+        """
+        Nearest KOSPI200 option expiry on or after today: {"expiry": YYYYMMDD, "weekday": MON/THU, "monthly": bool}.
+        The second Thursday is the monthly series rather than a weekly one.
+        """
+        day = today or _today()
+        while day.weekday() not in WEEKLY_EXPIRY_WEEKDAYS:
+            day += timedelta(days=1)
+        return {
+            "expiry": day.strftime("%Y%m%d"),
+            "weekday": WEEKLY_EXPIRY_WEEKDAYS[day.weekday()],
+            "monthly": day == second_thursday(day.year, day.month),
+        }
@@ -0,0 +1,39 @@
+"""
+Drivers for generator "flows": logic written once as a generator that yields each I/O step,
+run by the blocking clients with run() and by the async ones with run_async(). The driver
+performs a step, sends its result back in (or throws its exception in at the yield) and
+returns the generator's return value.
+"""
+
+def run(flow, perform):
+    value, error = None, None
+    while True:
+        try:
+            step = flow.throw(error) if error is not None else flow.send(value)
+        except StopIteration as stop:
+            return stop.value
+        try:
+            value, error = perform(step), None
+        except Exception as e:
+            value, error = None, e
+
+async def run_async(flow, perform):
+    """run() where perform(step) returns an awaitable."""
+    value, error = None, None
+    while True:
+        try:
+            step = flow.throw(error) if error is not None else flow.send(value)
+        except StopIteration as stop:
+            return stop.value
+        try:
+            value, error = await perform(step), None
+        except Exception as e:
+            value, error = None, e
+
+def done(result):
+    """perform() for flows whose steps are already results (blocking calls made while yielding)."""
+    return result
+
+def awaited(step):
+    """perform() for flows whose steps are awaitables."""
+    return step
@@ -1,26 +1,55 @@
-import json
+import os
+from src.clients.records import parse_number
+from src.utils.symbol_master import SymbolMaster, product_type
+from src.utils.contract_resolver import ContractResolver
+from src.utils.candle_store import CandleStore, row_from_bar
+from src.utils.resampler import resample_many, STOCK_SESSIONS, FUTURES_SESSIONS
 
-# --- Futures Name Cache ---
-futures_name_cache = {}
+# --- Futures/Options Symbol Master (config/symbol_master.json, refreshed once per trading day) ---
+SYMBOL_MASTER_FILE = os.path.join(os.path.dirname(__file__), "..", "..", "config", "symbol_master.json")
+symbol_master = SymbolMaster(os.path.abspath(SYMBOL_MASTER_FILE))
+contract_resolver = ContractResolver(symbol_master)
+
+# --- Local OHLCV store (data/candles, override with CANDLE_DIR) ---
+CANDLE_DIR = os.getenv("CANDLE_DIR") or os.path.join(os.path.dirname(__file__), "..", "..", "data", "candles")
+candle_store = CandleStore(os.path.abspath(CANDLE_DIR))
+
+def _resampled_rows(key, timeframes, count, sessions):
+    bars = candle_store.tail(key, max(timeframes) * (count + 1))
+    return {tf: [row_from_bar(b) for b in cols.to_bars()[-count:]] for tf, cols in resample_many(bars, timeframes, sessions).items()}
+
+def multi_timeframe_bars(trader_instance, code, timeframes=(5, 15), count=10):
+    """{minutes: last `count` bars} for every timeframe, all resampled from one stored 1m series."""
+    kind = "stock_minute" if _is_stock_code(code) else "futures_minute"
+    key = candle_store.sync(trader_instance, kind, code, interval=1, count=max(timeframes) * (count + 1))
+    return _resampled_rows(key, timeframes, count, STOCK_SESSIONS if kind == "stock_minute" else FUTURES_SESSIONS)
+
+async def multi_timeframe_bars_async(trader_instance, code, timeframes=(5, 15), count=10):
+    kind = "stock_minute" if _is_stock_code(code) else "futures_minute"
+    key = await candle_store.sync_async(trader_instance, kind, code, interval=1, count=max(timeframes) * (count + 1))
+    return _resampled_rows(key, timeframes, count, STOCK_SESSIONS if kind == "stock_minute" else FUTURES_SESSIONS)
 
 def build_futures_cache(trader_instance):
-    """Build a lookup cache of futures code -> name at startup."""
-    global futures_name_cache
+    """Load the symbol master from disk and refresh it from LS if it is from an earlier trading day."""
+    from src.clients.rate_limiter import call_priority, PRIORITY_BACKGROUND
     try:
-        codes = trader_instance.get_futures_code_list()
-        for item in codes:
-            shcode = item.get('shcode', '')
-            hname = item.get('hname', '')
-            if shcode and hname:
-                futures_name_cache[shcode] = hname
-        print(f"Futures cache built: {len(futures_name_cache)} items")
+        with call_priority(PRIORITY_BACKGROUND):
+            symbol_master.ensure_fresh(trader_instance)
+        print(f"Futures cache built: {len(symbol_master)} items (trade date {symbol_master.trade_date})")
     except Exception as e:
         print(f"Warning: Could not build futures cache: {e}")
 
+def parse_text_update(update):
+    """Extract (chat_id, text, username) from a Telegram update, or None if it isn't a text message."""
+    message = update.get("message")
+    if not message or "text" not in message: return None
+    return message["chat"]["id"], message["text"], message.get("from", {}).get("username", "Unknown")
+
 def lookup_name(code):
     """Look up the display name for a code."""
-    if code in futures_name_cache:
-        return futures_name_cache[code]
+    name = symbol_master.name(code)
+    if name:
+        return name
     stock_names = {
         '005930': '삼성전자',
         '000660': 'SK하이닉스',
@@ -33,41 +62,140 @@ def lookup_name(code):
     }
     return stock_names.get(code, code)
 
-def get_price_data(trader_instance, code):
+def _is_stock_code(code):
+    return code.isdigit() and len(code) == 6
+
+def _has_price(data):
+    return parse_number(data.get('price')) > 0
+
+def _fallback_stock_code(code):
+    """Stock to quote when a future has no price: its underlying, or Samsung as the KOSPI200 proxy. None for options."""
+    record = symbol_master.get(code)
+    if (record["product"] if record else product_type(code)) != "future":
+        return None
+    if record and _is_stock_code(record["underlying"]):
+        return record["underlying"]
+    if (record and record["underlying"] == "KOSPI200") or code[1:3] == "01":
+        return "005930"
+    return None
+
+def get_price_data(trader_instance, code, max_age=None):
     """
     Helper to get price from Xing Trader.
+    Codes the websocket is streaming are answered from trader.last_values (no REST at all).
+    Otherwise served from trader.quote_cache when the last quote is younger than max_age seconds
+    (default: per asset class TTL, 0 forces a refetch). Concurrent misses for the same code
+    (users, AlertMonitor, data server) share one fetch. Results carry _fetched_at/_source.
     """
-    is_stock = code.isdigit() and len(code) == 6
-    if is_stock:
+    cached = _fresh_quote(trader_instance, code, max_age)
+    if cached: return cached
+    return trader_instance.flight.do(("price", code), _fetch_price_data, trader_instance, code)
+
+def _fresh_quote(trader_instance, code, max_age):
+    """Streamed quote if the websocket has a fresh one, else a cached REST quote, else None."""
+    return trader_instance.last_values.quote(code, max_age) or trader_instance.quote_cache.get(code, max_age)
+
+def _fetch_price_data(trader_instance, code):
+    data, source = _get_price_data(trader_instance, code)
+    return trader_instance.quote_cache.put(code, data, source)
+
+def _get_price_data(trader_instance, code):
+    """(data, source TR) without touching the cache."""
+    if _is_stock_code(code):
         data = trader_instance.get_stock_price(code)
-        if data: return data
-        return None
+        if data: return data, "t1102"
+        return None, None
     
     data = trader_instance.get_futures_price(code)
-    try:
-        raw_price = str(data.get('price', '0')).replace(',', '').strip()
-        price_val = float(raw_price)
-    except:
-        price_val = 0
-        
-    if data and price_val > 0:
-        return data
+    if data and _has_price(data):
+        return data, "t2101"
         
-    underlying_map = {
-        "A1163000": "005930",
-        "A1162000": "005930", 
-        "101H6000": "005930",
-        "A0163": "005930"
-    }
-    
-    stock_code = underlying_map.get(code)
-    if not stock_code and code.startswith("101"):
-         stock_code = "005930"
-    
+    stock_code = _fallback_stock_code(code)
     if stock_code:
         s_data = trader_instance.get_stock_price(stock_code)
         if s_data:
             s_data['_fallback_note'] = f"Derived from Stock {stock_code}"
-            return s_data
+            return s_data, f"t1102:{stock_code}"
             
-    return data
+    return data, "t2101"
+
+def _missing_fallbacks(quotes):
+    """{futures code: underlying stock code} for futures without a usable price; empty stock quotes become None."""
+    missing = {}
+    for code, data in quotes.items():
+        if _is_stock_code(code):
+            quotes[code] = data or None
+        elif not (data and _has_price(data)):
+            stock_code = _fallback_stock_code(code)
+            if stock_code: missing[code] = stock_code
+    return missing
+
+def _merge_fallbacks(quotes, missing, fallback):
+    """Futures without a usable price borrow the underlying stock quote, as get_price_data does."""
+    for code, stock_code in missing.items():
+        s_data = fallback.get(stock_code)
+        if s_data:
+            s_data = s_data.copy()
+            s_data['_fallback_note'] = f"Derived from Stock {stock_code}"
+            s_data['_source'] = f"t8407:{stock_code}"
+            quotes[code] = s_data
+    return quotes
+
+def _cached_quotes(trader_instance, codes, max_age):
+    """Split codes into ({code: cached quote}, [codes to fetch])."""
+    hits, stale = {}, []
+    for code in dict.fromkeys(codes):
+        cached = _fresh_quote(trader_instance, code, max_age)
+        if cached: hits[code] = cached
+        else: stale.append(code)
+    return hits, stale
+
+def _store_quotes(trader_instance, quotes):
+    for code, data in quotes.items():
+        quotes[code] = trader_instance.quote_cache.put(code, data, "t8407" if _is_stock_code(code) else "t2101")
+    return quotes
+
+def get_price_data_many(trader_instance, codes, max_age=None):
+    """get_price_data for several codes, batched through trader.get_quotes(). Returns {code: data or None}."""
+    hits, stale = _cached_quotes(trader_instance, codes, max_age)
+    if stale:
+        quotes = trader_instance.get_quotes(stale)
+        missing = _missing_fallbacks(quotes)
+        if missing:
+            _merge_fallbacks(quotes, missing, trader_instance.get_quotes(list(dict.fromkeys(missing.values()))))
+        hits.update(_store_quotes(trader_instance, quotes))
+    return {code: hits.get(code) for code in codes}
+
+async def get_price_data_many_async(trader_instance, codes, max_age=None):
+    hits, stale = _cached_quotes(trader_instance, codes, max_age)
+    if stale:
+        quotes = await trader_instance.get_quotes(stale)
+        missing = _missing_fallbacks(quotes)
+        if missing:
+            _merge_fallbacks(quotes, missing, await trader_instance.get_quotes(list(dict.fromkeys(missing.values()))))
+        hits.update(_store_quotes(trader_instance, quotes))
+    return {code: hits.get(code) for code in codes}
+
+async def get_price_data_async(trader_instance, code, max_age=None):
+    """get_price_data for AsyncXingRestTrader."""
+    cached = _fresh_quote(trader_instance, code, max_age)
+    if cached: return cached
+    return await trader_instance.flight.do(("price", code), _fetch_price_data_async, trader_instance, code)
+
+async def _fetch_price_data_async(trader_instance, code):
+    if _is_stock_code(code):
+        data = await trader_instance.get_stock_price(code) or None
+        return trader_instance.quote_cache.put(code, data, "t1102")
+
+    data = await trader_instance.get_futures_price(code)
+    if data and _has_price(data):
+        return trader_instance.quote_cache.put(code, data, "t2101")
+
+    stock_code = _fallback_stock_code(code)
+    if stock_code:
+        s_data = await trader_instance.get_stock_price(stock_code)
+        if s_data:
+            s_data['_fallback_note'] = f"Derived from Stock {stock_code}"
+            return trader_instance.quote_cache.put(code, s_data, f"t1102:{stock_code}")
+
+    return trader_instance.quote_cache.put(code, data, "t2101")
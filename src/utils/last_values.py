@@ -0,0 +1,100 @@
+import threading
+import time
+
+from src.clients.records import Quote, Tick
+from src.utils.orderbook_engine import OrderBookEngine
+
+EXECUTION_TRS = ("FC0", "OC0")
+ORDERBOOK_TRS = ("FH0", "OH0")
+
+class LastValueStore:
+    """
+    Latest realtime quote and orderbook per code, updated in place from every FC0/OC0 and FH0/OH0 message.
+    Reads are a dict lookup under a lock; values older than max_age seconds (default: DEFAULT_MAX_AGE)
+    are treated as missing so callers fall back to REST. Returned quotes are copies with `_age` set.
+    Books and their analytics live in `books` (OrderBookEngine).
+    """
+    DEFAULT_MAX_AGE = 10.0
+
+    def __init__(self, max_age=None):
+        self.max_age = self.DEFAULT_MAX_AGE if max_age is None else max_age
+        self._lock = threading.Lock()
+        self._quotes = {}       # code -> Quote (fetched_at = receive time)
+        self.books = OrderBookEngine()   # FH0/OH0 books + spread/microprice/imbalance, updated in place
+        self.updates = 0
+        self.hits = 0
+        self.misses = 0
+
+    def on_message(self, tr_cd, tr_key, body):
+        """Realtime client hook: fold one decoded message into the store. Returns the parsed record (or None)."""
+        now = time.time()
+        if tr_cd in EXECUTION_TRS:
+            tick = body.get("_tick") or Tick.from_ls(body)
+            self.update_tick(tr_key or tick.code, tick, tr_cd, now)
+            return tick
+        if tr_cd in ORDERBOOK_TRS:
+            code = tr_key or body.get("futcode") or body.get("optcode", "")
+            with self._lock:
+                self.updates += 1
+            return self.books.update(code, body, now)
+        return None
+
+    def update_tick(self, code, tick, source="FC0", now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            self.updates += 1
+            q = self._quotes.get(code)
+            if q is None:
+                q = self._quotes[code] = Quote(code)
+            q.price, q.change, q.volume = tick.price, tick.change, tick.total_volume
+            # FC0 carries the session OHLC; keep the last known value when a message omits it
+            if tick.open: q.open = tick.open
+            if tick.high: q.high = tick.high
+            if tick.low: q.low = tick.low
+            q.fetched_at, q.source = now, source
+
+    def _fresh(self, received, max_age):
+        age = time.time() - received
+        return age if age <= (self.max_age if max_age is None else max_age) else None
+
+    def quote(self, code, max_age=None):
+        """Latest streamed Quote for code no older than max_age, else None."""
+        with self._lock:
+            q = self._quotes.get(code)
+            age = self._fresh(q.fetched_at, max_age) if q is not None else None
+            if age is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            hit = q.copy()
+        hit["_age"] = round(age, 3)
+        hit["_realtime"] = True
+        return hit
+
+    def book_metrics(self, code, max_age=None):
+        """Latest BookMetrics (spread, microprice, imbalance, cumulative depth) if fresh, else None. O(1)."""
+        m = self.books.metrics(code)
+        return m if m is not None and self._fresh(m.received_at, max_age) is not None else None
+
+    def orderbook(self, code, max_age=None):
+        """OrderBook snapshot of the live book if fresh, else None."""
+        if self.book_metrics(code, max_age) is None: return None
+        return self.books.orderbook(code)
+
+    def clear(self):
+        """Drop everything (e.g. the stream disconnected, so the values stop being live)."""
+        with self._lock:
+            self._quotes.clear()
+        self.books.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "quotes": len(self._quotes),
+                "orderbooks": len(self.books),
+                "updates": self.updates,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups * 100, 1) if lookups else 0.0,
+            }
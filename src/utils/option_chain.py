@@ -0,0 +1,140 @@
+import threading
+import time
+from array import array
+
+from src.clients.records import parse_number
+from src.clients.realtime_dispatch import CONFLATE
+
+COLUMNS = ("last", "bid", "ask", "bid_qty", "ask_qty", "volume")
+
+class _Side:
+    """One side (calls or puts) of the chain: a column array per field, indexed like OptionChain.strikes."""
+    __slots__ = ("codes",) + COLUMNS
+
+    def __init__(self, n):
+        self.codes = [None] * n
+        for name in COLUMNS:
+            setattr(self, name, array("d", bytes(8 * n)))
+
+    def snapshot(self):
+        return {name: getattr(self, name).tolist() for name in COLUMNS}
+
+class OptionChain:
+    """
+    Strike-indexed call/put snapshot of one option series, updated in place from OC0 (last, volume)
+    and OH0 (best bid/ask and sizes). Reading the whole chain copies a handful of arrays.
+    """
+    def __init__(self, records, expiry=None):
+        self.expiry = expiry
+        strikes = sorted({r["strike"] for r in records})
+        self.strikes = array("d", strikes)
+        index = {strike: i for i, strike in enumerate(strikes)}
+        self.calls, self.puts = _Side(len(strikes)), _Side(len(strikes))
+        self._slots = {}   # code -> (_Side, index)
+        for r in records:
+            side = self.calls if r["product"] == "call" else self.puts
+            i = index[r["strike"]]
+            side.codes[i] = r["shcode"]
+            self._slots[r["shcode"]] = (side, i)
+        self._lock = threading.Lock()
+        self.updated_at = None
+        self.updates = 0
+
+    def codes(self):
+        return list(self._slots)
+
+    def on_message(self, tr_cd, tr_key, body):
+        """Dispatcher callback for OC0/OH0; codes outside this series are ignored."""
+        slot = self._slots.get(tr_key or body.get("optcode", ""))
+        if slot is None: return
+        side, i = slot
+        with self._lock:
+            if tr_cd == "OC0":
+                price = parse_number(body.get("price"))
+                if price: side.last[i] = price
+                volume = body.get("volume")
+                if volume is not None: side.volume[i] = parse_number(volume)
+            elif tr_cd == "OH0":
+                for name, key in (("ask", "offerho1"), ("bid", "bidho1"), ("ask_qty", "offerrem1"), ("bid_qty", "bidrem1")):
+                    value = body.get(key)
+                    if value is not None: getattr(side, name)[i] = parse_number(value)
+            else:
+                return
+            self.updates += 1
+            self.updated_at = time.time()
+
+    def snapshot(self):
+        """{"expiry", "strikes", "call": {column: [...]}, "put": {...}, "updated_at"}; 0 = no data yet."""
+        with self._lock:
+            return {"expiry": self.expiry, "strikes": self.strikes.tolist(),
+                    "call": self.calls.snapshot(), "put": self.puts.snapshot(), "updated_at": self.updated_at}
+
+    def atm_index(self):
+        """Index of the strike where call and put last prices are closest (put-call parity), or None."""
+        best, best_gap = None, None
+        for i in range(len(self.strikes)):
+            c, p = self.calls.last[i], self.puts.last[i]
+            if not c or not p: continue
+            gap = abs(c - p)
+            if best_gap is None or gap < best_gap:
+                best, best_gap = i, gap
+        return best
+
+class ChainSubscriber:
+    """
+    Subscribes OC0 + OH0 for every code of an OptionChain through the shared SubscriptionManager,
+    `batch_size` codes at a time with `interval` seconds between batches so the server isn't flooded.
+    One conflating dispatcher subscriber per TR feeds the whole chain.
+    """
+    TRS = ("OC0", "OH0")
+
+    def __init__(self, client, chain, batch_size=20, interval=1.0):
+        self.client = client
+        self.chain = chain
+        self.batch_size = batch_size
+        self.interval = interval
+        self._handles = []
+        self._stop = threading.Event()
+        self._thread = None
+        self._subs = []
+        self._subscribed = 0
+        self.rejected = 0
+
+    def start(self):
+        for tr_cd in self.TRS:
+            self._subs.append(self.client.dispatcher.add(tr_cd, self.chain.on_message, policy=CONFLATE))
+        self._thread = threading.Thread(target=self._subscribe_all, name="option-chain", daemon=True)
+        self._thread.start()
+        return self
+
+    def _subscribe_all(self):
+        codes = self.chain.codes()
+        for start in range(0, len(codes), self.batch_size):
+            if self._stop.is_set(): return
+            for code in codes[start:start + self.batch_size]:
+                handles = [self.client.subscriptions.acquire(tr_cd, code) for tr_cd in self.TRS]
+                if all(handles):
+                    self._handles.extend(handles)
+                    self._subscribed += 1
+                    continue
+                self.rejected += 1   # half a code is no use to the chain: give the slot back
+                for handle in handles:
+                    if handle is not None: handle.close()
+            if start + self.batch_size < len(codes):
+                self._stop.wait(self.interval)
+        print(f"[OptionChain] Subscribed {self._subscribed}/{len(codes)} options ({self.chain.expiry or 'series'})"
+              + (f", {self.rejected} refused (connections full)" if self.rejected else ""))
+
+    def progress(self):
+        """(codes with both feeds subscribed, codes in the chain)."""
+        return self._subscribed, len(self.chain.codes())
+
+    def close(self):
+        self._stop.set()
+        if self._thread: self._thread.join(timeout=5)
+        for handle in self._handles:
+            handle.close()
+        self._handles = []
+        for sub in self._subs:
+            self.client.dispatcher.discard(sub)
+        self._subs = []
@@ -0,0 +1,98 @@
+import threading
+from array import array
+from itertools import accumulate
+
+from src.clients.records import OrderBook, parse_number
+
+DEPTH = 5
+ASK_PX = tuple(f"offerho{i}" for i in range(1, DEPTH + 1))
+ASK_QTY = tuple(f"offerrem{i}" for i in range(1, DEPTH + 1))
+BID_PX = tuple(f"bidho{i}" for i in range(1, DEPTH + 1))
+BID_QTY = tuple(f"bidrem{i}" for i in range(1, DEPTH + 1))
+
+class BookMetrics:
+    """Derived values of one book state. Immutable once published, so readers need no lock."""
+    __slots__ = ("code", "time", "received_at", "best_bid", "best_ask", "spread", "mid", "microprice",
+                 "imbalance_l1", "imbalance", "bid_depth", "ask_depth", "cum_bid", "cum_ask")
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+class _Book:
+    __slots__ = ("code", "time", "ask_px", "ask_qty", "bid_px", "bid_qty", "metrics")
+
+    def __init__(self, code):
+        self.code = code
+        self.time = ""
+        self.ask_px, self.ask_qty = array("d", bytes(8 * DEPTH)), array("d", bytes(8 * DEPTH))
+        self.bid_px, self.bid_qty = array("d", bytes(8 * DEPTH)), array("d", bytes(8 * DEPTH))
+        self.metrics = None
+
+def _apply(column, keys, body):
+    # only the levels present in the message change; the rest of the book stays as it was
+    for i, key in enumerate(keys):
+        value = body.get(key)
+        if value is not None: column[i] = parse_number(value)
+
+def _compute(book, now):
+    m = BookMetrics()
+    m.code, m.time, m.received_at = book.code, book.time, now
+    ask, bid = book.ask_px[0], book.bid_px[0]
+    aq, bq = book.ask_qty[0], book.bid_qty[0]
+    m.best_ask = ask or None
+    m.best_bid = bid or None
+    m.spread = round(ask - bid, 6) if ask and bid else None
+    m.mid = (ask + bid) / 2 if ask and bid else None
+    # Microprice leans the mid towards the side with less resting size (where the next trade is likelier)
+    m.microprice = (ask * bq + bid * aq) / (aq + bq) if ask and bid and aq + bq else m.mid
+    m.imbalance_l1 = (bq - aq) / (bq + aq) if aq + bq else 0.0
+    m.cum_bid = tuple(accumulate(book.bid_qty))
+    m.cum_ask = tuple(accumulate(book.ask_qty))
+    m.bid_depth, m.ask_depth = m.cum_bid[-1], m.cum_ask[-1]
+    total = m.bid_depth + m.ask_depth
+    m.imbalance = (m.bid_depth - m.ask_depth) / total if total else 0.0
+    return m
+
+class OrderBookEngine:
+    """
+    5-level books per code, kept in array columns and updated in place from FH0/OH0 bodies.
+    Every update recomputes spread, mid, microprice, L1/total depth imbalance and cumulative depth
+    into a fresh BookMetrics, so metrics(code) is a dict lookup with no parsing or copying.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._books = {}
+        self.updates = 0
+
+    def update(self, code, body, now):
+        with self._lock:
+            book = self._books.get(code)
+            if book is None:
+                book = self._books[code] = _Book(code)
+            _apply(book.ask_px, ASK_PX, body)
+            _apply(book.ask_qty, ASK_QTY, body)
+            _apply(book.bid_px, BID_PX, body)
+            _apply(book.bid_qty, BID_QTY, body)
+            book.time = body.get("hotime", book.time)
+            book.metrics = _compute(book, now)
+            self.updates += 1
+            return book.metrics
+
+    def metrics(self, code):
+        book = self._books.get(code)
+        return book.metrics if book is not None else None
+
+    def orderbook(self, code):
+        """OrderBook record snapshot of the current levels (for display), or None."""
+        with self._lock:
+            book = self._books.get(code)
+            if book is None: return None
+            return OrderBook(code, [(p, int(q)) for p, q in zip(book.ask_px, book.ask_qty)],
+                             [(p, int(q)) for p, q in zip(book.bid_px, book.bid_qty)], book.time)
+
+    def clear(self):
+        with self._lock:
+            self._books.clear()
+
+    def __len__(self):
+        return len(self._books)
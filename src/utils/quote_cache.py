@@ -0,0 +1,67 @@
+import threading
+import time
+from collections import OrderedDict
+
+class QuoteCache:
+    """
+    Bounded LRU of the last quote per code with a per-asset-class TTL.
+    Entries are stamped with `_fetched_at` (epoch seconds) and `_source` (the TR that produced them);
+    hits are returned as copies with `_age` (seconds) and `_cached` set.
+    """
+    DEFAULT_TTL = {"stock": 3.0, "future": 2.0}
+
+    def __init__(self, max_entries=512, ttl=None):
+        self.max_entries = max_entries
+        self.ttl = dict(self.DEFAULT_TTL)
+        self.ttl.update(ttl or {})
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def asset_class(code):
+        return "stock" if code.isdigit() and len(code) == 6 else "future"
+
+    def get(self, code, max_age=None):
+        """Cached quote no older than max_age seconds (default: the asset class TTL), else None."""
+        if max_age is None:
+            max_age = self.ttl[self.asset_class(code)]
+        with self._lock:
+            data = self._entries.get(code)
+            age = time.time() - data["_fetched_at"] if data is not None else None
+            if data is None or age > max_age:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(code)
+            self.hits += 1
+        hit = data.copy()
+        hit["_age"] = round(age, 3)
+        hit["_cached"] = True
+        return hit
+
+    def put(self, code, data, source=None):
+        """Stamp and store a fresh quote. Returns the stamped quote (None results are not cached)."""
+        if not data: return data
+        data["_fetched_at"] = time.time()
+        if source and "_source" not in data:
+            data["_source"] = source
+        with self._lock:
+            self._entries[code] = data.copy()
+            self._entries.move_to_end(code)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return data
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups * 100, 1) if lookups else 0.0,
+            }
@@ -0,0 +1,127 @@
+"""
+Builds higher timeframes (5m, 15m, 60m, ...) from 1-minute bars in one pass over columnar
+`array` data, so one 1m pull feeds every timeframe. Buckets are anchored at the session open
+and never span two sessions; bars outside every session are dropped.
+Bars are (ts, open, high, low, close, volume) with ts = YYYYMMDDHHMMSS of the bar's start minute.
+"""
+from array import array
+from bisect import bisect_left
+from datetime import datetime, timedelta
+
+# (open, close) in minutes after midnight, close inclusive (KRX closing auction prints at 15:30).
+# A close past 1440 means the session runs into the next calendar day.
+STOCK_SESSIONS = ((9 * 60, 15 * 60 + 30),)
+FUTURES_SESSIONS = ((8 * 60 + 45, 15 * 60 + 45), (18 * 60, 24 * 60 + 6 * 60))
+
+_day_shift_cache = {}
+
+def _shift_date(yyyymmdd, days):
+    key = (yyyymmdd, days)
+    shifted = _day_shift_cache.get(key)
+    if shifted is None:
+        shifted = int((datetime.strptime(str(yyyymmdd), "%Y%m%d") + timedelta(days=days)).strftime("%Y%m%d"))
+        _day_shift_cache[key] = shifted
+    return shifted
+
+class BarArrays:
+    """Columnar OHLCV: ts/volume as int64 arrays, prices as float64 arrays."""
+    __slots__ = ("ts", "open", "high", "low", "close", "volume")
+
+    def __init__(self):
+        self.ts, self.volume = array("q"), array("q")
+        self.open, self.high, self.low, self.close = array("d"), array("d"), array("d"), array("d")
+
+    @classmethod
+    def from_bars(cls, bars):
+        cols = cls()
+        for ts, o, h, l, c, v in bars:
+            cols.ts.append(ts); cols.open.append(o); cols.high.append(h)
+            cols.low.append(l); cols.close.append(c); cols.volume.append(v)
+        return cols
+
+    def __len__(self):
+        return len(self.ts)
+
+    def to_bars(self):
+        return list(zip(self.ts, self.open, self.high, self.low, self.close, self.volume))
+
+_table_cache = {}
+
+def _session_table(sessions):
+    """Per minute of day: (open, close, minutes since the session day's midnight, starts on previous day) or None."""
+    table = _table_cache.get(sessions)
+    if table is None:
+        table = [None] * 1440
+        for mod in range(1440):
+            for start, end in sessions:
+                if start <= mod <= end:
+                    table[mod] = (start, end, mod, False)
+                    break
+                if end > 1440 and mod + 1440 <= end and mod < start:
+                    table[mod] = (start, end, mod + 1440, True)
+                    break
+        _table_cache[sessions] = table
+    return table
+
+def _label(session_date, minute):
+    if minute >= 1440:
+        session_date, minute = _shift_date(session_date, 1), minute - 1440
+    return session_date * 1000000 + (minute // 60) * 10000 + (minute % 60) * 100
+
+def _session_keys(src, table):
+    """
+    Sorted int key per bar: session date * 10000 + minutes since that date's midnight (-1 outside sessions).
+    This is the only per-bar Python loop; every timeframe is then cut from it with bisect + slice builtins.
+    """
+    keys = array("q")
+    append = keys.append
+    for ts in src.ts:
+        entry = table[ts // 10000 % 100 * 60 + ts // 100 % 100]
+        if entry is None:
+            append(-1)
+        elif entry[3]:
+            append(_shift_date(ts // 1000000, -1) * 10000 + entry[2])
+        else:
+            append(ts // 1000000 * 10000 + entry[2])
+    return keys
+
+def _in_session(src, keys):
+    if min(keys, default=0) >= 0: return src, keys
+    keep = [i for i, k in enumerate(keys) if k >= 0]
+    out = BarArrays()
+    for name in BarArrays.__slots__:
+        col = getattr(src, name)
+        getattr(out, name).extend(col[i] for i in keep)
+    return out, array("q", (keys[i] for i in keep))
+
+def _aggregate(src, keys, table, minutes):
+    out = BarArrays()
+    n = len(keys)
+    i = 0
+    while i < n:
+        date, minute = divmod(keys[i], 10000)
+        start, end = table[minute % 1440][:2]
+        bucket = start + (minute - start) // minutes * minutes
+        j = bisect_left(keys, date * 10000 + min(bucket + minutes, end + 1), i + 1)
+        out.ts.append(_label(date, bucket))
+        out.open.append(src.open[i])
+        out.high.append(max(src.high[i:j]))
+        out.low.append(min(src.low[i:j]))
+        out.close.append(src.close[j - 1])
+        out.volume.append(sum(src.volume[i:j]))
+        i = j
+    return out
+
+def resample_many(bars, timeframes, sessions=STOCK_SESSIONS):
+    """
+    Aggregate 1m bars (list of tuples or BarArrays, oldest first) into every timeframe:
+    first open, max high, min low, last close, summed volume. Returns {minutes: BarArrays}.
+    """
+    src = bars if isinstance(bars, BarArrays) else BarArrays.from_bars(bars)
+    table = _session_table(tuple(sessions))
+    src, keys = _in_session(src, _session_keys(src, table))
+    return {tf: _aggregate(src, keys, table, tf) for tf in timeframes}
+
+def resample(bars, minutes, sessions=STOCK_SESSIONS):
+    """Single-timeframe resample_many(). Returns BarArrays."""
+    return resample_many(bars, (minutes,), sessions)[minutes]
@@ -0,0 +1,84 @@
+import asyncio
+import threading
+
+from src.clients.records import Quote
+
+class _Call:
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+def _share(result):
+    # Every caller gets its own top-level dict/Quote so one caller's annotations don't leak into another's
+    return result.copy() if isinstance(result, (dict, Quote)) else result
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls: while fn for `key` is running, other callers with the
+    same key wait for it and share its result (or exception) instead of issuing their own request.
+    Nothing is cached once the call finishes.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self.calls = 0
+        self.executed = 0
+        self.merged = 0
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            self.calls += 1
+            call = self._inflight.get(key)
+            if call is not None:
+                self.merged += 1
+                leader = False
+            else:
+                call = self._inflight[key] = _Call()
+                self.executed += 1
+                leader = True
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None: raise call.error
+            return _share(call.result)
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return _share(call.result)
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            call.event.set()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "executed": self.executed,
+                "merged": self.merged,
+                "inflight": len(self._inflight),
+                "merge_rate": round(self.merged / self.calls * 100, 1) if self.calls else 0.0,
+            }
+
+
+class AsyncSingleFlight(SingleFlight):
+    """SingleFlight for coroutines on one event loop: followers await the leader's task."""
+    async def do(self, key, fn, *args, **kwargs):
+        self.calls += 1
+        task = self._inflight.get(key)
+        if task is not None:
+            self.merged += 1
+            return _share(await asyncio.shield(task))
+        self.executed += 1
+        task = self._inflight[key] = asyncio.ensure_future(fn(*args, **kwargs))
+        try:
+            return _share(await asyncio.shield(task))
+        finally:
+            if self._inflight.get(key) is task:
+                del self._inflight[key]
@@ -0,0 +1,43 @@
+import threading
+import time
+from contextlib import contextmanager
+
+class StartupTimer:
+    """Times startup phases, including ones deferred to background threads, and logs each duration."""
+    def __init__(self):
+        self.t0 = time.monotonic()
+        self.phases = {}
+        self._lock = threading.Lock()
+
+    def _record(self, name, started, ok=True):
+        elapsed = time.monotonic() - started
+        with self._lock:
+            self.phases[name] = elapsed
+        print(f"[Startup] {name}: {elapsed * 1000:.0f} ms{'' if ok else ' (failed)'} (t+{time.monotonic() - self.t0:.2f}s)", flush=True)
+
+    @contextmanager
+    def phase(self, name):
+        started = time.monotonic()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self._record(name, started, ok)
+
+    def run_background(self, name, fn, *args):
+        """Run fn(*args) on a daemon thread and log its duration. Returns the thread."""
+        def _run():
+            started = time.monotonic()
+            try:
+                fn(*args)
+                self._record(name, started)
+            except Exception as e:
+                print(f"[Startup] {name} error: {e}")
+                self._record(name, started, ok=False)
+        t = threading.Thread(target=_run, name=f"startup-{name}", daemon=True)
+        t.start()
+        return t
+
+    def ready(self):
+        print(f"[Startup] Accepting messages after {time.monotonic() - self.t0:.2f}s", flush=True)
@@ -0,0 +1,181 @@
+import os
+import re
+import json
+import threading
+from datetime import datetime, timedelta, timezone
+
+KST = timezone(timedelta(hours=9))
+
+FORMAT_VERSION = 2   # v2: options (t8433) with strike / weekly series
+FIELDS = ("shcode", "hname", "expcode", "underlying", "product", "expiry", "strike", "series")
+
+_EXPIRY_RE = re.compile(r"(20\d{2})(0[1-9]|1[0-2])")
+_MONTH_CODES = "123456789ABC"
+_SPREAD_RE = re.compile(r"(?<![A-Z])SP(?![A-Z])")   # standalone SP ("F SP 2606-2609"), not the one in "KOSPI"
+_STRIKE_RE = re.compile(r"(\d{2,4}(?:\.\d+)?)\s*$")
+_SERIES_RE = re.compile(r"\d{4}\s*([WM]\d)")   # weekly series tag in the name, e.g. "C 2606W2 345.0" (W=Thu, M=Mon)
+
+def _today():
+    return datetime.now(KST).strftime("%Y%m%d")
+
+def product_type(shcode, hname=""):
+    """future / call / put / spread from the KRX derivative code (old 1xx/2xx/3xx/4xx and new A/B/C/D series)."""
+    if _SPREAD_RE.search(hname.upper()) or "스프레드" in hname: return "spread"
+    return {"1": "future", "A": "future", "2": "call", "B": "call", "3": "put", "C": "put", "4": "spread", "D": "spread"}.get(shcode[:1], "future")
+
+def expiry_month(shcode, hname=""):
+    """YYYYMM from the name ("... F 202606"), else decoded from the code's year digit and month code; "" if unknown."""
+    m = _EXPIRY_RE.search(hname)
+    if m: return m.group(1) + m.group(2)
+    if len(shcode) >= 5 and shcode[3].isdigit() and shcode[4] in _MONTH_CODES:
+        return f"202{shcode[3]}{_MONTH_CODES.index(shcode[4]) + 1:02d}"
+    return ""
+
+def option_strike(shcode, hname=""):
+    """Strike from the trailing number of the name, else from the code's last 3 digits (x2/x7 = .5 strikes)."""
+    m = _STRIKE_RE.search(hname)
+    if m and "." in m.group(1): return float(m.group(1))
+    digits = shcode[-3:]
+    if not digits.isdigit(): return None
+    return int(digits) + (0.5 if digits[-1] in "27" else 0.0)
+
+def option_series(hname):
+    """"" for the monthly series, else the weekly tag ("W1".."W5" Thursday, "M1".."M5" Monday)."""
+    m = _SERIES_RE.search(hname)
+    if m: return m.group(1)
+    return "W" if "위클리" in hname or "WEEKLY" in hname.upper() else ""
+
+def normalize(item):
+    """t8401/t8402 row -> master record."""
+    shcode = item.get("shcode", "")
+    hname = (item.get("hname") or "").strip()
+    basecode = item.get("basecode") or ""
+    underlying = basecode[1:] if basecode.startswith("A") and len(basecode) == 7 else (basecode or "KOSPI200")
+    product = product_type(shcode, hname)
+    option = product in ("call", "put")
+    return {
+        "shcode": shcode,
+        "hname": hname,
+        "expcode": item.get("expcode", ""),
+        "underlying": underlying,
+        "product": product,
+        "expiry": expiry_month(shcode, hname),
+        "strike": option_strike(shcode, hname) if option else None,
+        "series": option_series(hname) if option else "",
+    }
+
+class SymbolMaster:
+    """
+    Futures/options symbol master, refreshed from t8401 + t8402 (+ t8433 index options) at most once per trading day.
+    Persisted as compact versioned JSON (field list + row arrays) so startup loads it in milliseconds,
+    with in-memory indexes by code, underlying, product type and expiry month.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.trade_date = ""
+        self.version = 0   # bumped on every load/refresh so dependants (ContractResolver) can drop caches
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._set_rows([])
+
+    def _set_rows(self, records):
+        by_code, by_underlying, by_product, by_expiry = {}, {}, {}, {}
+        for r in records:
+            by_code[r["shcode"]] = r
+            by_underlying.setdefault(r["underlying"], []).append(r)
+            by_product.setdefault(r["product"], []).append(r)
+            if r["expiry"]: by_expiry.setdefault(r["expiry"], []).append(r)
+        self._records = records
+        self.version += 1
+        self._by_code, self._by_underlying, self._by_product, self._by_expiry = by_code, by_underlying, by_product, by_expiry
+
+    def load(self):
+        """Load the persisted master. Returns True if a file of the current format was read."""
+        with self._lock:
+            self._loaded = True
+            if not os.path.exists(self.path): return False
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    doc = json.load(f)
+                if doc.get("version") != FORMAT_VERSION:
+                    print(f"[SymbolMaster] Ignoring {self.path}: format v{doc.get('version')} != v{FORMAT_VERSION}")
+                    return False
+                fields = doc["fields"]
+                self._set_rows([dict(zip(fields, row)) for row in doc["rows"]])
+                self.trade_date = doc.get("trade_date", "")
+                return True
+            except Exception as e:
+                print(f"[SymbolMaster] Could not read {self.path}: {e}")
+                return False
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.load()
+
+    def save(self):
+        with self._lock:
+            doc = {"version": FORMAT_VERSION, "trade_date": self.trade_date, "fields": FIELDS,
+                   "rows": [[r[f] for f in FIELDS] for r in self._records]}
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(doc, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, self.path)
+
+    def is_stale(self):
+        self._ensure_loaded()
+        return not self._records or self.trade_date != _today()
+
+    def refresh(self, trader):
+        """Rebuild from LS (t8402 index futures + t8401 stock futures + t8433 index options) and persist. Keeps the old master on failure."""
+        items = trader.get_futures_code_list()
+        if not items:
+            print("[SymbolMaster] Refresh returned no codes, keeping the current master.")
+            return False
+        items = items + trader.get_index_option_list()
+        records = [normalize(item) for item in items if item.get("shcode")]
+        with self._lock:
+            self._loaded = True
+            self._set_rows(records)
+            self.trade_date = _today()
+        try:
+            self.save()
+        except OSError as e:
+            print(f"[SymbolMaster] Could not save {self.path}: {e}")
+        print(f"[SymbolMaster] Refreshed: {len(records)} symbols")
+        return True
+
+    def ensure_fresh(self, trader):
+        """Refresh only if the persisted master is from an earlier trading day."""
+        if self.is_stale():
+            return self.refresh(trader)
+        return True
+
+    def __len__(self):
+        self._ensure_loaded()
+        return len(self._records)
+
+    def all(self):
+        """Every record in t8402 + t8401 order (index futures first)."""
+        self._ensure_loaded()
+        return self._records
+
+    def get(self, code):
+        self._ensure_loaded()
+        return self._by_code.get(code)
+
+    def name(self, code):
+        r = self.get(code)
+        return r["hname"] if r else None
+
+    def by_underlying(self, underlying):
+        self._ensure_loaded()
+        return self._by_underlying.get(underlying, [])
+
+    def by_product(self, product):
+        self._ensure_loaded()
+        return self._by_product.get(product, [])
+
+    def by_expiry(self, yyyymm):
+        self._ensure_loaded()
+        return self._by_expiry.get(yyyymm, [])
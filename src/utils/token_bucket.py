@@ -0,0 +1,35 @@
+import time
+
+class TokenBucket:
+    """Simple token bucket. Not thread-safe on its own; callers hold their own lock."""
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def delay(self, now=None):
+        """Seconds until one token is available (0 if available now)."""
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        if self.tokens >= 1: return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def try_acquire(self, now=None):
+        """Take one token if available. Returns 0 on success, otherwise seconds to wait."""
+        now = time.monotonic() if now is None else now
+        wait = self.delay(now)
+        if wait == 0:
+            self.tokens -= 1
+        return wait
+
+    def idle(self, now=None):
+        """True if the bucket is full, i.e. it can be dropped and recreated without changing behavior."""
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        return self.tokens >= self.capacity
@@ -0,0 +1,35 @@
+import os
+import sys
+import asyncio
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.services.async_runtime import AsyncBotRuntime
+
+class RecordingRuntime(AsyncBotRuntime):
+    def __init__(self, max_inflight):
+        super().__init__(None, "http://fake", None, "", "", max_inflight=max_inflight)
+        self.seen = {}
+        self.peak = 0
+
+    async def handle_message(self, chat_id, text):
+        self.peak = max(self.peak, self.inflight)
+        await asyncio.sleep(0.01)
+        self.seen.setdefault(chat_id, []).append(text)
+
+def test_per_chat_order_with_bounded_inflight():
+    async def scenario():
+        rt = RecordingRuntime(max_inflight=50)
+        rt._sem = asyncio.Semaphore(rt.max_inflight)
+        for i in range(5):
+            for chat_id in range(100):
+                rt.submit(chat_id, f"m{i}")
+        while rt._tasks:
+            await asyncio.sleep(0.01)
+        return rt
+
+    rt = asyncio.run(scenario())
+    assert all(rt.seen[c] == [f"m{i}" for i in range(5)] for c in range(100))
+    assert 1 < rt.peak <= 50
+    assert rt.stats()["processed"] == 500
@@ -0,0 +1,40 @@
+import os
+import sys
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.utils.bar_aggregator import StreamingBars, BarRing
+
+BASE = 1767571200   # 2026-01-05 09:00:00 KST
+
+def test_bars_close_on_next_bucket_with_vwap():
+    bars = StreamingBars(intervals=(1, 60))
+    closed = []
+    bars.on_close(lambda code, interval, bar: closed.append((interval, bar)))
+    bars.on_tick("A", 100.0, 1, BASE)
+    bars.on_tick("A", 102.0, 3, BASE + 0.5)
+    bars.on_tick("A", 99.0, 1, BASE + 1.2)       # closes the first 1s bar
+    assert closed == [(1, (20260105090000, 100.0, 102.0, 100.0, 102.0, 4, 101.5))]
+
+    bars.on_tick("A", 101.0, 2, BASE + 60)       # closes the 1s bar at :01 and the 09:00 minute
+    minute = bars.bars("A", 60)
+    assert minute == [(20260105090000, 100.0, 102.0, 99.0, 99.0, 5, (100 + 306 + 99) / 5)]
+    assert bars.forming("A", 60)[0] == 20260105090100
+    assert len(bars.bars("A", 1, include_forming=True)) == 3
+    assert bars.stats() == {"symbols": 1, "ticks": 4, "closed": 3}
+
+def test_ring_keeps_only_the_latest_bars():
+    ring = BarRing(3)
+    for i in range(5):
+        ring.append(i, 1, 1, 1, 1, 1, 1)
+    assert [b[0] for b in ring.last()] == [2, 3, 4] and [b[0] for b in ring.last(2)] == [3, 4]
+
+def test_fc0_messages_use_exchange_time():
+    bars = StreamingBars(intervals=(60,))
+    bars.on_message("FC0", "101H6000", {"price": "352.45", "cvolume": "2", "chetime": "090001"})
+    bars.on_message("FC0", "101H6000", {"price": "352.50", "cvolume": "1", "chetime": "090059"})
+    bars.on_message("FC0", "101H6000", {"price": "352.55", "cvolume": "1", "chetime": "090100"})
+    (ts, o, h, l, c, v, vwap), = bars.bars("101H6000", 60)
+    assert str(ts)[8:] == "090000" and (o, h, c, v) == (352.45, 352.5, 352.5, 3)
+    assert bars.codes() == ["101H6000"]
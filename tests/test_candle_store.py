@@ -0,0 +1,63 @@
+import os
+import sys
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.utils.candle_store import CandleStore
+
+class FakeTrader:
+    """Serves t4203-style 5-minute rows from a list, honouring max_rows/since like fetch_tr."""
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = []
+
+    def fetch_tr(self, tr_cd, code=None, max_rows=None, since=None, **params):
+        self.calls.append({"tr_cd": tr_cd, "max_rows": max_rows, "since": since, **params})
+        rows = [r for r in self.rows if not since or r["date"] >= since]
+        return rows[-max_rows:] if max_rows else rows
+
+def row(date, time, close, vol=100):
+    return {"date": date, "time": time, "open": close, "high": close + 1, "low": close - 1, "close": close, "jdiff_vol": vol}
+
+def test_incremental_append_and_disk_reads(tmp_path, monkeypatch):
+    store = CandleStore(str(tmp_path))
+    trader = FakeTrader([row("20260610", f"09{m:02d}00", 100 + m) for m in range(0, 50, 5)])
+
+    first = store.bars(trader, "stock_minute", "005930", interval=5, count=10)
+    assert [r["close"] for r in first] == [100.0 + m for m in range(0, 50, 5)]
+    assert trader.calls[0]["max_rows"] == 10 and trader.calls[0]["ncnt"] == 5
+
+    # fresh: served from disk without a TR
+    store.bars(trader, "stock_minute", "005930", interval=5, count=10)
+    assert len(trader.calls) == 1
+
+    # stale: one small TR from the last stored date; the in-progress last bar is rewritten
+    trader.rows[-1] = row("20260610", "094500", 999, vol=777)
+    trader.rows.append(row("20260610", "095000", 150))
+    store._synced.clear()
+    monkeypatch.setattr(os, "replace", lambda *a: (_ for _ in ()).throw(AssertionError("series rewritten")))
+    latest = store.bars(trader, "stock_minute", "005930", interval=5, count=3)
+    assert trader.calls[1]["since"] == "20260610" and trader.calls[1]["max_rows"] is None
+    assert [(r["time"], r["close"]) for r in latest] == [("094000", 140.0), ("094500", 999.0), ("095000", 150.0)]
+    assert store.count(store.key("stock_minute", "005930", 5)) == 11
+
+def test_range_query_and_backfill(tmp_path):
+    store = CandleStore(str(tmp_path))
+    key = store.key("stock_daily", "005930")
+    store.write(key, [(20260603000000 + d * 1000000, 1, 2, 0, d, 10) for d in range(3)])
+    store.write(key, [(20260601000000, 1, 2, 0, -2, 10), (20260602000000, 1, 2, 0, -1, 10)])   # older bars: rewrite
+
+    assert [b[4] for b in store.range(key)] == [-2, -1, 0, 1, 2]
+    assert [b[0] for b in store.range(key, 20260602000000, 20260604000000)] == [20260602000000, 20260603000000, 20260604000000]
+    assert store.range(key, start=20260606000000) == []
+
+def test_failed_syncs_are_counted_apart(tmp_path):
+    store = CandleStore(str(tmp_path))
+    trader = FakeTrader([row("20260610", "090000", 100)])
+    store.bars(trader, "stock_minute", "005930", interval=5, count=10)
+    trader.fetch_tr = lambda *a, **kw: None
+    store._synced.clear()
+    assert [r["close"] for r in store.bars(trader, "stock_minute", "005930", interval=5, count=10)] == [100.0]
+    stats = store.stats()
+    assert stats["fetches"] == 1 and stats["failed"] == 1
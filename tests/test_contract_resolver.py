@@ -0,0 +1,54 @@
+import os
+import sys
+from datetime import date
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.utils.symbol_master import SymbolMaster, normalize, product_type
+from src.utils.contract_resolver import ContractResolver, expiry_date
+
+def make_master(tmp_path, items):
+    master = SymbolMaster(str(tmp_path / "master.json"))
+    master._loaded = True
+    master._set_rows([normalize(i) for i in items])
+    return master
+
+ITEMS = [
+    {"hname": "코스피200 F 202609", "shcode": "A0169000"},
+    {"hname": "코스피200 F 202606", "shcode": "A0166000"},
+    {"hname": "미니코스피200 F 202606", "shcode": "A0566000"},
+    {"hname": "코스피200 F 202612", "shcode": "A016C000"},
+    {"hname": "삼성전자   F 202606", "shcode": "A1166000", "basecode": "A005930"},
+    {"hname": "삼성전자   F 202607", "shcode": "A1167000", "basecode": "A005930"},
+]
+
+def test_front_and_next_month_roll_after_expiry(tmp_path):
+    resolver = ContractResolver(make_master(tmp_path, ITEMS))
+    assert expiry_date("202606") == date(2026, 6, 11)
+
+    assert resolver.main_kospi200_future(date(2026, 6, 11)) == "A0166000"
+    assert resolver.next_month("KOSPI200", date(2026, 6, 11))["shcode"] == "A0169000"
+    # the day after expiry the chain rolls
+    assert resolver.main_kospi200_future(date(2026, 6, 12)) == "A0169000"
+    assert resolver.main_stock_future("005930", date(2026, 6, 12)) == "A1167000"
+    assert resolver.main_stock_future("000660", date(2026, 6, 12)) is None
+
+def test_roll_days_and_cache_invalidation(tmp_path):
+    master = make_master(tmp_path, ITEMS)
+    resolver = ContractResolver(master, roll_days=2)
+    assert resolver.main_kospi200_future(date(2026, 6, 9)) == "A0166000"
+    assert resolver.main_kospi200_future(date(2026, 6, 10)) == "A0169000"
+
+    master._set_rows([normalize(i) for i in ITEMS if i["shcode"] != "A0169000"])
+    assert resolver.main_kospi200_future(date(2026, 6, 10)) == "A016C000"
+
+def test_nearest_weekly_option():
+    assert ContractResolver.nearest_weekly_option(date(2026, 6, 9)) == {"expiry": "20260611", "weekday": "THU", "monthly": True}
+    assert ContractResolver.nearest_weekly_option(date(2026, 6, 12)) == {"expiry": "20260615", "weekday": "MON", "monthly": False}
+
+def test_spread_detection_ignores_kospi_in_names():
+    assert product_type("A0166000", "KOSPI200 F 202606") == "future"
+    assert product_type("A0166000", "kospi200 f 202606") == "future"
+    assert product_type("A0166000", "KOSPI200 F SP 2606-2609") == "spread"
+    assert product_type("A0166000", "코스피200 스프레드 2606") == "spread"
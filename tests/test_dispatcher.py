@@ -0,0 +1,52 @@
+import os
+import sys
+import threading
+import time
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.services.dispatcher import UpdateDispatcher
+
+def test_per_chat_order_and_bounded_pool():
+    seen = {}
+    lock = threading.Lock()
+    active = [0, 0]  # current, peak
+
+    def handler(chat_id, text):
+        with lock:
+            active[0] += 1
+            active[1] = max(active[1], active[0])
+        time.sleep(0.01)
+        with lock:
+            seen.setdefault(chat_id, []).append(text)
+            active[0] -= 1
+
+    d = UpdateDispatcher(handler, num_workers=3, max_queue_per_chat=100)
+    d.start()
+    for i in range(20):
+        for chat_id in (1, 2, 3, 4, 5):
+            d.submit(chat_id, f"m{i}")
+
+    deadline = time.time() + 10
+    while d.stats()["processed"] < 100 and time.time() < deadline:
+        time.sleep(0.01)
+    d.stop()
+
+    for chat_id in (1, 2, 3, 4, 5):
+        assert seen[chat_id] == [f"m{i}" for i in range(20)]
+    assert active[1] <= 3
+    stats = d.stats()
+    assert stats["processed"] == 100 and stats["pending"] == 0
+    assert stats["max_wait_ms"] > 0
+
+def test_full_chat_queue_drops():
+    gate = threading.Event()
+    d = UpdateDispatcher(lambda chat_id, text: gate.wait(5), num_workers=1, max_queue_per_chat=2)
+    d.start()
+    results = [d.submit(7, str(i)) for i in range(5)]
+    gate.set()
+    d.stop()
+    # The first update may already be taken by the worker, freeing one slot
+    assert results[:2] == [True, True]
+    assert results.count(False) == d.stats()["dropped"] >= 2
@@ -0,0 +1,62 @@
+import os
+import sys
+import asyncio
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.clients.gemini import GeminiAdvisor
+from src.clients.public_data import PublicDataClient
+from src.clients.async_clients import AsyncGeminiAdvisor, AsyncPublicDataClient
+
+QUOTA = (429, {"error": {"code": 429, "status": "RESOURCE_EXHAUSTED", "message": "RESOURCE_EXHAUSTED: quota"}})
+OK = (200, {"candidates": [{"content": {"parts": [{"text": "lite answer"}]}}]})
+
+class FakeGemini(GeminiAdvisor):
+    def __init__(self):
+        super().__init__("key")
+        self.urls = []
+
+    def _post(self, url, payload):
+        self.urls.append(url)
+        return OK if "lite" in url else QUOTA
+
+class FakeAsyncGemini(AsyncGeminiAdvisor):
+    def __init__(self):
+        super().__init__(None, "key")
+        self.urls = []
+
+    async def _post(self, url, payload):
+        self.urls.append(url)
+        return OK if "lite" in url else QUOTA
+
+def test_gemini_quota_fallback_is_the_same_blocking_and_async():
+    sync, async_ = FakeGemini(), FakeAsyncGemini()
+    assert sync._generate("hi") == "lite answer"
+    assert asyncio.run(async_._generate("hi")) == "lite answer"
+    assert sync.urls == async_.urls and len(sync.urls) == 2
+
+class FakePublicData(PublicDataClient):
+    def __init__(self):
+        super().__init__(service_key="key")
+        self.calls = []
+
+    def _request(self, endpoint, params):
+        self.calls.append((endpoint, dict(params)))
+        return {"totalCount": 1, "items": [{"basDt": params.get("basDt")}]} if len(self.calls) >= 3 else {"totalCount": 0, "items": []}
+
+class FakeAsyncPublicData(AsyncPublicDataClient):
+    def __init__(self):
+        super().__init__(None, service_key="key")
+        self.calls = []
+
+    async def _request(self, endpoint, params):
+        self.calls.append((endpoint, dict(params)))
+        return {"totalCount": 1, "items": [{"basDt": params.get("basDt")}]} if len(self.calls) >= 3 else {"totalCount": 0, "items": []}
+
+def test_public_data_date_lookup_is_the_same_blocking_and_async():
+    sync, async_ = FakePublicData(), FakeAsyncPublicData()
+    a = sync.get_futures_prices()
+    b = asyncio.run(async_.get_futures_prices())
+    assert a == b and a["date"]
+    assert sync.calls == async_.calls
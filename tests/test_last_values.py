@@ -0,0 +1,91 @@
+import os
+import sys
+import time
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.clients.xing_rest import XingRestTrader
+from src.clients.xing_realtime import XingRealtimeClient
+from src.utils.helpers import get_price_data, get_price_data_many
+from src.utils.last_values import LastValueStore
+
+def make_client():
+    trader = XingRestTrader("does_not_exist.json")
+    trader.access_token = "token"
+    trader.get_futures_price = lambda code: (_ for _ in ()).throw(AssertionError("REST called"))
+    return XingRealtimeClient(trader=trader)
+
+def feed(client, tr_cd, tr_key, body):
+    import json
+    client._on_message(None, json.dumps({"header": {"tr_cd": tr_cd}, "body": dict(body, tr_key=tr_key)}))
+
+def test_streamed_codes_skip_rest():
+    client = make_client()
+    feed(client, "FC0", "101H6000", {"futcode": "101H6000", "price": "352.45", "open": "350.00", "high": "353.00",
+                                     "low": "349.50", "change": "1.25", "cvolume": "2", "volume": "1200"})
+    data = get_price_data(client.trader, "101H6000")
+    assert data.price == 352.45 and data["_realtime"] and data["_source"] == "FC0" and data.volume == 1200
+    assert get_price_data_many(client.trader, ["101H6000"])["101H6000"].price == 352.45
+
+    # A later tick without session OHLC keeps the last known values
+    feed(client, "FC0", "101H6000", {"price": "352.50"})
+    data = get_price_data(client.trader, "101H6000")
+    assert data.price == 352.5 and data.high == 353.0
+
+def test_orderbook_and_freshness():
+    client = make_client()
+    feed(client, "FH0", "101H6000", {"offerho1": "352.50", "offerrem1": "7", "bidho1": "352.45", "bidrem1": "3"})
+    store = client.trader.last_values
+    book = store.orderbook("101H6000")
+    assert book.best_ask == 352.5 and book.best_bid == 352.45
+    assert store.orderbook("101H6000", max_age=-1) is None
+
+def test_stale_values_fall_back():
+    store = LastValueStore(max_age=5)
+    store.on_message("FC0", "101H6000", {"price": "1"})
+    store._quotes["101H6000"].fetched_at = time.time() - 6
+    assert store.quote("101H6000") is None
+    assert store.quote("101H6000", max_age=60).price == 1
+    store.clear()
+    assert store.quote("101H6000", max_age=60) is None
+    assert store.stats()["hits"] == 1 and store.stats()["misses"] == 2
+
+def test_async_runtime_reads_the_streamed_values():
+    import asyncio
+    from types import SimpleNamespace
+    from src.services.async_runtime import AsyncBotRuntime
+    from src.utils.helpers import get_price_data_async
+
+    client = make_client()
+    feed(client, "FC0", "101H6000", {"price": "352.45"})
+
+    async def scenario():
+        rt = AsyncBotRuntime(SimpleNamespace(trader=client.trader), "http://fake", None, "", "")
+        await rt._setup()
+        try:
+            assert rt.trader.last_values is client.trader.last_values
+            assert rt.trader.live_bars is client.trader.live_bars
+            return await get_price_data_async(rt.trader, "101H6000")
+        finally:
+            await rt.session.close()
+
+    data = asyncio.run(scenario())
+    assert data.price == 352.45 and data["_realtime"]
+
+def test_execution_messages_are_parsed_once(monkeypatch):
+    from src.clients.records import Tick
+    client = make_client()
+    parsed = []
+    from_ls = Tick.from_ls.__func__
+    monkeypatch.setattr(Tick, "from_ls", classmethod(lambda cls, body: parsed.append(1) or from_ls(cls, body)))
+    client.dispatcher.start()
+    try:
+        feed(client, "FC0", "101H6000", {"price": "352.45", "cvolume": "2", "chetime": "090001"})
+        deadline = time.time() + 5
+        while client.trader.live_bars.ticks < 1 and time.time() < deadline:
+            time.sleep(0.005)
+    finally:
+        client.dispatcher.stop()
+    assert client.trader.live_bars.ticks == 1 and client.trader.last_values.quote("101H6000").price == 352.45
+    assert len(parsed) == 1
@@ -0,0 +1,78 @@
+import os
+import sys
+import json
+import asyncio
+from types import SimpleNamespace
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.clients.xing_rest import XingRestTrader
+from src.clients.async_clients import AsyncXingRestTrader
+from src.handlers.nlp_router import NLPRouter
+from src.handlers.async_nlp_router import AsyncNLPRouter
+
+INTENTS = {
+    "삼성전자 가격": {"action": "price", "target_code": "005930"},
+    "야간 시황": {"action": "night_market"},
+    "시황 알려줘": {"action": "market"},
+}
+
+class Advisor:
+    def analyze_intent(self, text):
+        return json.dumps(INTENTS[text])
+
+    def format_response(self, text, data, data_type="price"):
+        return f"{data_type}: {data['asset_name']} {data['price']}"
+
+    def get_portfolio_strategy(self, user_portfolio_text, market_context):
+        prices = [line for line in market_context.splitlines() if line.startswith("- ")]
+        return "\n".join(prices) + market_context.split("[미국 증시 동향]")[1]
+
+class PublicData:
+    def get_market_summary(self):
+        raise RuntimeError("down")
+
+def _async(obj):
+    """The same fake with coroutine methods, as the async clients have."""
+    wrapped = SimpleNamespace()
+    for name in dir(obj):
+        if name.startswith("_"): continue
+        method = getattr(obj, name)
+        async def call(*args, _method=method, **kwargs):
+            return _method(*args, **kwargs)
+        setattr(wrapped, name, call)
+    return wrapped
+
+def make_bot(sent):
+    trader = XingRestTrader("does_not_exist.json")
+    trader.get_stock_price = lambda code: {"price": 70000}
+    trader.get_quotes = lambda codes: {code: {"price": 70000} for code in codes}
+    return SimpleNamespace(trader=trader, advisor=Advisor(), public_data=PublicData(), brave_client=None,
+                           send_message=lambda chat_id, text, **kw: sent.append(text))
+
+def test_blocking_and_async_routers_reply_alike():
+    blocking, concurrent = [], []
+    router = NLPRouter(make_bot(blocking))
+    for text in INTENTS:
+        router.handle(1, text)
+
+    bot = make_bot(concurrent)
+    async def scenario():
+        trader = AsyncXingRestTrader(None, "does_not_exist.json")
+        async def get_stock_price(code): return {"price": 70000}
+        async def get_quotes(codes): return {code: {"price": 70000} for code in codes}
+        trader.get_stock_price, trader.get_quotes = get_stock_price, get_quotes
+        clients = SimpleNamespace(trader=trader, advisor=_async(Advisor()), public_data=_async(PublicData()), brave_client=None)
+        router = AsyncNLPRouter(bot, clients)
+        for text in INTENTS:
+            await router.handle(1, text)
+    asyncio.run(scenario())
+
+    replies = [m for m in blocking if not m.startswith(("🧠", "📊"))]
+    assert replies == [
+        "price: 삼성전자 70000",
+        "야간 시황 조회 실패: down",     # an I/O error inside a step is handled where the flow expects it
+        "- 삼성전자 (005930): 70,000원\n미국 증시 검색 불가\n\n[국내 파생/현물 기초 데이터]\n한국 시장 요약 가져오기 실패: down",
+    ]
+    assert concurrent == blocking
@@ -0,0 +1,98 @@
+import os
+import sys
+import time
+from datetime import date
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.clients.realtime_dispatch import RealtimeDispatcher
+from src.clients.subscriptions import SubscriptionManager
+from src.utils.symbol_master import SymbolMaster, normalize
+from src.utils.contract_resolver import ContractResolver
+from src.utils.option_chain import OptionChain, ChainSubscriber
+
+OPTIONS = [
+    {"hname": "코스피200 C 202606 345.0", "shcode": "B0166345"},
+    {"hname": "코스피200 P 202606 345.0", "shcode": "C0166345"},
+    {"hname": "코스피200 C 202606 347.5", "shcode": "B0166347"},
+    {"hname": "코스피200 P 202606 347.5", "shcode": "C0166347"},
+    {"hname": "코스피200 C 2606W1 345.0", "shcode": "B0966W14"},
+    {"hname": "미니코스피200 C 202606 345.0", "shcode": "B0566345"},
+]
+
+def make_resolver(tmp_path):
+    master = SymbolMaster(str(tmp_path / "master.json"))
+    master._loaded = True
+    master._set_rows([normalize(i) for i in OPTIONS])
+    return ContractResolver(master)
+
+def test_master_parses_strikes_and_series(tmp_path):
+    resolver = make_resolver(tmp_path)
+    rec = resolver.master.get("C0166347")
+    assert (rec["product"], rec["strike"], rec["series"], rec["expiry"]) == ("put", 347.5, "", "202606")
+    assert resolver.master.get("B0966W14")["series"] == "W1"
+
+    monthly = resolver.option_series({"expiry": "20260611", "weekday": "THU", "monthly": True})
+    assert sorted(r["shcode"] for r in monthly) == ["B0166345", "B0166347", "C0166345", "C0166347"]
+    weekly = resolver.option_series(today=date(2026, 6, 4))   # first Thursday of June
+    assert [r["shcode"] for r in weekly] == ["B0966W14"]
+
+class FakeClient:
+    def __init__(self, capacity=None):
+        self.dispatcher = RealtimeDispatcher(num_workers=1)
+        self.subscriptions = SubscriptionManager(self, linger=0)
+        self.capacity = capacity
+        self.calls = []
+
+    def subscribe(self, tr_cd, tr_key):
+        if self.capacity is not None and len(self.calls) >= self.capacity: return False
+        self.calls.append((time.monotonic(), tr_cd, tr_key))
+        return True
+
+    def unsubscribe(self, tr_cd, tr_key):
+        pass
+
+def test_chain_snapshot_and_throttled_subscription(tmp_path):
+    records = make_resolver(tmp_path).option_series({"expiry": "20260611", "weekday": "THU", "monthly": True})
+    chain = OptionChain(records, "20260611")
+    client = FakeClient()
+    sub = ChainSubscriber(client, chain, batch_size=2, interval=0.05).start()
+    sub._thread.join(5)
+    assert sub.progress() == (4, 4) and len(client.calls) == 8
+    assert client.calls[4][0] - client.calls[3][0] >= 0.04   # second batch waited
+
+    client.dispatcher.start()
+    client.dispatcher.publish("OC0", "B0166345", {"price": "3.10", "volume": "1200"})
+    client.dispatcher.publish("OC0", "C0166345", {"price": "3.05"})
+    client.dispatcher.publish("OH0", "C0166347", {"offerho1": "4.20", "bidho1": "4.15", "offerrem1": "10", "bidrem1": "12"})
+    client.dispatcher.publish("OC0", "B0566345", {"price": "9.99"})   # not in this series
+    deadline = time.time() + 5
+    while chain.updates < 3 and time.time() < deadline:
+        time.sleep(0.005)
+    client.dispatcher.stop()
+
+    snap = chain.snapshot()
+    assert snap["strikes"] == [345.0, 347.5]
+    assert snap["call"]["last"] == [3.1, 0.0] and snap["call"]["volume"] == [1200.0, 0.0]
+    assert snap["put"]["bid"] == [0.0, 4.15] and snap["put"]["ask_qty"] == [0.0, 10.0]
+    assert chain.atm_index() == 0
+
+    sub.close()
+    assert client.subscriptions.stats()["active"] == 0 and client.dispatcher.stats()["subscribers"] == 0
+
+def test_refused_subscriptions_are_not_counted_as_coverage(tmp_path):
+    records = make_resolver(tmp_path).option_series({"expiry": "20260611", "weekday": "THU", "monthly": True})
+    client = FakeClient(capacity=5)
+    sub = ChainSubscriber(client, OptionChain(records, "20260611"), batch_size=10).start()
+    sub._thread.join(5)
+    assert sub.progress() == (2, 4) and sub.rejected == 2
+    assert client.subscriptions.stats()["reused"] == 0
+    sub.close()
+
+def test_master_option_records_get_no_stock_fallback(tmp_path, monkeypatch):
+    from src.utils import helpers
+    resolver = make_resolver(tmp_path)
+    assert resolver.master.get("B0166345")["underlying"] == "KOSPI200"
+    monkeypatch.setattr(helpers, "symbol_master", resolver.master)
+    assert [helpers._fallback_stock_code(r["shcode"]) for r in OPTIONS] == [None] * len(OPTIONS)
@@ -0,0 +1,44 @@
+import os
+import sys
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.utils.orderbook_engine import OrderBookEngine
+from src.utils.last_values import LastValueStore
+
+def fh0(asks, bids):
+    body = {}
+    for i, (px, qty) in enumerate(asks, 1):
+        body[f"offerho{i}"], body[f"offerrem{i}"] = f"{px:.2f}", str(qty)
+    for i, (px, qty) in enumerate(bids, 1):
+        body[f"bidho{i}"], body[f"bidrem{i}"] = f"{px:.2f}", str(qty)
+    return body
+
+def test_metrics_on_full_book():
+    engine = OrderBookEngine()
+    m = engine.update("101H6000", fh0([(352.50, 10), (352.55, 20), (352.60, 30), (352.65, 40), (352.70, 50)],
+                                       [(352.45, 30), (352.40, 20), (352.35, 10), (352.30, 10), (352.25, 10)]), now=1.0)
+    assert m.best_ask == 352.5 and m.best_bid == 352.45 and m.spread == 0.05
+    assert abs(m.microprice - (352.5 * 30 + 352.45 * 10) / 40) < 1e-9
+    assert m.imbalance_l1 == 0.5
+    assert m.cum_ask == (10, 30, 60, 100, 150) and m.cum_bid == (30, 50, 60, 70, 80)
+    assert abs(m.imbalance - (80 - 150) / 230) < 1e-9
+    assert engine.metrics("101H6000") is m
+
+def test_partial_update_changes_only_given_levels():
+    engine = OrderBookEngine()
+    engine.update("A", fh0([(10, 1), (11, 2)], [(9, 3), (8, 4)]), now=1.0)
+    m = engine.update("A", {"offerrem1": "5"}, now=2.0)
+    assert m.best_ask == 10 and m.cum_ask[:2] == (5, 7) and m.cum_bid[:2] == (3, 7)
+    book = engine.orderbook("A")
+    assert book.asks[:2] == [(10.0, 5), (11.0, 2)] and book["bid2_qty"] == 4
+
+def test_last_value_store_serves_fresh_metrics_only():
+    store = LastValueStore(max_age=5)
+    store.on_message("FH0", "101H6000", fh0([(352.50, 7)], [(352.45, 3)]))
+    assert store.book_metrics("101H6000").spread == 0.05
+    assert store.orderbook("101H6000").best_bid == 352.45
+    assert store.book_metrics("101H6000", max_age=-1) is None
+    store.clear()
+    assert store.book_metrics("101H6000") is None and store.stats()["orderbooks"] == 0
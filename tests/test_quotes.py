@@ -0,0 +1,82 @@
+import os
+import sys
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.clients.xing_rest import XingRestTrader
+from src.utils.helpers import get_price_data, get_price_data_many, _fallback_stock_code
+from src.utils.quote_cache import QuoteCache
+
+def make_trader():
+    trader = XingRestTrader("does_not_exist.json")
+    trader.access_token = "token"
+    trader.requests = []
+
+    def fake_fetch_tr(tr_cd, code=None, max_rows=None, since=None, **params):
+        trader.requests.append((tr_cd, params))
+        codes = [params["shcode"][i:i + 6] for i in range(0, len(params["shcode"]), 6)]
+        assert params["nrec"] == len(codes)
+        return [{"shcode": c, "price": str(int(c)), "open": "1", "high": "2", "low": "1"} for c in codes]
+
+    trader.fetch_tr = fake_fetch_tr
+    trader.get_futures_price = lambda code: {"price": "0", "open": "0", "high": "0", "low": "0"}
+    return trader
+
+def test_stocks_are_batched_in_chunks_of_50():
+    trader = make_trader()
+    codes = [f"{i:06d}" for i in range(1, 121)]
+    quotes = trader.get_quotes(codes + ["000001"])
+
+    assert len(trader.requests) == 3
+    assert [r[1]["nrec"] for r in trader.requests] == [50, 50, 20]
+    assert quotes["000120"]["price"] == 120
+    assert list(quotes) == codes
+
+def test_futures_without_price_fall_back_to_underlying():
+    trader = make_trader()
+    quotes = get_price_data_many(trader, ["101H6000", "000660"])
+
+    assert quotes["101H6000"]["price"] == 5930
+    assert quotes["101H6000"]["_fallback_note"] == "Derived from Stock 005930"
+    assert quotes["000660"]["price"] == 660
+
+def test_options_without_trades_have_no_stock_fallback():
+    assert _fallback_stock_code("A0166000") == "005930"
+    assert _fallback_stock_code("B0166345") is None
+    assert _fallback_stock_code("201W6345") is None
+    assert _fallback_stock_code("301W6345") is None
+
+    trader = make_trader()
+    quotes = get_price_data_many(trader, ["201W6345"])
+    assert "_fallback_note" not in quotes["201W6345"]
+
+def test_quote_cache_serves_fresh_quotes_and_honours_max_age():
+    trader = make_trader()
+    calls = []
+    def stock_price(code):
+        calls.append(code)
+        return {"price": "70000", "open": "1", "high": "2", "low": "1"}
+    trader.get_stock_price = stock_price
+
+    first = get_price_data(trader, "005930")
+    assert first["_source"] == "t1102" and "_cached" not in first
+
+    second = get_price_data(trader, "005930")
+    assert second["_cached"] and second["_age"] >= 0 and second["_fetched_at"] == first["_fetched_at"]
+    assert calls == ["005930"]
+
+    get_price_data(trader, "005930", max_age=0)
+    assert calls == ["005930", "005930"]
+
+    # batched lookups reuse the cache and only fetch what is missing
+    quotes = get_price_data_many(trader, ["005930", "000660"])
+    assert quotes["005930"]["_cached"] and quotes["000660"]["_source"] == "t8407"
+    assert [r[1]["shcode"] for r in trader.requests] == ["000660"]
+
+def test_quote_cache_is_bounded():
+    cache = QuoteCache(max_entries=2)
+    for code in ("000001", "000002", "000003"):
+        cache.put(code, {"price": "1"}, "t1102")
+    assert cache.get("000001") is None and cache.get("000003")["price"] == "1"
+    assert cache.stats()["evictions"] == 1
@@ -0,0 +1,58 @@
+import os
+import sys
+import time
+import threading
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.clients.rate_limiter import TRRateLimiter, call_priority, current_priority, PRIORITY_ALERT, PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, PRIORITY_ORDER
+
+def test_waiters_are_served_by_priority():
+    limiter = TRRateLimiter({"t1102": 20})
+    limiter.acquire("t1102")   # use up the only token, so everyone below has to queue
+    served = []
+
+    def call(priority, name):
+        limiter.acquire("t1102", priority)
+        served.append(name)
+
+    threads = []
+    for priority, name in [(PRIORITY_BACKGROUND, "bg"), (PRIORITY_INTERACTIVE, "user"), (PRIORITY_ALERT, "alert")]:
+        t = threading.Thread(target=call, args=(priority, name))
+        t.start()
+        threads.append(t)
+        time.sleep(0.01)
+    for t in threads: t.join(timeout=5)
+
+    assert served == ["alert", "user", "bg"]
+    stats = limiter.stats()["t1102"]
+    assert stats["calls"] == 4 and stats["throttled"] == 3 and stats["waiting"] == 0
+
+def test_rate_is_enforced():
+    limiter = TRRateLimiter({"t8413": 50})
+    started = time.monotonic()
+    for _ in range(6):
+        limiter.acquire("t8413")
+    assert time.monotonic() - started >= 5 / 50 * 0.9
+
+def test_thread_priority_context():
+    assert current_priority("t1102") == PRIORITY_INTERACTIVE
+    with call_priority(PRIORITY_BACKGROUND):
+        assert current_priority("t1102") == PRIORITY_BACKGROUND
+        assert current_priority("CFOAT00100") == PRIORITY_ORDER
+    assert current_priority("t1102") == PRIORITY_INTERACTIVE
+
+def test_polling_callers_count_one_throttle_with_their_wait():
+    limiter = TRRateLimiter({"t1102": 20})
+    assert limiter.try_acquire("t1102") == 0
+    polls = 0
+    started = time.monotonic()
+    while limiter.try_acquire("t1102") > 0:
+        polls += 1
+        time.sleep(0.01)
+    limiter.record_wait("t1102", time.monotonic() - started)
+    assert polls > 1
+    stats = limiter.stats()["t1102"]
+    assert stats["calls"] == 2 and stats["throttled"] == 1
+    assert 30 <= stats["avg_wait_ms"] == stats["max_wait_ms"]
@@ -0,0 +1,65 @@
+import os
+import sys
+import json
+import threading
+import time
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.clients.realtime_dispatch import RealtimeDispatcher, QUEUE
+from src.clients.xing_rest import XingRestTrader
+from src.clients.xing_realtime import XingRealtimeClient
+
+def wait_for(cond, timeout=5):
+    deadline = time.time() + timeout
+    while not cond() and time.time() < deadline:
+        time.sleep(0.005)
+    return cond()
+
+def test_callbacks_run_off_the_receive_thread():
+    client = XingRealtimeClient(trader=XingRestTrader("does_not_exist.json"))
+    seen = []
+    def on_exec(tr_cd, tr_key, body):
+        seen.append((threading.current_thread().name, body["price"]))
+    client.on_callback("FC0", on_exec)
+    client.dispatcher.start()
+    client._on_message(None, json.dumps({"header": {"tr_cd": "FC0"}, "body": {"tr_key": "101H6000", "price": "1"}}))
+    assert wait_for(lambda: seen)
+    client.dispatcher.stop()
+    assert seen[0][0].startswith("realtime-") and seen[0][1] == "1"
+    assert client.remove_callback("FC0", on_exec) and not client.remove_callback("FC0", on_exec)
+
+def test_slow_subscriber_does_not_stall_others():
+    d = RealtimeDispatcher(num_workers=2)
+    gate = threading.Event()
+    fast = []
+    d.add("FC0", lambda *a: gate.wait(5))
+    d.add("FC0", lambda tr_cd, tr_key, body: fast.append(body))
+    d.start()
+    for i in range(50):
+        d.publish("FC0", "A", i)
+    assert wait_for(lambda: len(fast) == 50)
+    assert fast == list(range(50))
+    gate.set()
+    assert wait_for(lambda: d.stats()["pending"] == 0)
+    d.stop()
+    assert d.stats()["delivered"] == 100
+
+def test_bounded_queue_drops_oldest_and_conflation_keeps_latest():
+    d = RealtimeDispatcher(num_workers=1)
+    ticks, books = [], []
+    d.add("FC0", lambda tr_cd, tr_key, body: ticks.append(body), policy=QUEUE, max_queue=3)
+    d.add("FH0", lambda tr_cd, tr_key, body: books.append((tr_key, body)))   # conflates by default
+    for i in range(10):
+        d.publish("FC0", "A", i)
+        d.publish("FH0", "A", i)
+        d.publish("FH0", "B", i)
+    d.start()
+    assert wait_for(lambda: len(ticks) == 3 and len(books) == 2)
+    d.stop()
+    assert ticks == [7, 8, 9]
+    assert books == [("A", 9), ("B", 9)]
+    stats = d.stats()
+    assert stats["dropped"] == 7 and stats["conflated"] == 18 and stats["pending"] == 0
+    assert stats["max_lag_ms"] > 0
@@ -0,0 +1,99 @@
+import os
+import sys
+import json
+import time
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.clients.realtime_pool import ConnectionPool
+from src.clients.xing_realtime import XingRealtimeClient
+from src.clients.xing_rest import XingRestTrader
+
+class FakeConnection:
+    def __init__(self, index, connected=True):
+        self.index = index
+        self.connected = connected
+        self.subscriptions = {}
+        self.messages = 0
+        self.connects = 0
+        self.sent = []
+
+    def is_connected(self):
+        return self.connected
+
+    def send(self, tr_cd, tr_key, tr_type):
+        if not self.connected: return False
+        self.sent.append((tr_type, tr_cd, tr_key))
+        return True
+
+def _loads(pool):
+    return [len(c.subscriptions) for c in pool.connections]
+
+def test_keys_spread_by_load_and_respect_cap():
+    pool = ConnectionPool([FakeConnection(0), FakeConnection(1), FakeConnection(2)], max_per_connection=2)
+    for i in range(6):
+        assert pool.subscribe("OC0", f"2016{i:04d}") is not None
+    assert _loads(pool) == [2, 2, 2]
+    assert pool.subscribe("OC0", "20160000").index == 0   # already subscribed: same connection, no resend
+    assert pool.subscribe("OC0", "20169999") is None
+    assert pool.stats()["rejected"] == 1
+
+    pool.unsubscribe("OC0", "20160001")
+    assert ("4", "OC0", "20160001") in pool.connections[1].sent
+    assert pool.subscribe("OC0", "20169999").index == 1
+
+def test_dropped_connection_moves_keys_and_rebalances_on_reconnect():
+    a, b = FakeConnection(0), FakeConnection(1)
+    pool = ConnectionPool([a, b])
+    for i in range(10):
+        pool.subscribe("FC0", f"1{i:02d}H6000")
+    assert _loads(pool) == [5, 5]
+
+    b.connected = False
+    pool.on_close(b)
+    assert _loads(pool) == [10, 0]
+    assert all(sent for sent in a.subscriptions.values())
+    assert all(pool.owner(*key) is a for key in pool.subscribed())
+
+    b.connected = True
+    assert pool.on_open(b) == 5
+    assert _loads(pool) == [5, 5]
+    assert sum(1 for t, _, _ in a.sent if t == "4") == 5   # moved keys are unsubscribed on the busy connection
+    assert pool.stats()["moved"] == 10
+
+def test_keys_queued_while_everything_is_down_go_to_the_first_connection_up():
+    a, b = FakeConnection(0, connected=False), FakeConnection(1, connected=False)
+    pool = ConnectionPool([a, b])
+    pool.subscribe("FH0", "101H6000")
+    pool.subscribe("FH0", "105H6000")
+    assert _loads(pool) == [1, 1] and not a.sent and not b.sent
+
+    a.connected = True
+    pool.on_open(a)
+    assert a.sent == [("3", "FH0", "101H6000"), ("3", "FH0", "105H6000")]
+    assert _loads(pool) == [2, 0]   # b's queued key is served by a instead of waiting for b
+    assert pool.owner("FH0", "105H6000") is a
+
+    b.connected = True
+    assert pool.on_open(b) == 1
+    assert _loads(pool) == [1, 1]
+
+def test_every_connection_feeds_the_same_pipeline():
+    client = XingRealtimeClient(trader=XingRestTrader("does_not_exist.json"), connections=3)
+    assert len(client.pool.connections) == 3
+    seen = []
+    client.on_callback("FC0", lambda tr_cd, tr_key, body: seen.append(tr_key))
+    client.dispatcher.start()
+    try:
+        for conn, code in zip(client.pool.connections, ("101H6000", "105H6000", "106H6000")):
+            message = {"header": {"tr_cd": "FC0"}, "body": {"tr_key": code, "price": "350.00", "cvolume": "1", "chetime": "090000"}}
+            conn._on_message(None, json.dumps(message))
+        deadline = time.time() + 5
+        while len(seen) < 3 and time.time() < deadline:
+            time.sleep(0.005)
+    finally:
+        client.dispatcher.stop()
+    assert sorted(seen) == ["101H6000", "105H6000", "106H6000"]
+    assert [c["messages"] for c in client.pool.stats()["connections"]] == [1, 1, 1]
+    assert client.trader.last_values.quote("105H6000") is not None
@@ -0,0 +1,58 @@
+import os
+import sys
+import json
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.clients.records import Quote, Tick, Bar, OrderBook, parse_number, to_json
+from src.clients.public_data import PublicDataClient
+from src.utils.quote_cache import QuoteCache
+
+def test_parse_number():
+    assert parse_number("70,000") == 70000 and isinstance(parse_number("70,000"), int)
+    assert parse_number(" 352.45 ") == 352.45
+    assert parse_number("-1.5") == -1.5
+    assert parse_number("") == 0 and parse_number(None) == 0
+    assert parse_number("-", default="-") == "-"
+
+def test_quote_parses_once_and_reads_like_a_dict():
+    q = Quote.from_ls("005930", {"price": "70,000", "open": "69500", "high": "70500", "low": "69000", "change": "500"})
+    assert (q.price, q.open, q.high, q.low, q.change) == (70000, 69500, 70500, 69000, 500)
+    assert q["price"] == 70000 and q.get("volume", "n/a") == "n/a"
+
+    q["_fallback_note"] = "Derived"
+    q["_source"] = "t1102"
+    assert q.source == "t1102" and q.extra == {"_fallback_note": "Derived"}
+    assert "_fallback_note" in q and "_age" not in q
+
+    clone = q.copy()
+    clone["_age"] = 1.0
+    assert "_age" not in q
+    assert json.loads(json.dumps(q, default=to_json))["price"] == 70000
+    assert not hasattr(q, "__dict__")
+
+def test_quote_cache_stores_records():
+    cache = QuoteCache()
+    cache.put("005930", Quote.from_ls("005930", {"price": "100"}), "t1102")
+    hit = cache.get("005930")
+    assert isinstance(hit, Quote) and hit["_cached"] and hit.price == 100 and hit["_source"] == "t1102"
+
+def test_tick_bar_and_orderbook():
+    tick = Tick.from_ls({"futcode": "101H6000", "price": "352.45", "cvolume": "3", "chetime": "090001", "cgubun": "2"})
+    assert tick.price == 352.45 and tick.volume == 3 and tick["buysell"] == "2"
+
+    bar = Bar.from_ls({"date": "20260105", "time": "0901", "open": "1", "high": "3", "low": "1", "close": "2", "jdiff_vol": "1,000"})
+    assert bar.astuple() == (20260105090100, 1.0, 3.0, 1.0, 2.0, 1000)
+
+    body = {"futcode": "101H6000"}
+    for i in range(1, 6):
+        body.update({f"offerho{i}": f"{350 + i}.00", f"offerrem{i}": str(i), f"bidho{i}": f"{350 - i}.00", f"bidrem{i}": str(10 * i)})
+    ob = OrderBook.from_ls(body)
+    assert ob.best_ask == 351.0 and ob.best_bid == 349.0
+    assert ob.get("ask5") == 355.0 and ob["bid2_qty"] == 20 and ob.get("ask6", "-") == "-"
+
+def test_public_data_numeric_fields_parsed_at_the_boundary():
+    data = {"response": {"body": {"totalCount": 1, "items": {"item": {"itmsNm": "F 202606", "clpr": "352.45", "trqu": "1,234", "iptVlty": "-"}}}}}
+    items = PublicDataClient._parse_items(data)["items"]
+    assert items[0]["clpr"] == 352.45 and items[0]["trqu"] == 1234 and items[0]["iptVlty"] == "-"
@@ -0,0 +1,61 @@
+import os
+import sys
+import time
+import asyncio
+import threading
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.utils.single_flight import SingleFlight, AsyncSingleFlight
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    calls = []
+    def fetch(code):
+        calls.append(code)
+        time.sleep(0.1)
+        return {"price": "100"}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do(("t1102", "005930"), fetch, "005930"))) for _ in range(8)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+
+    assert calls == ["005930"]
+    assert all(r == {"price": "100"} for r in results)
+    assert len({id(r) for r in results}) == 8   # each caller gets its own copy
+    s = flight.stats()
+    assert s["calls"] == 8 and s["executed"] == 1 and s["merged"] == 7 and s["inflight"] == 0
+
+    # finished calls are not cached
+    flight.do(("t1102", "005930"), fetch, "005930")
+    assert len(calls) == 2
+
+def test_errors_reach_every_waiter():
+    flight = SingleFlight()
+    def boom():
+        time.sleep(0.05)
+        raise ValueError("down")
+    errors = []
+    def call():
+        try: flight.do("k", boom)
+        except ValueError as e: errors.append(e)
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert len(errors) == 3
+
+def test_async_single_flight():
+    flight = AsyncSingleFlight()
+    calls = []
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return 42
+
+    async def main():
+        return await asyncio.gather(*(flight.do("k", fetch) for _ in range(5)))
+
+    assert asyncio.run(main()) == [42] * 5
+    assert len(calls) == 1 and flight.stats()["merged"] == 4
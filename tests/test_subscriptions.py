@@ -0,0 +1,73 @@
+import os
+import sys
+import time
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.clients.realtime_dispatch import RealtimeDispatcher
+from src.clients.subscriptions import SubscriptionManager
+
+class FakeClient:
+    def __init__(self, full=False):
+        self.dispatcher = RealtimeDispatcher(num_workers=1)
+        self.full = full
+        self.calls = []
+
+    def subscribe(self, tr_cd, tr_key):
+        if self.full: return False
+        self.calls.append(("sub", tr_cd, tr_key))
+        return True
+
+    def unsubscribe(self, tr_cd, tr_key):
+        self.calls.append(("unsub", tr_cd, tr_key))
+
+def test_shared_feed_survives_one_viewer_leaving():
+    client = FakeClient()
+    mgr = SubscriptionManager(client, linger=0)
+    a_seen, b_seen = [], []
+    a = mgr.acquire("FC0", "101H6000", lambda tr_cd, tr_key, body: a_seen.append(body))
+    with mgr.acquire("FC0", "101H6000", lambda tr_cd, tr_key, body: b_seen.append(body)):
+        assert mgr.refcount("FC0", "101H6000") == 2
+    assert client.calls == [("sub", "FC0", "101H6000")]
+
+    client.dispatcher.publish("FC0", "101H6000", 1)
+    client.dispatcher.publish("FC0", "105H6000", 2)   # other key: not delivered to this handle
+    client.dispatcher.start()
+    deadline = time.time() + 5
+    while not a_seen and time.time() < deadline:
+        time.sleep(0.005)
+    client.dispatcher.stop()
+    assert a_seen == [1] and b_seen == []
+
+    a.close()
+    a.close()
+    assert client.calls[-1] == ("unsub", "FC0", "101H6000")
+    assert mgr.stats() == {"active": 0, "handles": 0, "lingering": 0, "subscribes": 1, "unsubscribes": 1, "reused": 1, "rejected": 0}
+
+def test_linger_avoids_resubscribe_churn():
+    client = FakeClient()
+    mgr = SubscriptionManager(client, linger=0.2)
+    for _ in range(5):
+        with mgr.acquire("FH0", "101H6000"):
+            pass
+    assert client.calls == [("sub", "FH0", "101H6000")]
+    assert mgr.stats()["lingering"] == 1
+
+    deadline = time.time() + 5
+    while len(client.calls) < 2 and time.time() < deadline:
+        time.sleep(0.01)
+    assert client.calls == [("sub", "FH0", "101H6000"), ("unsub", "FH0", "101H6000")]
+    assert mgr.stats()["reused"] == 4
+
+def test_refused_subscription_opens_no_handle():
+    client = FakeClient(full=True)
+    mgr = SubscriptionManager(client, linger=0)
+    assert mgr.acquire("OC0", "B0166345", lambda tr_cd, tr_key, body: None) is None
+    assert mgr.acquire("OC0", "B0166345") is None
+    assert mgr.refcount("OC0", "B0166345") == 0 and not client.dispatcher.has_subscribers("OC0")
+    assert mgr.stats()["rejected"] == 2 and mgr.stats()["reused"] == 0
+
+    client.full = False   # room again: the next acquire subscribes for real
+    assert mgr.acquire("OC0", "B0166345") is not None
+    assert client.calls == [("sub", "OC0", "B0166345")]
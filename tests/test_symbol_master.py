@@ -0,0 +1,51 @@
+import os
+import sys
+import json
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.utils.symbol_master import SymbolMaster, FORMAT_VERSION
+
+class FakeTrader:
+    def __init__(self):
+        self.calls = 0
+
+    def get_futures_code_list(self):
+        self.calls += 1
+        return [
+            {"hname": "코스피200 F 202606", "shcode": "A0166000", "expcode": "KR4A01660007"},
+            {"hname": "삼성전자   F 202604", "shcode": "A1164000", "expcode": "KR4A11640005", "basecode": "A005930"},
+            {"hname": "삼성전자   F 202605", "shcode": "A1165000", "expcode": "KR4A11650004", "basecode": "A005930"},
+            {"hname": "삼성전자   SP 2604-2605", "shcode": "D1164000", "expcode": "KR4D11640000", "basecode": "A005930"},
+        ]
+
+    def get_index_option_list(self):
+        return []
+
+def test_refresh_persists_compact_master_and_indexes(tmp_path):
+    path = str(tmp_path / "symbol_master.json")
+    trader = FakeTrader()
+    master = SymbolMaster(path)
+    assert master.ensure_fresh(trader) and trader.calls == 1
+
+    with open(path, encoding="utf-8") as f:
+        doc = json.load(f)
+    assert doc["version"] == FORMAT_VERSION and len(doc["rows"]) == 4 and "\n" not in open(path, encoding="utf-8").read()
+
+    reloaded = SymbolMaster(path)
+    assert not reloaded.is_stale()
+    reloaded.ensure_fresh(trader)
+    assert trader.calls == 1   # same trading day: no refetch
+
+    assert reloaded.name("A1164000") == "삼성전자   F 202604"
+    assert [r["shcode"] for r in reloaded.by_underlying("005930")] == ["A1164000", "A1165000", "D1164000"]
+    assert [r["shcode"] for r in reloaded.by_underlying("KOSPI200")] == ["A0166000"]
+    assert [r["shcode"] for r in reloaded.by_product("spread")] == ["D1164000"]
+    assert [r["shcode"] for r in reloaded.by_expiry("202604")] == ["A1164000", "D1164000"]   # spread: near leg
+
+def test_other_format_versions_are_ignored(tmp_path):
+    path = tmp_path / "symbol_master.json"
+    path.write_text(json.dumps({"version": FORMAT_VERSION + 1, "fields": [], "rows": []}), encoding="utf-8")
+    master = SymbolMaster(str(path))
+    assert not master.load() and master.is_stale()
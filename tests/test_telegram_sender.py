@@ -0,0 +1,60 @@
+import os
+import sys
+import time
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.services.telegram_sender import TelegramSender, PRIORITY_ALERT, PRIORITY_BULK
+
+class FakeResponse:
+    def __init__(self, data): self.data = data
+    def json(self): return self.data
+
+class FakeSession:
+    def __init__(self, replies=None):
+        self.calls = []
+        self.replies = list(replies or [])
+
+    def post(self, url, json=None, timeout=None):
+        self.calls.append(json)
+        return FakeResponse(self.replies.pop(0) if self.replies else {"ok": True})
+
+def _drain(sender, count, timeout=5):
+    deadline = time.time() + timeout
+    while len(sender.session.calls) < count and time.time() < deadline:
+        time.sleep(0.01)
+
+def test_alert_lane_goes_first():
+    sender = TelegramSender("http://fake", per_chat_rate=100, per_chat_burst=100)
+    sender.session = FakeSession()
+    sender.send(1, "report", priority=PRIORITY_BULK)
+    sender.send(1, "normal")
+    sender.send(1, "alert", priority=PRIORITY_ALERT)
+    sender.start()
+    _drain(sender, 3)
+    sender.stop()
+    assert [c["text"] for c in sender.session.calls] == ["alert", "normal", "report"]
+    assert sender.stats()["sent"] == 3 and sender.stats()["backlog"] == 0
+
+def test_per_chat_rate_does_not_block_other_chats():
+    sender = TelegramSender("http://fake", per_chat_rate=1, per_chat_burst=1)
+    sender.session = FakeSession()
+    for text in ("a1", "a2", "a3"):
+        sender.send("A", text)
+    sender.send("B", "b1")
+    sender.start()
+    _drain(sender, 2, timeout=0.5)
+    sender.stop()
+    assert [c["text"] for c in sender.session.calls] == ["a1", "b1"]
+
+def test_parse_error_falls_back_to_plain_text():
+    sender = TelegramSender("http://fake", per_chat_rate=100, per_chat_burst=100)
+    sender.session = FakeSession([{"ok": False, "description": "Bad Request: can't parse entities"}])
+    sender.send(1, "*broken")
+    sender.start()
+    _drain(sender, 2)
+    sender.stop()
+    assert sender.session.calls[0]["parse_mode"] == "Markdown"
+    assert "parse_mode" not in sender.session.calls[1]
+    assert sender.stats()["sent"] == 1
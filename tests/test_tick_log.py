@@ -0,0 +1,89 @@
+import os
+import sys
+import json
+import time
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.clients.tick_log import TickRecorder, TickReplayer, read_ticks, HEADER
+from src.clients.xing_rest import XingRestTrader
+from src.clients.xing_realtime import XingRealtimeClient
+
+def message(tr_cd, tr_key, **body):
+    return json.dumps({"header": {"tr_cd": tr_cd}, "body": dict(body, tr_key=tr_key)})
+
+def test_record_from_client_and_replay(tmp_path):
+    recorder = TickRecorder(str(tmp_path))
+    client = XingRealtimeClient(trader=XingRestTrader("does_not_exist.json"), recorder=recorder)
+    for i in range(5):
+        client._on_message(None, message("FC0", "101H6000", price=f"352.{i}0", cvolume="1"))
+    client._on_message(None, message("FH0", "101H6000", offerho1="352.50", bidho1="352.45"))
+    client._on_message(None, json.dumps({"header": {"tr_cd": "FC0", "rsp_cd": "00000", "rsp_msg": "ok"}, "body": {}}))
+    recorder.close()
+
+    ticks = list(read_ticks(recorder.path))
+    assert [t[1] for t in ticks] == ["FC0"] * 5 + ["FH0"]
+    assert ticks[0][2] == "101H6000" and ticks[4][3]["price"] == "352.40"
+    assert ticks[0][0] <= ticks[-1][0]
+
+    replayed = XingRealtimeClient(trader=XingRestTrader("does_not_exist.json"))
+    seen = []
+    replayed.on_callback("FC0", lambda tr_cd, tr_key, body: seen.append(body["price"]))
+    replayed.dispatcher.start()
+    result = TickReplayer(recorder.path, trs=["FC0"]).replay(replayed)
+    deadline = time.time() + 5
+    while len(seen) < 5 and time.time() < deadline:
+        time.sleep(0.005)
+    replayed.dispatcher.stop()
+    assert result["messages"] == 5 and seen == [f"352.{i}0" for i in range(5)]
+    assert replayed.trader.last_values.quote("101H6000", max_age=60).price == 352.4
+
+def test_rotation_paced_replay_and_torn_tail(tmp_path):
+    recorder = TickRecorder(str(tmp_path))
+    day1 = 1767571200.0    # 2026-01-05 09:00 KST
+    recorder.record("FC0", "A", {"price": "1"}, now=day1)
+    recorder.record("FC0", "A", {"price": "2"}, now=day1 + 0.2)
+    first = recorder.path
+    recorder.record("FC0", "A", {"price": "3"}, now=day1 + 86400)
+    recorder.close()
+    assert os.path.basename(first) == "20260105.ticks" and os.path.basename(recorder.path) == "20260106.ticks"
+
+    with open(first, "ab") as f:
+        f.write(HEADER.pack(100, day1, b"FC0") + b"[\"A\"")   # crash mid-record
+    got = []
+    result = TickReplayer(first).replay(lambda tr_cd, tr_key, body: got.append(body["price"]), speed=2)
+    assert got == ["1", "2"]
+    assert result["seconds"] >= 0.09
+
+def test_restart_after_torn_tail_truncates_before_appending(tmp_path):
+    day1 = 1767571200.0
+    recorder = TickRecorder(str(tmp_path))
+    recorder.record("FC0", "A", {"price": "1"}, now=day1)
+    recorder.close()
+    with open(recorder.path, "ab") as f:
+        f.write(HEADER.pack(100, day1, b"FC0") + b"[\"A\"")   # crash mid-record
+
+    restarted = TickRecorder(str(tmp_path))
+    for i in range(2, 7):
+        restarted.record("FC0", "A", {"price": str(i)}, now=day1 + i)
+    restarted.close()
+    assert restarted.path == recorder.path
+    assert [body["price"] for _, _, _, body in read_ticks(restarted.path)] == [str(i) for i in range(1, 7)]
+
+def test_replayed_bars_keep_the_recorded_day(tmp_path):
+    day1 = 1767571200.0    # 2026-01-05 09:00 KST
+    recorder = TickRecorder(str(tmp_path))
+    recorder.record("FC0", "101H6000", {"price": "352.00", "cvolume": "1", "chetime": "090000"}, now=day1)
+    recorder.record("FC0", "101H6000", {"price": "352.50", "cvolume": "2", "chetime": "090100"}, now=day1 + 60)
+    recorder.close()
+
+    client = XingRealtimeClient(trader=XingRestTrader("does_not_exist.json"))
+    client.dispatcher.start()
+    TickReplayer(recorder.path).replay(client)
+    bars = client.trader.live_bars
+    deadline = time.time() + 5
+    while bars.stats()["ticks"] < 2 and time.time() < deadline:
+        time.sleep(0.005)
+    client.dispatcher.stop()
+    assert [bar[0] for bar in bars.bars("101H6000", 60, include_forming=True)] == [20260105090000, 20260105090100]
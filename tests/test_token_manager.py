@@ -0,0 +1,88 @@
+import os
+import sys
+import time
+import threading
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.clients.token_manager import TokenManager
+
+def test_single_flight_refresh_and_disk_cache(tmp_path):
+    calls = []
+    def fetch():
+        calls.append(1)
+        time.sleep(0.05)
+        return f"tok{len(calls)}", 3600
+
+    cache = str(tmp_path / "token.json")
+    tm = TokenManager(fetch, cache_file=cache, app_key="k")
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(tm.get_token())) for _ in range(10)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert results == ["tok1"] * 10 and len(calls) == 1
+
+    # A restart reads the cached token instead of calling OAuth again
+    tm2 = TokenManager(fetch, cache_file=cache, app_key="k")
+    assert tm2.get_token() == "tok1" and len(calls) == 1
+    # ...but not a token issued for a different app key
+    assert TokenManager(fetch, cache_file=cache, app_key="other").peek() is None
+
+def test_invalidate_and_refresh_margin():
+    issued = iter([("a", 3600), ("b", 100), ("c", 3600)])
+    tm = TokenManager(lambda: next(issued), refresh_margin=600)
+    assert tm.get_token() == "a"
+    tm.invalidate("stale")            # someone else's old token: ignored
+    assert tm.get_token() == "a"
+    tm.invalidate("a")
+    assert tm.get_token() == "b"      # expires within the margin...
+    assert tm.get_token() == "c"      # ...so the next call refreshes early
+
+def test_requests_use_the_token_refreshed_in_the_background():
+    from types import SimpleNamespace
+    from src.clients.xing_rest import XingRestTrader
+
+    issued = iter([("a", 3600), ("b", 3600)])
+    trader = XingRestTrader("does_not_exist.json")
+    trader.config = {"app_key": "k", "app_secret": "s"}
+    trader.tokens = TokenManager(lambda: next(issued))
+    sent = []
+    def post(url, tr_cd, headers, **kwargs):
+        sent.append(headers["Authorization"])
+        return SimpleNamespace(status_code=200, text="{}")
+    trader.transport.post = post
+
+    trader._send("url", "t1102", {})
+    trader.tokens._expires_at = 0.0   # the auto-refresh thread swaps the token...
+    trader.tokens.get_token()
+    trader._send("url", "t1102", {})  # ...and the next request uses it without a rejected round trip
+    assert sent == ["Bearer a", "Bearer b"]
+
+def test_only_token_errors_refresh_and_orders_are_never_resent():
+    from types import SimpleNamespace
+    from src.clients.xing_rest import XingRestTrader
+
+    issued = iter([("a", 3600), ("b", 3600), ("c", 3600)])
+    trader = XingRestTrader("does_not_exist.json")
+    trader.config = {"app_key": "k", "app_secret": "s"}
+    trader.tokens = TokenManager(lambda: next(issued))
+    replies = []
+    sent = []
+    def post(url, tr_cd, headers, **kwargs):
+        sent.append((tr_cd, headers["Authorization"]))
+        return replies.pop(0)
+    trader.transport.post = post
+
+    # A business error that merely mentions the token is not an auth error
+    replies[:] = [SimpleNamespace(status_code=500, text='{"rsp_cd": "01234", "rsp_msg": "token 계좌 오류"}')]
+    assert trader._send("url", "t1102", {}).status_code == 500
+    assert sent == [("t1102", "Bearer a")]
+
+    replies[:] = [SimpleNamespace(status_code=500, text='{"rsp_cd": "IGW00121"}'), SimpleNamespace(status_code=200, text="{}")]
+    assert trader._send("url", "t1102", {}).status_code == 200
+    assert sent[1:] == [("t1102", "Bearer a"), ("t1102", "Bearer b")]
+
+    replies[:] = [SimpleNamespace(status_code=401, text="")]
+    assert trader._send("url", "CFOAT00100", {}, retries=0).status_code == 401
+    assert sent[3:] == [("CFOAT00100", "Bearer b")]   # returned to the caller, not replayed
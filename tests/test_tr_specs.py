@@ -0,0 +1,68 @@
+import os
+import sys
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.clients.xing_rest import XingRestTrader
+from src.clients.tr_specs import TR_SPECS
+
+class FakeResponse:
+    def __init__(self, payload, tr_cont="N", status_code=200):
+        self.payload = payload
+        self.status_code = status_code
+        self.text = str(payload)
+        self.headers = {"tr_cont": tr_cont, "tr_cont_key": "k" if tr_cont == "Y" else ""}
+
+    def json(self):
+        return self.payload
+
+def make_trader(pages):
+    """pages: list of (rows, cts_date); every page but the last says tr_cont=Y."""
+    trader = XingRestTrader("does_not_exist.json")
+    trader.access_token = "token"
+    sent = []
+
+    def fake_send(url, tr_cd, body, timeout=None, retries=None, tr_cont="N", tr_cont_key=""):
+        sent.append((tr_cont, tr_cont_key, dict(body[f"{tr_cd}InBlock"])))
+        rows, cts_date = pages[len(sent) - 1]
+        more = "Y" if len(sent) < len(pages) else "N"
+        return FakeResponse({f"{tr_cd}OutBlock": {"cts_date": cts_date, "cts_time": ""}, f"{tr_cd}OutBlock1": rows}, more)
+
+    trader._send = fake_send
+    return trader, sent
+
+def bars(*dates):
+    return [{"date": d, "close": int(d[-2:])} for d in dates]
+
+def test_chart_follows_continuation_and_keeps_ascending_order():
+    trader, sent = make_trader([
+        (bars("20240105", "20240106"), "20240104"),
+        (bars("20240103", "20240104"), "20240102"),
+        (bars("20240101", "20240102"), ""),
+    ])
+    rows = trader.get_stock_chart_daily("005930", count=5)
+
+    assert [r["date"] for r in rows] == ["20240102", "20240103", "20240104", "20240105", "20240106"]
+    assert [s[0] for s in sent] == ["N", "Y", "Y"]
+    assert sent[1][1] == "k" and sent[1][2]["cts_date"] == "20240104"
+    # later pages only ask for what is still missing
+    assert [s[2]["qrycnt"] for s in sent] == [5, 3, 1]
+
+def test_since_stops_paging():
+    trader, sent = make_trader([
+        (bars("20240105", "20240106"), "20240104"),
+        (bars("20240103", "20240104"), "20240102"),
+        (bars("20240101", "20240102"), ""),
+    ])
+    rows = list(trader.iter_tr("t8413", "101W6000", since="20240104", ncnt=1))
+
+    assert [r["date"] for r in rows] == ["20240106", "20240105", "20240104"]
+    assert len(sent) == 2
+    assert sent[0][2]["qrycnt"] == TR_SPECS["t8413"].page_size
+
+def test_failed_first_page_returns_none():
+    trader = XingRestTrader("does_not_exist.json")
+    trader.access_token = "token"
+    trader._send = lambda *a, **k: FakeResponse({}, status_code=500)
+    assert trader.get_futures_chart_minute("101W6000") is None
@@ -0,0 +1,39 @@
+import os
+import sys
+import json
+import urllib.request
+import urllib.error
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.services.webhook_server import WebhookServer, SECRET_HEADER
+
+def _post(port, update, secret="s3cret", path="/telegram"):
+    """Act as Telegram: POST one update to the local receiver."""
+    req = urllib.request.Request(f"http://127.0.0.1:{port}{path}", data=json.dumps(update).encode("utf-8"),
+                                 headers={"Content-Type": "application/json", SECRET_HEADER: secret})
+    try:
+        return urllib.request.urlopen(req, timeout=5).status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+def _update(update_id, chat_id, text):
+    return {"update_id": update_id, "message": {"chat": {"id": chat_id}, "from": {"username": "tester"}, "text": text}}
+
+def test_webhook_validates_dedupes_and_dispatches():
+    received = []
+    server = WebhookServer(lambda chat_id, text: received.append((chat_id, text)), host="127.0.0.1", port=0, secret_token="s3cret")
+    port = server.start()
+    try:
+        assert _post(port, _update(1, 42, "/price 005930")) == 200
+        assert _post(port, _update(1, 42, "/price 005930")) == 200      # redelivery
+        assert _post(port, _update(2, 42, "hi"), secret="wrong") == 403
+        assert _post(port, _update(3, 42, "hi"), path="/other") == 404
+        assert _post(port, {"update_id": 4, "edited_message": {}}) == 200
+        assert _post(port, _update(5, 7, "hello")) == 200
+    finally:
+        server.stop()
+
+    assert received == [(42, "/price 005930"), (7, "hello")]
+    assert server.stats() == {"received": 3, "duplicates": 1, "rejected": 1}